@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from . import embeddings, search
+from . import clusters, embeddings, models, search, tiles
 
 
 def create_router():
@@ -12,5 +12,8 @@ def create_router():
         embeddings.router, prefix="/api/embedding", tags=["embedding"]
     )
     router.include_router(search.router, prefix="/api/search", tags=["search"])
+    router.include_router(tiles.router, prefix="/api/tiles", tags=["tiles"])
+    router.include_router(models.router, prefix="/api/models", tags=["models"])
+    router.include_router(clusters.router, prefix="/api/clusters", tags=["clusters"])
 
     return router
@@ -0,0 +1,74 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import logging
+
+from fastapi import APIRouter, HTTPException
+from pydantic import ValidationError
+
+from multimodalexplorer.api.executors import (
+    embedding_executor,
+    saturated_http_exception,
+)
+from multimodalexplorer.functions.fetch_clusters import fetch_cluster, fetch_clusters
+from multimodalexplorer.types.route_types import ClustersResponse, ClusterSummary
+from multimodalexplorer.utils.executor import ExecutorSaturatedError
+
+# Set up logging
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("", response_model=ClustersResponse)
+async def get_clusters():
+
+    try:
+        clusters = await embedding_executor.run(fetch_clusters)
+        return ClustersResponse(**clusters)
+
+    except FileNotFoundError as e:
+        logger.error(f"No cluster summary: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected loading clusters: {str(e)}")
+        raise saturated_http_exception(e)
+
+    except Exception as e:
+        if isinstance(e, ValidationError):
+            logger.error("Validation error on loading clusters")
+        else:
+            logger.error(f"Failed to load clusters: {str(e)}")
+
+        raise HTTPException(
+            status_code=500, detail=f"Failed to load clusters: {str(e)}"
+        )
+
+
+@router.get("/{cluster}", response_model=ClusterSummary)
+async def get_cluster(cluster: int, include_centroid: bool = False):
+
+    try:
+        summary = await embedding_executor.run(fetch_cluster, cluster, include_centroid)
+        return ClusterSummary(**summary)
+
+    except (FileNotFoundError, KeyError) as e:
+        logger.error(f"Cluster not found: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected loading cluster: {str(e)}")
+        raise saturated_http_exception(e)
+
+    except Exception as e:
+        if isinstance(e, ValidationError):
+            logger.error("Validation error on loading cluster")
+        else:
+            logger.error(f"Failed to load cluster: {str(e)}")
+
+        raise HTTPException(status_code=500, detail=f"Failed to load cluster: {str(e)}")
@@ -6,15 +6,37 @@
 
 import logging
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import ValidationError
 
-from multimodalexplorer.functions.fetch_embed import fetch_embeds, fetch_embeds_details
+from multimodalexplorer.api.executors import (
+    embedding_executor,
+    saturated_http_exception,
+)
+from multimodalexplorer.functions.fetch_embed import (
+    JSON_MEDIA_TYPE,
+    fetch_embeds,
+    fetch_embeds_binary,
+    fetch_embeds_details,
+    fetch_embeds_etag,
+    fetch_nearest_points,
+    fetch_points_in_region,
+    fetch_region_cluster_counts,
+    negotiate_embeds_media_type,
+)
 from multimodalexplorer.types.route_types import (
+    ClusterCountsResponse,
     EmbeddingsDetailsRequest,
     EmbeddingsDetailsResponse,
     EmbeddingsResponse,
+    NearestPointsRequest,
+    NearestPointsResponse,
+    RegionRequest,
+    SelectPointsRequest,
+    SelectPointsResponse,
 )
+from multimodalexplorer.utils.executor import ExecutorSaturatedError
+from multimodalexplorer.utils.helpers import etag_matches
 
 # Set up logging
 logging.basicConfig(level=logging.ERROR)
@@ -24,12 +46,33 @@ router = APIRouter()
 
 
 @router.get("/get_embeddings", response_model=EmbeddingsResponse)
-async def get_embeddings():
+async def get_embeddings(request: Request, response: Response):
 
     try:
-        embeddings = fetch_embeds()
+        media_type = negotiate_embeds_media_type(request.headers.get("accept"))
+        etag = fetch_embeds_etag(media_type)
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept"})
+
+        # The body may come from a newer projection than the ETag checked
+        # above; it is sent with the ETag it was read with
+        if media_type != JSON_MEDIA_TYPE:
+            etag, body = await embedding_executor.run(fetch_embeds_binary, media_type)
+            return Response(
+                content=body,
+                media_type=media_type,
+                headers={"ETag": etag, "Vary": "Accept"},
+            )
+
+        etag, embeddings = await embedding_executor.run(fetch_embeds)
+        response.headers.update({"ETag": etag, "Vary": "Accept"})
         return EmbeddingsResponse(data=embeddings)
 
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected loading embeddings: {str(e)}")
+        raise saturated_http_exception(e)
+
     except Exception as e:
         if isinstance(e, ValidationError):
             logger.error("Validation error on loading embeddings")
@@ -45,9 +88,19 @@ async def get_embeddings():
 async def get_embeddings_details(embed_points: EmbeddingsDetailsRequest):
 
     try:
-        embeddings_details = fetch_embeds_details(embed_points.points)
+        embeddings_details = await embedding_executor.run(
+            fetch_embeds_details, embed_points.points
+        )
         return EmbeddingsDetailsResponse(data=embeddings_details)
 
+    except IndexError as e:
+        logger.error(f"Invalid embeddings details request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected loading embeddings details: {str(e)}")
+        raise saturated_http_exception(e)
+
     except Exception as e:
         if isinstance(e, ValidationError):
             logger.error("Validation error on loading embeddings details")
@@ -57,3 +110,62 @@ async def get_embeddings_details(embed_points: EmbeddingsDetailsRequest):
         raise HTTPException(
             status_code=500, detail=f"Failed to load embeddings details: {str(e)}"
         )
+
+
+async def _run_spatial_query(description: str, func, *args) -> dict:
+    try:
+        return await embedding_executor.run(func, *args)
+
+    except ValueError as e:
+        logger.error(f"Invalid {description} request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected {description}: {str(e)}")
+        raise saturated_http_exception(e)
+
+    except Exception as e:
+        if isinstance(e, ValidationError):
+            logger.error(f"Validation error on {description}")
+        else:
+            logger.error(f"Failed to {description}: {str(e)}")
+
+        raise HTTPException(
+            status_code=500, detail=f"Failed to {description}: {str(e)}"
+        )
+
+
+@router.post("/select_points", response_model=SelectPointsResponse)
+async def select_points(select_request: SelectPointsRequest):
+    result = await _run_spatial_query(
+        "select points",
+        fetch_points_in_region,
+        select_request.rect,
+        select_request.polygon,
+        select_request.offset,
+        select_request.limit,
+    )
+    return SelectPointsResponse(**result)
+
+
+@router.post("/nearest_points", response_model=NearestPointsResponse)
+async def nearest_points(nearest_request: NearestPointsRequest):
+    result = await _run_spatial_query(
+        "find nearest points",
+        fetch_nearest_points,
+        nearest_request.x,
+        nearest_request.y,
+        nearest_request.k,
+    )
+    return NearestPointsResponse(**result)
+
+
+@router.post("/count_clusters", response_model=ClusterCountsResponse)
+async def count_clusters(region_request: RegionRequest):
+    result = await _run_spatial_query(
+        "count clusters",
+        fetch_region_cluster_counts,
+        region_request.rect,
+        region_request.polygon,
+    )
+    return ClusterCountsResponse(**result)
@@ -0,0 +1,66 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import logging
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
+
+from multimodalexplorer.api.executors import (
+    saturated_http_exception,
+    search_executor,
+)
+from multimodalexplorer.functions.search_faiss_index import model_registry
+from multimodalexplorer.types.route_types import (
+    ModelEvictResponse,
+    ModelsStatusResponse,
+)
+from multimodalexplorer.utils.executor import ExecutorSaturatedError
+from multimodalexplorer.utils.helpers import MODEL_IDS
+
+# Set up logging
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("/status", response_model=ModelsStatusResponse)
+async def get_models_status():
+
+    return ModelsStatusResponse(**model_registry.status())
+
+
+@router.get("/ready", response_model=ModelsStatusResponse)
+async def get_models_ready():
+
+    # Load balancers hold traffic back until the preloaded models are warm
+    status = model_registry.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+
+    return ModelsStatusResponse(**status)
+
+
+@router.post("/{dataset_type}/evict", response_model=ModelEvictResponse)
+async def evict_model(dataset_type: str):
+
+    if dataset_type not in MODEL_IDS:
+        raise HTTPException(
+            status_code=404, detail=f"No model for dataset type '{dataset_type}'"
+        )
+
+    try:
+        evicted = await search_executor.run(model_registry.evict, dataset_type)
+        return ModelEvictResponse(dataset_type=dataset_type, evicted=evicted)
+
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected model eviction: {str(e)}")
+        raise saturated_http_exception(e)
+
+    except Exception as e:
+        logger.error(f"Failed to evict model: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to evict model: {str(e)}")
@@ -9,8 +9,27 @@ import logging
 from fastapi import APIRouter, HTTPException
 from pydantic import ValidationError
 
-from multimodalexplorer.functions.search_faiss_index import SearchFaissIndex
-from multimodalexplorer.types.route_types import SearchRequest, SearchResponse
+from multimodalexplorer.api.executors import (
+    executors_metrics,
+    saturated_http_exception,
+    search_executor,
+)
+from multimodalexplorer.functions.search_faiss_index import (
+    SearchFaissIndex,
+    embedding_cache,
+    index_manager,
+    result_cache,
+)
+from multimodalexplorer.types.route_types import (
+    SearchBatchRequest,
+    SearchBatchResponse,
+    SearchMetricsResponse,
+    SearchRequest,
+    SearchResponse,
+)
+from multimodalexplorer.utils.batcher import MicroBatcher
+from multimodalexplorer.utils.executor import ExecutorSaturatedError
+from multimodalexplorer.utils.utils import parse_arguments, select_params
 
 # Set up logging
 logging.basicConfig(level=logging.ERROR)
@@ -18,18 +37,75 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Parse command line arguments
+args = parse_arguments()
+(search_batching,) = select_params(args, ["search_batching"])
+
+# Coalesces concurrent single-query searches into batched searches
+search_batcher = MicroBatcher(
+    lambda search_queries: SearchFaissIndex().process_batch(search_queries),
+    max_batch_size=search_batching.get("max_batch_size", 32),
+    max_wait_ms=search_batching.get("max_wait_ms", 5.0),
+    max_queue_size=search_batching.get("max_queue_size", 0),
+    executor=search_executor,
+    name="search",
+)
+
 
 @router.post("/search_data", response_model=SearchResponse)
 async def get_search_result(search_request: SearchRequest) -> dict:
 
     try:
-        search = SearchFaissIndex()
-        search_result = search.process(search_request.model_dump())
+        search_result = await search_batcher.submit(search_request.model_dump())
 
-        return SearchResponse(data=search_result)
+        return SearchResponse(data=search_result["data"])
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected search: {str(e)}")
+        raise saturated_http_exception(e)
     except Exception as e:
         if isinstance(e, ValidationError):
             logger.error("Validation error on search index")
         else:
             logger.error(f"Failed to search index: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to search index: {str(e)}")
+
+
+@router.post("/search_batch", response_model=SearchBatchResponse)
+async def get_search_batch_result(search_request: SearchBatchRequest) -> dict:
+
+    try:
+        search = SearchFaissIndex()
+        search_results = await search_executor.run(
+            search.process_batch,
+            [search_query.model_dump() for search_query in search_request.queries],
+        )
+
+        return SearchBatchResponse(data=search_results)
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected batch search: {str(e)}")
+        raise saturated_http_exception(e)
+    except ValueError as e:
+        logger.error(f"Invalid batch search: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        if isinstance(e, ValidationError):
+            logger.error("Validation error on batch search index")
+        else:
+            logger.error(f"Failed to batch search index: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to batch search index: {str(e)}"
+        )
+
+
+@router.get("/metrics", response_model=SearchMetricsResponse)
+async def get_search_metrics():
+
+    return SearchMetricsResponse(
+        index=index_manager.metrics(),
+        batching=search_batcher.metrics(),
+        executors=executors_metrics(),
+        cache={
+            "embedding": embedding_cache.metrics(),
+            "result": result_cache.metrics(),
+        },
+    )
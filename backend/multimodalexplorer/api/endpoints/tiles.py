@@ -0,0 +1,133 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import logging
+from typing import Any, Callable
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+
+from multimodalexplorer.api.executors import (
+    embedding_executor,
+    saturated_http_exception,
+)
+from multimodalexplorer.functions.fetch_tiles import (
+    fetch_tile_cells,
+    fetch_tile_points,
+    fetch_tiles_etag,
+    fetch_tiles_meta,
+)
+from multimodalexplorer.types.route_types import (
+    TileCellsResponse,
+    TileMetaResponse,
+    TilePointsResponse,
+)
+from multimodalexplorer.utils.executor import ExecutorSaturatedError
+from multimodalexplorer.utils.helpers import etag_matches
+
+# Set up logging
+logging.basicConfig(level=logging.ERROR)
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Bound the work and response size of a single viewport request
+MAX_TILE_POINTS = 50000
+MAX_TILE_CELLS = 50000
+
+
+async def _run_tiles(
+    request: Request, response: Response, description: str, func: Callable, *args
+) -> Any:
+    """
+    Run a tile lookup off the event loop. Responses carry the ETag of the
+    pyramid they were read from, so clients revalidate cached tiles after a
+    rebuild.
+    """
+    try:
+        etag = fetch_tiles_etag()
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # The lookup resolves the pyramid once and returns its own ETag
+        etag, result = await embedding_executor.run(func, *args)
+        response.headers["ETag"] = etag
+        return result
+
+    except FileNotFoundError as e:
+        logger.error(f"No tiles for {description}: {str(e)}")
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except ValueError as e:
+        logger.error(f"Invalid {description} request: {str(e)}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except ExecutorSaturatedError as e:
+        logger.error(f"Rejected loading {description}: {str(e)}")
+        raise saturated_http_exception(e)
+
+    except Exception as e:
+        if isinstance(e, ValidationError):
+            logger.error(f"Validation error on loading {description}")
+        else:
+            logger.error(f"Failed to load {description}: {str(e)}")
+
+        raise HTTPException(
+            status_code=500, detail=f"Failed to load {description}: {str(e)}"
+        )
+
+
+@router.get("/meta", response_model=TileMetaResponse)
+async def get_tiles_meta(request: Request, response: Response):
+    return await _run_tiles(request, response, "tiles meta", fetch_tiles_meta)
+
+
+@router.get("/points", response_model=TilePointsResponse)
+async def get_tile_points(
+    request: Request,
+    response: Response,
+    zoom: int = Query(..., ge=0, description="zoom level, 0 is the whole plot"),
+    x_min: float = Query(-1.0),
+    y_min: float = Query(-1.0),
+    x_max: float = Query(1.0),
+    y_max: float = Query(1.0),
+    limit: int = Query(
+        MAX_TILE_POINTS, gt=0, le=MAX_TILE_POINTS, description="maximum points"
+    ),
+):
+    return await _run_tiles(
+        request,
+        response,
+        "tile points",
+        fetch_tile_points,
+        (x_min, y_min, x_max, y_max),
+        zoom,
+        limit,
+    )
+
+
+@router.get("/cells", response_model=TileCellsResponse)
+async def get_tile_cells(
+    request: Request,
+    response: Response,
+    zoom: int = Query(..., ge=0, description="zoom level, 0 is the whole plot"),
+    x_min: float = Query(-1.0),
+    y_min: float = Query(-1.0),
+    x_max: float = Query(1.0),
+    y_max: float = Query(1.0),
+    limit: int = Query(
+        MAX_TILE_CELLS, gt=0, le=MAX_TILE_CELLS, description="maximum cells"
+    ),
+):
+    return await _run_tiles(
+        request,
+        response,
+        "tile cells",
+        fetch_tile_cells,
+        (x_min, y_min, x_max, y_max),
+        zoom,
+        limit,
+    )
@@ -0,0 +1,46 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from typing import Any, Dict
+
+from fastapi import HTTPException
+
+from multimodalexplorer.utils.executor import BoundedExecutor, ExecutorSaturatedError
+from multimodalexplorer.utils.utils import parse_arguments, select_params
+
+# Parse command line arguments
+args = parse_arguments()
+(executor_args,) = select_params(args, ["executors"])
+
+# One bounded pool per endpoint group, so slow searches cannot starve the
+# embedding routes and vice versa
+embedding_executor = BoundedExecutor("embedding", **executor_args.get("embedding", {}))
+
+# Searches run on the process-wide index, caches, batcher and models, which
+# a worker process would not share
+search_executor = BoundedExecutor(
+    "search", allowed_kinds=("thread",), **executor_args.get("search", {})
+)
+
+EXECUTORS: Dict[str, BoundedExecutor] = {
+    "embedding": embedding_executor,
+    "search": search_executor,
+}
+
+
+def executors_metrics() -> Dict[str, Any]:
+    return {name: executor.metrics() for name, executor in EXECUTORS.items()}
+
+
+def shutdown_executors() -> None:
+    for executor in EXECUTORS.values():
+        executor.shutdown()
+
+
+def saturated_http_exception(e: ExecutorSaturatedError) -> HTTPException:
+    """
+    Map a rejected call to 503 so clients back off instead of piling up.
+    """
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
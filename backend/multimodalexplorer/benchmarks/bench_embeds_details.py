@@ -0,0 +1,88 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import logging
+import time
+from typing import Callable, List, Sequence
+
+import numpy as np
+import pyarrow as pa
+
+from multimodalexplorer.types.data_types import EmbeddingDataType
+from multimodalexplorer.utils.raw_data import take_rows
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+NUM_ROWS = 200_000
+REQUEST_SIZES = (10, 1_000, 100_000)
+REPEATS = 3
+
+
+def slice_rows(data_table: pa.Table, indices: Sequence[int]) -> List[EmbeddingDataType]:
+    """
+    Previous per-row lookup, kept as the baseline.
+    """
+    results = []
+
+    for idx in indices:
+        row = data_table.slice(idx, 1).to_pydict()
+        obj = {
+            "index": idx,
+            "data": row["data"][0],
+            "media_type": row["media_type"][0],
+        }
+        results.append(obj)
+
+    return results
+
+
+def make_table(num_rows: int, rng: np.random.Generator) -> pa.Table:
+    words = np.array(["embedding", "space", "explorer", "audio", "text", "sonar"])
+    data = [
+        " ".join(words[rng.integers(0, len(words), size=12)]) for _ in range(num_rows)
+    ]
+    media_types = np.where(rng.random(num_rows) < 0.5, "text", "audio").tolist()
+
+    return pa.table({"data": data, "media_type": media_types})
+
+
+def time_lookup(
+    lookup: Callable[[pa.Table, Sequence[int]], List[EmbeddingDataType]],
+    data_table: pa.Table,
+    indices: List[int],
+) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        lookup(data_table, indices)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    data_table = make_table(NUM_ROWS, rng)
+
+    logger.info(
+        f"{'indices':>10} {'slice loop (s)':>16} {'take (s)':>10} {'speedup':>9}"
+    )
+    for size in REQUEST_SIZES:
+        indices = rng.integers(0, NUM_ROWS, size=size).tolist()
+
+        assert slice_rows(data_table, indices) == take_rows(data_table, indices)
+
+        loop_seconds = time_lookup(slice_rows, data_table, indices)
+        take_seconds = time_lookup(take_rows, data_table, indices)
+
+        logger.info(
+            f"{size:>10} {loop_seconds:>16.4f} {take_seconds:>10.4f} "
+            f"{loop_seconds / take_seconds:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import itertools
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+import torch
+
+from multimodalexplorer.functions.create_faiss_index import CreateFaissIndex
+from multimodalexplorer.functions.search_faiss_index import SearchFaissIndex
+from multimodalexplorer.types.data_types import DataFileType
+from multimodalexplorer.utils.embedding_store import write_embedding_shard
+from multimodalexplorer.utils.helpers import embed_shard_name, get_file_path
+from multimodalexplorer.utils.index_manager import FaissIndexManager
+from multimodalexplorer.utils.shards import ShardReader, ordered_shard_files
+from multimodalexplorer.utils.utils import parse_arguments, select_params
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Synthetic corpus, used when the configured embed_file holds no shards
+NUM_VECTORS = 50_000
+DIM = 256
+NUM_CLUSTERS = 100
+SHARD_ROWS = 10_000
+
+NUM_QUERIES = 500
+K = 10
+TRAIN_DATA_SIZE = 20_000
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_sq8", "ivf_pq")
+NPROBES = (1, 4, 16, 64)
+EF_SEARCHES = (16, 64, 256)
+RERANK_FACTORS = (1, 4)
+
+RESULTS_FILE = "bench_search.json"
+
+
+def make_synthetic_embeddings(
+    embed_file: DataFileType,
+    num_vectors: int,
+    dim: int,
+    rng: np.random.Generator,
+) -> None:
+    """
+    Write clustered Gaussian embeddings as .npy shards, so that neighbors
+    are meaningful without downloading models or datasets.
+    """
+    centers = rng.standard_normal((NUM_CLUSTERS, dim)).astype(np.float32)
+
+    for shard, start in enumerate(range(0, num_vectors, SHARD_ROWS)):
+        rows = min(SHARD_ROWS, num_vectors - start)
+        labels = rng.integers(0, NUM_CLUSTERS, size=rows)
+        embeddings = centers[labels] + 0.5 * rng.standard_normal((rows, dim))
+
+        file_path = get_file_path(
+            embed_file["dir"], embed_file["ext"], True, embed_shard_name("text", shard)
+        )
+        write_embedding_shard(
+            file_path, [torch.from_numpy(embeddings.astype(np.float32))]
+        )
+
+
+def make_queries(
+    reader: ShardReader, num_queries: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Perturb stored embeddings into normalized queries that are close to, but
+    not exactly, a stored vector.
+    """
+    rows = rng.choice(reader.num_rows, size=num_queries, replace=False)
+    queries = reader.take(np.sort(rows))
+    faiss.normalize_L2(queries)
+
+    queries += (
+        0.1
+        * rng.standard_normal(queries.shape).astype(np.float32)
+        / np.sqrt(queries.shape[1])
+    )
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def ground_truth(reader: ShardReader, queries: np.ndarray, k: int) -> np.ndarray:
+    """
+    Exact top-k by inner product over the normalized stored embeddings,
+    streamed shard by shard into a flat index.
+    """
+    index = faiss.IndexFlatIP(reader.dim)
+
+    for _, chunk in reader.iter_chunks():
+        data = np.array(chunk, dtype=np.float32)
+        faiss.normalize_L2(data)
+        index.add(data)
+
+    _, indices = index.search(queries, k)
+    return indices
+
+
+def recall_at_k(results: List[np.ndarray], truth: np.ndarray, k: int) -> float:
+    hits = [
+        len(np.intersect1d(ids[:k], truth_ids[:k])) / k
+        for ids, truth_ids in zip(results, truth)
+    ]
+    return float(np.mean(hits))
+
+
+def index_bytes(index_file: DataFileType) -> int:
+    file_path = get_file_path(index_file["dir"], index_file["ext"], False)
+    # Ondisk builds keep their inverted lists next to the index
+    return sum(
+        path.stat().st_size
+        for path in file_path.parent.iterdir()
+        if path == file_path or path.suffix == ".ivfdata"
+    )
+
+
+def _file_signature(file_path: Path) -> Optional[Tuple[int, int]]:
+    if not file_path.exists():
+        return None
+    stat = file_path.stat()
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def build_index(
+    embed_file: DataFileType, index_file: DataFileType, index_type: str
+) -> float:
+    """
+    Build an index with CreateFaissIndex and return the build time.
+    """
+    file_path = get_file_path(index_file["dir"], index_file["ext"], True)
+    previous = _file_signature(file_path)
+
+    start = time.perf_counter()
+    CreateFaissIndex(
+        embed_file,
+        index_file,
+        TRAIN_DATA_SIZE,
+        {"mode": "chunked"},
+        {"index_type": index_type},
+    ).process()
+    elapsed = time.perf_counter() - start
+
+    # process() logs failures instead of raising, and a failed build leaves
+    # any earlier index in place
+    signature = _file_signature(file_path)
+    if signature is None or signature == previous:
+        raise RuntimeError(f"Building a {index_type} index failed, see the log above")
+    return elapsed
+
+
+def sweep_params(index: faiss.Index) -> List[Dict[str, Any]]:
+    if faiss.try_extract_index_ivf(index) is not None:
+        nlist = faiss.extract_index_ivf(index).nlist
+        return [{"nprobe": nprobe} for nprobe in NPROBES if nprobe <= nlist]
+    if "HNSW" in type(faiss.downcast_index(index)).__name__:
+        return [{"efSearch": ef_search} for ef_search in EF_SEARCHES]
+    return [{}]
+
+
+def time_search(
+    search: SearchFaissIndex,
+    queries: np.ndarray,
+    k: int,
+    search_params: Dict[str, Any],
+    rerank_factor: int,
+) -> Tuple[List[np.ndarray], float, np.ndarray]:
+    """
+    Search every query once as a batch for throughput, then one at a time
+    for latency percentiles.
+
+    Returns:
+        tuple: Result ids, queries per second and per-query latencies in ms.
+    """
+    start = time.perf_counter()
+    neighbors = search.search_embeddings(queries, k, search_params, rerank_factor)
+    qps = len(queries) / (time.perf_counter() - start)
+
+    latencies = []
+    for position in range(len(queries)):
+        start = time.perf_counter()
+        search.search_embeddings(
+            queries[position : position + 1], k, search_params, rerank_factor
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return [ids for ids, _ in neighbors], qps, np.array(latencies)
+
+
+def run_benchmark(
+    embed_file: DataFileType,
+    work_dir: Path,
+    index_types: Sequence[str] = INDEX_TYPES,
+    num_queries: int = NUM_QUERIES,
+    k: int = K,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """
+    Build every index type over the same embeddings and measure recall@k,
+    throughput, latency, build time and size for every search setting and
+    rerank factor.
+
+    Args:
+        embed_file (DataFileType): Embeddings to index.
+        work_dir (Path): Directory for the indexes.
+        index_types (Sequence[str]): Index presets or factory strings.
+        num_queries (int): Number of queries.
+        k (int): Number of neighbors.
+        seed (int): Seed of the query sample.
+
+    Returns:
+        list: One result per index type and search setting.
+    """
+    rng = np.random.default_rng(seed)
+    reader = ShardReader(embed_file)
+
+    queries = make_queries(reader, num_queries, rng)
+    truth = ground_truth(reader, queries, k)
+
+    results = []
+    for index_type in index_types:
+        index_file = {"dir": str(work_dir / f"index_{index_type}"), "ext": "bin"}
+        build_seconds = build_index(embed_file, index_file, index_type)
+
+        manager = FaissIndexManager(index_file, reload_interval=0)
+        search = SearchFaissIndex(manager=manager, cache_results=False, reader=reader)
+
+        for search_params, rerank_factor in itertools.product(
+            sweep_params(manager.get_index()), RERANK_FACTORS
+        ):
+            ids, qps, latencies = time_search(
+                search, queries, k, search_params, rerank_factor
+            )
+            results.append(
+                {
+                    "index_type": index_type,
+                    "search_params": search_params,
+                    "rerank_factor": rerank_factor,
+                    f"recall@{k}": recall_at_k(ids, truth, k),
+                    "qps": qps,
+                    "p50_ms": float(np.percentile(latencies, 50)),
+                    "p99_ms": float(np.percentile(latencies, 99)),
+                    "build_seconds": build_seconds,
+                    "index_bytes": index_bytes(index_file),
+                }
+            )
+
+    return results
+
+
+def log_table(results: List[Dict[str, Any]], k: int) -> None:
+    logger.info(
+        f"{'index':>10} {'params':>14} {'rerank':>6} {f'recall@{k}':>10} "
+        f"{'QPS':>10} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'MB':>8}"
+    )
+    for result in results:
+        params = ",".join(f"{n}={v}" for n, v in result["search_params"].items())
+        logger.info(
+            f"{result['index_type']:>10} {params or '-':>14} "
+            f"{result['rerank_factor']:>6} "
+            f"{result[f'recall@{k}']:>10.3f} {result['qps']:>10.0f} "
+            f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+            f"{result['build_seconds']:>8.1f} {result['index_bytes'] / 2**20:>8.1f}"
+        )
+
+
+def main(embed_file: Optional[DataFileType] = None) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        work_dir = Path(tmp_dir)
+
+        if embed_file is None or not ordered_shard_files(embed_file):
+            logger.info(f"Generating {NUM_VECTORS} synthetic {DIM}-d embeddings")
+            embed_file = {"dir": str(work_dir / "embedding"), "ext": "npy"}
+            make_synthetic_embeddings(
+                embed_file, NUM_VECTORS, DIM, np.random.default_rng(0)
+            )
+        else:
+            logger.info(f"Using the embeddings in {embed_file['dir']}")
+
+        results = run_benchmark(embed_file, work_dir)
+
+    log_table(results, K)
+
+    with open(RESULTS_FILE, "w") as f:
+        json.dump(results, f, indent=2)
+    logger.info(f"Wrote {RESULTS_FILE}")
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    (configured_embed_file,) = select_params(args, ["embed_file"])
+
+    main(configured_embed_file)
@@ -0,0 +1,134 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import logging
+from typing import List, Tuple
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from multimodalexplorer.types.data_types import DataFileType
+from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.raw_data import (
+    LEGACY_RAW_DATA_EXT,
+    RAW_DATA_SCHEMA,
+    raw_shard_name,
+)
+from multimodalexplorer.utils.shards import ShardReader
+from multimodalexplorer.utils.utils import parse_arguments, select_params
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ConvertRawData:
+    def __init__(self, raw_data_file: DataFileType, embed_file: DataFileType):
+        """
+        Convert a legacy raw data TSV into Arrow shards aligned with the
+        existing embedding shards.
+
+        Args:
+            raw_data_file (DataFileType): Directory and extension of the raw data.
+                The TSV is read from the same directory.
+            embed_file (DataFileType): Directory and extension of the embeddings.
+        """
+        self.raw_data_file = raw_data_file
+        self.embed_file = embed_file
+
+    def _embedding_shards(self) -> List[Tuple[str, int]]:
+        """
+        Get the raw shard name and row count of every embedding shard.
+
+        Returns:
+            list: (shard name, row count) in embedding order.
+        """
+        reader = ShardReader(self.embed_file)
+        shards = []
+
+        for file_path, num_rows in zip(reader.files, reader.counts):
+            dataset_type, file_count = file_path.stem.rsplit("_embedding_", 1)
+            shards.append((raw_shard_name(dataset_type, int(file_count)), num_rows))
+
+        return shards
+
+    def _write_shard(self, name: str, batches: List[pa.RecordBatch]) -> None:
+        dir_path, ext = self.raw_data_file.values()
+        file_path = get_file_path(dir_path, ext, True, name)
+
+        with pa.OSFile(str(file_path), "wb") as sink:
+            with pa.ipc.new_file(sink, RAW_DATA_SCHEMA) as writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+
+        logger.info(f"Wrote raw data shard {file_path}")
+
+    def _convert(self) -> None:
+        """
+        Stream the TSV and split it at the embedding shard boundaries.
+        """
+        dir_path, ext = self.raw_data_file.values()
+        if ext == LEGACY_RAW_DATA_EXT:
+            raise ValueError(
+                f"Set raw_data_file.ext to the Arrow extension, not '{ext}'."
+            )
+
+        tsv_path = get_file_path(dir_path, LEGACY_RAW_DATA_EXT, False)
+        shards = self._embedding_shards()
+
+        reader = pa_csv.open_csv(
+            tsv_path,
+            parse_options=pa_csv.ParseOptions(delimiter="\t"),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=RAW_DATA_SCHEMA, include_columns=RAW_DATA_SCHEMA.names
+            ),
+        )
+
+        pending: List[pa.RecordBatch] = []
+        pending_rows = 0
+        shard_iter = iter(shards)
+        name, num_rows = next(shard_iter, (None, 0))
+
+        for batch in reader:
+            while batch.num_rows > 0:
+                if name is None:
+                    raise ValueError("Raw data has more rows than the embeddings.")
+
+                take = min(num_rows - pending_rows, batch.num_rows)
+                pending.append(batch.slice(0, take))
+                pending_rows += take
+                batch = batch.slice(take)
+
+                if pending_rows == num_rows:
+                    self._write_shard(name, pending)
+                    pending, pending_rows = [], 0
+                    name, num_rows = next(shard_iter, (None, 0))
+
+        if name is not None:
+            raise ValueError("Raw data has fewer rows than the embeddings.")
+
+        logger.info(f"Converted {tsv_path} into {len(shards)} Arrow shards")
+
+    def process(self) -> None:
+        """
+        Process the conversion and handle exceptions.
+        """
+        try:
+            self._convert()
+        except Exception as e:
+            logger.exception(f"An error occurred during raw data conversion: {e}")
+            return None
+
+
+if __name__ == "__main__":
+    p_list = ["raw_data_file", "embed_file"]
+    args = parse_arguments()
+    params = select_params(args, p_list)
+
+    logger.info("Arguments: %s", params)
+
+    processor = ConvertRawData(*params)
+    processor.process()
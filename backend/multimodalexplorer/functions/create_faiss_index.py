@@ -5,30 +5,46 @@
 
 
 import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import faiss
 import numpy as np
 import torch
+from faiss.contrib.ondisk import merge_ondisk
 
 from multimodalexplorer.types.data_types import DataFileType
 from multimodalexplorer.utils.helpers import get_file_path
-from multimodalexplorer.utils.utils import (
-    concat_embed_from_dir,
-    parse_arguments,
-    select_params,
+from multimodalexplorer.utils.index_factory import resolve_index_factory
+from multimodalexplorer.utils.index_state import (
+    coarse_distance,
+    load_index_state,
+    load_tombstones,
+    save_index_state,
 )
+from multimodalexplorer.utils.shards import ShardReader
+from multimodalexplorer.utils.training_sample import load_or_create_sample
+from multimodalexplorer.utils.utils import parse_arguments, select_params
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+BUILD_MODES = ("memory", "chunked", "ondisk")
+
+
 class CreateFaissIndex:
     def __init__(
         self,
         embed_file: DataFileType,
         index_file: DataFileType,
         train_data_size: int,
+        index_build: Optional[Dict[str, Any]] = None,
+        index_args: Optional[Dict[str, Any]] = None,
     ):
         """
         Initialize CreateFaissIndex class with directory and filename parameters.
@@ -37,59 +53,270 @@ class CreateFaissIndex:
             embed_file (DataFileType): Directory and filename for input embeddings.
             index_file (DataFileType): Directory and filename for output index.
             train_data_size (int): Size of the random subset used for training the index.
+            index_build (dict): Build settings with keys
+                - mode (str): memory loads every embedding at once, chunked
+                  streams them into the index, ondisk also builds partial
+                  indexes and merges their inverted lists on disk.
+                - add_batch_size (int): Rows normalized and added at a time.
+                - ondisk_part_rows (int): Rows per partial index in ondisk mode.
+                - train_seed (int): Seed of the training sample.
+                - train_stratify (bool): Balance the training sample across
+                  media types.
+            index_args (dict): Index arguments; index_type is a Faiss factory
+                string, a preset name or "auto".
         """
         self.embed_file = embed_file
         self.index_file = index_file
         self.train_data_size = train_data_size
 
-    def _create_index(self):
+        index_build = index_build or {}
+        self.build_mode = index_build.get("mode", "memory")
+        self.add_batch_size = index_build.get("add_batch_size", 65536)
+        self.ondisk_part_rows = index_build.get("ondisk_part_rows", 1000000)
+        self.train_seed = index_build.get("train_seed", 0)
+        self.train_stratify = index_build.get("train_stratify", True)
+        self.index_type = (index_args or {}).get("index_type")
+
+        if self.build_mode not in BUILD_MODES:
+            raise ValueError(
+                f"Unsupported build mode: {self.build_mode}. Supported modes: {', '.join(BUILD_MODES)}"
+            )
+
+    def _new_index(self, reader: ShardReader, use_gpu: bool = True) -> faiss.Index:
         """
-        Create Faiss index using OPQ64, IVF1024, and PQ64 methods.
+        Create an empty Faiss index of the configured type.
         """
-        # Concatenate embeddings from directory
-        embeddings = concat_embed_from_dir(self.embed_file["dir"])
-        vector_dims = embeddings.shape[1]
-
-        # Create Faiss index with OPQ64, IVF1024, and PQ64 methods
-        index = faiss.index_factory(vector_dims, "OPQ64,IVF1024,PQ64")
+        factory = resolve_index_factory(
+            self.index_type,
+            reader.num_rows,
+            reader.dim,
+            min(self.train_data_size, reader.num_rows),
+        )
+        index = faiss.index_factory(reader.dim, factory)
+        logger.info(f"Creating Faiss index '{factory}'")
 
         # Move index to GPU if available
-        if torch.cuda.is_available():
+        is_ivf = faiss.try_extract_index_ivf(index) is not None
+        if use_gpu and is_ivf and torch.cuda.is_available():
             co = faiss.GpuMultipleClonerOptions()
             co.useFloat16 = True
             index = faiss.index_cpu_to_all_gpus(index, co=co)
 
-        # Convert embeddings to numpy array and normalize them
+        return index
+
+    @staticmethod
+    def _to_cpu(index: faiss.Index) -> faiss.Index:
+        # GPU indexes have to be copied back before they can be written
         if torch.cuda.is_available():
-            data = embeddings.detach().cpu().numpy().astype(np.float32)
-        else:
-            data = embeddings.numpy().astype(np.float32)
+            return faiss.index_gpu_to_cpu(index)
+        return index
+
+    def _train_index(
+        self, index: faiss.Index, reader: ShardReader, sample_idxs: np.ndarray
+    ) -> None:
+        """
+        Train the index on the sampled rows gathered from the memory-mapped
+        shards, normalized like the rows that are added, without loading the
+        rest of the embeddings.
+        """
+        training_data = reader.take(sample_idxs)
+        faiss.normalize_L2(training_data)
+
+        index.train(training_data)
+        logger.info(f"Training index with sample of data - {len(training_data)}")
+
+    def _add_chunks(
+        self, index: faiss.Index, chunks: Iterable[Tuple[int, np.ndarray]]
+    ) -> None:
+        """
+        Normalize and add chunks of embeddings, keyed by their global row.
+        """
+        for row_start, chunk in chunks:
+            data = np.array(chunk, dtype=np.float32)
+            faiss.normalize_L2(data)
+
+            if faiss.try_extract_index_ivf(index) is None:
+                # Flat and graph indexes number rows in insertion order
+                index.add(data)
+                continue
+
+            ids = np.arange(row_start, row_start + data.shape[0], dtype=np.int64)
+            index.add_with_ids(data, ids)
+
+    def _remove_tombstones(self, index: faiss.Index, ids: np.ndarray) -> None:
+        """
+        Remove deleted ids from an index. Only IVF indexes keep the ids of
+        the other rows when some are removed.
+        """
+        if len(ids) == 0:
+            return
+        if faiss.try_extract_index_ivf(index) is None:
+            raise ValueError("Deleting ids requires an IVF index type.")
+
+        removed = index.remove_ids(faiss.IDSelectorBatch(ids))
+        logger.info(f"Removed {removed} deleted ids from index")
+
+    def _write_index(self, index: faiss.Index, file_path: Path) -> None:
+        """
+        Write index to a temporary file and rename it so that a running API
+        never observes a partially written index.
+        """
+        tmp_file_path = file_path.with_name(f"{file_path.name}.tmp")
+        faiss.write_index(index, str(tmp_file_path))
+        os.replace(tmp_file_path, file_path)
+
+    def _build_in_memory(
+        self, reader: ShardReader, sample_idxs: np.ndarray
+    ) -> faiss.Index:
+        # Fill a single float32 matrix shard by shard
+        data = reader.read_all()
+
+        # Create Faiss index of the configured type
+        index = self._new_index(reader)
+
+        # Normalize the embeddings in place
         faiss.normalize_L2(data)
 
-        # Get random subset without replacement for training the index
-        random_data_subset = embeddings[
-            np.random.choice(
-                embeddings.shape[0], size=self.train_data_size, replace=False
-            ),
-            :,
-        ]
-
-        # Train the index with the random subset
-        index.train(random_data_subset)
-        logger.info(
-            f"Training index with random subset of data - {len(random_data_subset)}"
-        )
+        # Train the index on the sampled rows of the normalized embeddings
+        training_data = data[sample_idxs]
+        index.train(training_data)
+        logger.info(f"Training index with sample of data - {len(training_data)}")
 
         # Add all data to the index
         index.add(data)
         logger.info("Adding data to index")
 
+        return self._to_cpu(index)
+
+    def _build_chunked(
+        self, reader: ShardReader, sample_idxs: np.ndarray
+    ) -> faiss.Index:
+        index = self._new_index(reader)
+        self._train_index(index, reader, sample_idxs)
+
+        self._add_chunks(index, reader.iter_chunks(self.add_batch_size))
+        logger.info(f"Added data to index in chunks of {self.add_batch_size} rows")
+
+        return self._to_cpu(index)
+
+    def _build_ondisk(
+        self, reader: ShardReader, file_path: Path, sample_idxs: np.ndarray
+    ) -> Tuple[faiss.Index, Path]:
+        """
+        Fill partial indexes from the trained index one at a time, then merge
+        their inverted lists into an OnDiskInvertedLists file next to the
+        index, so that neither the build nor the merge holds all codes in RAM.
+        """
+        trained_index = self._new_index(reader, use_gpu=False)
+        if faiss.try_extract_index_ivf(trained_index) is None:
+            raise ValueError("The ondisk build mode requires an IVF index type.")
+        self._train_index(trained_index, reader, sample_idxs)
+
+        parts_dir = file_path.parent / f"{file_path.stem}_parts"
+        parts_dir.mkdir(parents=True, exist_ok=True)
+        trained_path = parts_dir / "trained.index"
+        faiss.write_index(trained_index, str(trained_path))
+
+        part_paths: List[str] = []
+        part_index: Optional[faiss.Index] = None
+
+        def write_part() -> None:
+            part_path = parts_dir / f"part_{len(part_paths)}.index"
+            faiss.write_index(part_index, str(part_path))
+            part_paths.append(str(part_path))
+            logger.info(f"Wrote partial index {part_path} - {part_index.ntotal}")
+
+        for row_start, chunk in reader.iter_chunks(self.add_batch_size):
+            if part_index is None:
+                part_index = faiss.read_index(str(trained_path))
+
+            self._add_chunks(part_index, [(row_start, chunk)])
+
+            if part_index.ntotal >= self.ondisk_part_rows:
+                write_part()
+                part_index = None
+
+        if part_index is not None:
+            write_part()
+            part_index = None
+
+        # A new data file per build, indexes already loaded keep their own
+        ivfdata_path = file_path.with_name(f"{file_path.stem}.{time.time_ns()}.ivfdata")
+        index = faiss.read_index(str(trained_path))
+        merge_ondisk(index, part_paths, str(ivfdata_path))
+        logger.info(f"Merged {len(part_paths)} partial indexes into {ivfdata_path}")
+
+        shutil.rmtree(parts_dir)
+        return index, ivfdata_path
+
+    def _remove_stale_ivfdata(
+        self, file_path: Path, keep: Optional[Path] = None
+    ) -> None:
+        """
+        Delete inverted list files of previous ondisk builds. Processes that
+        still map them keep reading them until they reload the index.
+        """
+        for ivfdata_path in file_path.parent.glob(f"{file_path.stem}.*.ivfdata"):
+            if ivfdata_path != keep:
+                ivfdata_path.unlink()
+
+    def _create_index(self):
+        """
+        Create the Faiss index of the configured type.
+
+        Rows are added with their global row index as id, so search results
+        map directly to raw data rows in every build mode. The training
+        sample is persisted next to the index so that rebuilds are
+        reproducible.
+        """
+        reader = ShardReader(self.embed_file)
+
         # Get file path for saving the index
         dir_path, ext = self.index_file.values()
         file_path = get_file_path(dir_path, ext)
 
-        # Write index to file
-        faiss.write_index(index, str(file_path))
+        sample_idxs = load_or_create_sample(
+            reader,
+            file_path.with_name(f"{file_path.stem}_train_sample.npy"),
+            self.train_data_size,
+            self.train_seed,
+            self.train_stratify,
+        )
+
+        ivfdata_path = None
+        if self.build_mode == "ondisk":
+            index, ivfdata_path = self._build_ondisk(reader, file_path, sample_idxs)
+        elif self.build_mode == "chunked":
+            index = self._build_chunked(reader, sample_idxs)
+        else:
+            index = self._build_in_memory(reader, sample_idxs)
+
+        # Deleted ids stay deleted across full rebuilds
+        tombstones = load_tombstones(file_path)
+        if ivfdata_path is None:
+            self._remove_tombstones(index, tombstones)
+        elif len(tombstones):
+            logger.warning("Deleted ids are not removed from ondisk indexes")
+
+        training_data = reader.take(sample_idxs)
+        faiss.normalize_L2(training_data)
+        previous_state = load_index_state(file_path) or {}
+
+        self._write_index(index, file_path)
+        save_index_state(
+            file_path,
+            {
+                "version": previous_state.get("version", 0) + 1,
+                "build_mode": self.build_mode,
+                "shards": [shard_path.name for shard_path in reader.files],
+                "num_rows": reader.num_rows,
+                "trained_rows": reader.num_rows,
+                "train_distance": coarse_distance(index, training_data),
+                "num_deleted": len(tombstones),
+                "drift": None,
+            },
+        )
+        self._remove_stale_ivfdata(file_path, ivfdata_path)
         logger.info(f"Created Faiss index for embeddings - {index.ntotal}")
 
     def process(self):
@@ -104,7 +331,13 @@ class CreateFaissIndex:
 
 
 if __name__ == "__main__":
-    p_list = ["embed_file", "index_file", "train_data_size"]
+    p_list = [
+        "embed_file",
+        "index_file",
+        "train_data_size",
+        "index_build",
+        "index_args",
+    ]
     args = parse_arguments()
     params = select_params(args, p_list)
 
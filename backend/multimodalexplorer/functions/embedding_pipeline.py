@@ -0,0 +1,264 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import torch
+
+from multimodalexplorer.utils.utils import load_model
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage queue
+_DONE = object()
+
+# Model of an encoder worker process
+_WORKER_MODEL: Any = None
+
+
+def _init_encoder_worker(dataset_type: str, torch_threads: Optional[int]) -> None:
+    """
+    Load the model once per encoder worker process.
+    """
+    global _WORKER_MODEL
+
+    if torch_threads:
+        torch.set_num_threads(torch_threads)
+
+    _WORKER_MODEL = load_model(dataset_type)
+    if _WORKER_MODEL is None:
+        raise ValueError(f"No pipeline available for dataset type '{dataset_type}'")
+
+
+def _encode_in_worker(data: List[Any], source_lang: str) -> Tuple[torch.Tensor, float]:
+    start = time.perf_counter()
+    embeddings = _WORKER_MODEL.predict(data, source_lang=source_lang)
+    return embeddings.cpu(), time.perf_counter() - start
+
+
+class StageStats:
+    def __init__(self, name: str, parallelism: int = 1):
+        self.name = name
+        self.parallelism = parallelism
+        self.rows = 0
+        self.busy_seconds = 0.0
+
+    def add(self, rows: int, seconds: float) -> None:
+        self.rows += rows
+        self.busy_seconds += seconds
+
+    def rows_per_second(self) -> float:
+        if not self.busy_seconds:
+            return 0.0
+        # Busy time is summed over parallel workers
+        return self.rows * self.parallelism / self.busy_seconds
+
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        dataset_type: str,
+        dataset_src_lang: str,
+        extract_fn: Callable[[Dict[str, Any]], List[Any]],
+        num_workers: int = 0,
+        torch_threads: Optional[int] = None,
+        queue_size: int = 4,
+    ):
+        """
+        Embed batches with overlapping read, encode and write stages.
+
+        - Reader: a thread pulling batches from the dataset and extracting
+          their data, prefetching up to `queue_size` batches.
+        - Encoders: `num_workers` processes, each with its own model and
+          `torch_threads` intra-op threads. With 0 workers the model runs in
+          the calling process, which is the right choice on a GPU.
+        - Writer: a thread receiving embeddings in batch order.
+
+        Args:
+            dataset_type (str): Type of dataset.
+            dataset_src_lang (str): Source language of the dataset.
+            extract_fn (Callable): Maps a dataset batch to the data to embed.
+            num_workers (int): Number of encoder processes.
+            torch_threads (int): Intra-op threads of every encoder, None keeps
+                torch's default.
+            queue_size (int): Capacity of the queues between stages, per worker.
+        """
+        self.dataset_type = dataset_type
+        self.dataset_src_lang = dataset_src_lang
+        self.extract_fn = extract_fn
+        self.num_workers = max(0, num_workers)
+        self.torch_threads = torch_threads
+        self.queue_size = max(1, queue_size)
+
+        self.stats = {
+            "reader": StageStats("reader"),
+            "encoder": StageStats("encoder", max(1, self.num_workers)),
+            "writer": StageStats("writer"),
+        }
+
+    def _read(
+        self, batches: Iterable[Dict[str, Any]], read_queue: "queue.Queue[Any]"
+    ) -> None:
+        stats = self.stats["reader"]
+        try:
+            iterator = iter(batches)
+            while True:
+                start = time.perf_counter()
+                batch = next(iterator, _DONE)
+                if batch is _DONE:
+                    break
+                data = self.extract_fn(batch)
+                num_source_rows = len(next(iter(batch.values())))
+                stats.add(len(data), time.perf_counter() - start)
+
+                read_queue.put((data, num_source_rows))
+        except Exception as e:
+            read_queue.put(e)
+        read_queue.put(_DONE)
+
+    def _write(
+        self,
+        write_queue: "queue.Queue[Any]",
+        write_fn: Callable[[List[Any], torch.Tensor, int], None],
+        errors: List[BaseException],
+    ) -> None:
+        stats = self.stats["writer"]
+        while True:
+            item = write_queue.get()
+            if item is _DONE:
+                return
+            if errors:
+                # Keep draining so the producer never blocks on a full queue
+                continue
+
+            data, embeddings, num_source_rows = item
+            start = time.perf_counter()
+            try:
+                write_fn(data, embeddings, num_source_rows)
+            except Exception as e:
+                errors.append(e)
+            stats.add(len(data), time.perf_counter() - start)
+
+    def _encode_local(self, model: Any, data: List[Any]) -> Tuple[torch.Tensor, float]:
+        start = time.perf_counter()
+        embeddings = model.predict(data, source_lang=self.dataset_src_lang)
+        return embeddings, time.perf_counter() - start
+
+    def run(
+        self,
+        batches: Iterable[Dict[str, Any]],
+        write_fn: Callable[[List[Any], torch.Tensor, int], None],
+    ) -> None:
+        """
+        Embed every batch and hand the results to `write_fn` in batch order.
+
+        Args:
+            batches (Iterable): Dataset batches.
+            write_fn (Callable): Called on the writer thread with the extracted
+                data, its embeddings and the number of source rows consumed.
+        """
+        read_queue: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        write_queue: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        errors: List[BaseException] = []
+
+        reader = threading.Thread(
+            target=self._read, args=(batches, read_queue), daemon=True
+        )
+        writer = threading.Thread(
+            target=self._write, args=(write_queue, write_fn, errors), daemon=True
+        )
+
+        pool: Optional[ProcessPoolExecutor] = None
+        model = None
+        if self.num_workers > 0:
+            pool = ProcessPoolExecutor(
+                self.num_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_encoder_worker,
+                initargs=(self.dataset_type, self.torch_threads),
+            )
+        else:
+            model = load_model(self.dataset_type)
+            if model is None:
+                raise ValueError(
+                    f"No pipeline available for dataset type '{self.dataset_type}'"
+                )
+
+        # Futures in submission order, so results are written in batch order
+        in_flight: Deque[Tuple[List[Any], int, "Future[Any]"]] = deque()
+        # Local encoding is synchronous, hand each batch straight to the writer
+        max_in_flight = self.num_workers * self.queue_size if pool else 1
+        encoder_stats = self.stats["encoder"]
+
+        def drain_one() -> None:
+            data, num_source_rows, future = in_flight.popleft()
+            embeddings, seconds = future.result()
+            encoder_stats.add(len(data), seconds)
+            write_queue.put((data, embeddings, num_source_rows))
+
+        start = time.perf_counter()
+        reader.start()
+        writer.start()
+        try:
+            while not errors:
+                item = read_queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                data, num_source_rows = item
+                if pool is not None:
+                    future = pool.submit(_encode_in_worker, data, self.dataset_src_lang)
+                else:
+                    future = Future()
+                    future.set_result(self._encode_local(model, data))
+
+                in_flight.append((data, num_source_rows, future))
+                if len(in_flight) >= max_in_flight:
+                    drain_one()
+
+            while in_flight and not errors:
+                drain_one()
+        finally:
+            write_queue.put(_DONE)
+            writer.join()
+            if pool is not None:
+                # shutdown(cancel_futures=True) needs Python 3.9
+                for _, _, future in in_flight:
+                    future.cancel()
+                pool.shutdown(wait=True)
+
+        if errors:
+            raise errors[0]
+
+        self._log_stats(time.perf_counter() - start)
+
+    def _log_stats(self, wall_seconds: float) -> None:
+        """
+        Report rows/sec of every stage; the slowest stage is the bottleneck.
+        """
+        for stats in self.stats.values():
+            logger.info(
+                f"[{self.dataset_type}] {stats.name}: {stats.rows} rows, "
+                f"{stats.rows_per_second():.1f} rows/s busy"
+            )
+
+        rows = self.stats["writer"].rows
+        logger.info(
+            f"[{self.dataset_type}] pipeline: {rows} rows in {wall_seconds:.1f}s, "
+            f"{rows / wall_seconds if wall_seconds else 0.0:.1f} rows/s "
+            f"with {self.num_workers} encoder workers"
+        )
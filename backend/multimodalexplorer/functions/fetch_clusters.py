@@ -0,0 +1,110 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import json
+import logging
+import threading
+from typing import Any, Dict, List
+
+import numpy as np
+
+from multimodalexplorer.utils.cluster_summary import cluster_summary_paths
+from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.utils import parse_arguments, select_params
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Parse command line arguments
+args = parse_arguments()
+
+# Select relevant parameters
+params = select_params(args, ["umap_file"])
+(umap_file,) = params
+
+# Cluster summaries by label, keyed by the signature of the summary file
+LOADED_CLUSTERS: Dict[str, Any] = {}
+_clusters_lock = threading.Lock()
+
+
+def _load_clusters() -> Dict[str, Any]:
+    """
+    Load the cluster summary written by ReduceEmbedDims and cache it until it
+    is rewritten. Centroids are memory-mapped.
+
+    Returns:
+        dict: Cache entry with the summary, the clusters by label and the
+            centroid matrix.
+    """
+    dir_path, ext = umap_file.values()
+    summary_path, centroids_path = cluster_summary_paths(
+        get_file_path(dir_path, ext, False)
+    )
+
+    if not summary_path.exists():
+        raise FileNotFoundError(
+            "No cluster summary next to the UMAP file, run ReduceEmbedDims."
+        )
+
+    stat = summary_path.stat()
+    signature = f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+    with _clusters_lock:
+        if LOADED_CLUSTERS.get("signature") != signature:
+            with open(summary_path, "r") as f:
+                summary = json.load(f)
+
+            LOADED_CLUSTERS.clear()
+            LOADED_CLUSTERS.update(
+                {
+                    "signature": signature,
+                    "summary": summary,
+                    "by_label": {
+                        cluster["cluster"]: cluster for cluster in summary["clusters"]
+                    },
+                    "centroids": np.load(centroids_path, mmap_mode="r"),
+                }
+            )
+            logger.info(f"Loaded summaries of {len(summary['clusters'])} clusters")
+
+        return LOADED_CLUSTERS
+
+
+def fetch_clusters() -> Dict[str, Any]:
+    """
+    Summaries of every cluster, without their high-dimensional centroids.
+    """
+    summary = _load_clusters()["summary"]
+
+    return {
+        "num_points": summary["num_points"],
+        "noise_label": summary["noise_label"],
+        "data": summary["clusters"],
+    }
+
+
+def fetch_cluster(cluster: int, include_centroid: bool = False) -> Dict[str, Any]:
+    """
+    Summary of one cluster.
+
+    Args:
+        cluster (int): Cluster label, as in the UMAP output.
+        include_centroid (bool): Add the unit-length high-dimensional centroid.
+
+    Returns:
+        dict: The cluster summary.
+    """
+    cache = _load_clusters()
+    if cluster not in cache["by_label"]:
+        raise KeyError(f"Unknown cluster: {cluster}")
+
+    result = dict(cache["by_label"][cluster])
+    if include_centroid:
+        centroid: List[float] = cache["centroids"][cluster].tolist()
+        result["centroid"] = centroid
+
+    return result
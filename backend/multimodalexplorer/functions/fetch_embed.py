@@ -4,12 +4,18 @@
 # LICENSE file in the root directory of this source tree.
 
 
+import hashlib
 import logging
-from typing import Any, Dict, List, Optional
+import struct
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import numpy as np
+import pyarrow as pa
 
+from multimodalexplorer.utils.cache import LRUCache
 from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.spatial_index import Rect, SpatialIndex
 from multimodalexplorer.utils.utils import (
     get_embeds_details,
     parse_arguments,
@@ -24,30 +30,261 @@ logger = logging.getLogger(__name__)
 args = parse_arguments()
 
 # Select relevant parameters
-params = select_params(args, ["umap_file", "raw_data_file"])
-umap_file, raw_data_file = params
+params = select_params(args, ["embed_file", "umap_file", "raw_data_file"])
+embed_file, umap_file, raw_data_file = params
 
+JSON_MEDIA_TYPE = "application/json"
+BINARY_MEDIA_TYPE = "application/octet-stream"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
 
-def fetch_embeds() -> list:
+# Header of the binary format: magic, format version, dims, points, reserved.
+# Followed by float32 coordinates (points x dims) and int32 cluster labels,
+# everything little-endian.
+BINARY_MAGIC = b"MMXE"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHII")
+
+# Memory budget of the region selections kept for paging, per UMAP version
+SELECTION_CACHE_BYTES = 64 * 1024 * 1024
+
+# UMAP array and its serialized forms, keyed by the file signature. A new
+# file gets a new entry, so a request holding an entry keeps a consistent
+# ETag and body.
+LOADED_UMAP: Optional[Dict[str, Any]] = None
+_umap_lock = threading.Lock()
+
+
+def _load_umap() -> Dict[str, Any]:
     """
-    Load UMAP embeddings from the stored file.
+    Memory-map the UMAP file and cache it until the file changes on disk.
 
     Returns:
-        np.ndarray or None: The loaded UMAP embeddings or None if an error occurred.
+        dict: Cache entry with the array, its ETag and serialized bodies.
     """
+    global LOADED_UMAP
+
     dir_path, ext = umap_file.values()
     file_path = get_file_path(dir_path, ext, False)
 
-    with open(file_path, "rb") as file:
-        embeddings = np.load(file)
+    stat = file_path.stat()
+    signature = f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+    with _umap_lock:
+        if LOADED_UMAP is None or LOADED_UMAP["signature"] != signature:
+            embeddings = np.load(file_path, mmap_mode="r")
+
+            LOADED_UMAP = {
+                "signature": signature,
+                "etag": hashlib.sha1(signature.encode()).hexdigest(),
+                "embeddings": embeddings,
+                "bodies": {},
+                "selections": LRUCache(SELECTION_CACHE_BYTES),
+            }
+            logger.info(f"Loaded UMAP embeddings with shape: {embeddings.shape}")
+
+        return LOADED_UMAP
+
+
+def _split_columns(embeddings: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split the stored (x, y, ..., cluster) rows into typed column buffers.
+    """
+    coords = np.ascontiguousarray(embeddings[:, :-1], dtype="<f4")
+    clusters = np.ascontiguousarray(embeddings[:, -1], dtype="<i4")
+    return coords, clusters
+
+
+def _encode_binary(embeddings: np.ndarray) -> bytes:
+    coords, clusters = _split_columns(embeddings)
+    n_points, n_dims = coords.shape
+
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, n_dims, n_points, 0)
+    return b"".join((header, coords.tobytes(), clusters.tobytes()))
+
+
+def _encode_arrow(embeddings: np.ndarray) -> bytes:
+    coords, clusters = _split_columns(embeddings)
+    n_points, n_dims = coords.shape
+
+    table = pa.table(
+        {
+            "coords": pa.FixedSizeListArray.from_arrays(
+                pa.array(coords.reshape(-1)), n_dims
+            ),
+            "cluster": pa.array(clusters),
+        }
+    )
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
 
-    embeddings_list = embeddings.tolist()
+ENCODERS = {
+    BINARY_MEDIA_TYPE: _encode_binary,
+    ARROW_MEDIA_TYPE: _encode_arrow,
+}
+
+
+def negotiate_embeds_media_type(accept: Optional[str]) -> str:
+    """
+    Pick the response format for get_embeddings from an Accept header.
+
+    Args:
+        accept (str): Value of the Accept header.
+
+    Returns:
+        str: One of the supported media types, JSON when nothing else matches.
+    """
+    if not accept:
+        return JSON_MEDIA_TYPE
+
+    accepted = [part.split(";")[0].strip().lower() for part in accept.split(",")]
+    for media_type in accepted:
+        if media_type in ENCODERS or media_type == JSON_MEDIA_TYPE:
+            return media_type
+
+    return JSON_MEDIA_TYPE
+
+
+def _embeds_etag(cache: Dict[str, Any], media_type: str) -> str:
+    return f'"{cache["etag"]}-{media_type.rsplit("/", 1)[-1]}"'
+
+
+def fetch_embeds_etag(media_type: str = JSON_MEDIA_TYPE) -> str:
+    """
+    ETag of the current UMAP projection in the given representation.
+
+    Args:
+        media_type (str): Negotiated media type.
+
+    Returns:
+        str: Quoted ETag value.
+    """
+    return _embeds_etag(_load_umap(), media_type)
+
+
+def fetch_embeds_binary(media_type: str) -> Tuple[str, bytes]:
+    """
+    Serialize UMAP embeddings as binary columns, once per file version.
+
+    Args:
+        media_type (str): BINARY_MEDIA_TYPE or ARROW_MEDIA_TYPE.
+
+    Returns:
+        tuple: ETag and cached response body, of the same file version.
+    """
+    cache = _load_umap()
+    bodies = cache["bodies"]
+
+    if media_type not in bodies:
+        with _umap_lock:
+            if media_type not in bodies:
+                bodies[media_type] = ENCODERS[media_type](cache["embeddings"])
+
+    return _embeds_etag(cache, media_type), bodies[media_type]
+
+
+def fetch_embeds() -> Tuple[str, list]:
+    """
+    Load UMAP embeddings from the stored file.
+
+    Returns:
+        tuple: ETag and the UMAP embeddings as lists, of the same file version.
+    """
+    cache = _load_umap()
+
+    embeddings_list = cache["embeddings"].tolist()
 
     logger.info(f"Loaded UMAP embeddings with shape: {len(embeddings_list)}")
-    return embeddings_list
+    return _embeds_etag(cache, JSON_MEDIA_TYPE), embeddings_list
+
+
+def _load_spatial_index(cache: Optional[Dict[str, Any]] = None) -> SpatialIndex:
+    """
+    KD-tree over the current UMAP projection, or that of a cache entry, built
+    once per file version.
+    """
+    cache = cache or _load_umap()
+
+    if "spatial_index" not in cache:
+        with _umap_lock:
+            if "spatial_index" not in cache:
+                cache["spatial_index"] = SpatialIndex(cache["embeddings"])
+
+    return cache["spatial_index"]
+
+
+def fetch_points_in_region(
+    rect: Optional[Rect] = None,
+    polygon: Optional[Sequence[Sequence[float]]] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Ids of the projected points inside a rectangle or lasso polygon.
+
+    The sorted selection is cached per region, so following pages cost only
+    the page, not another pass over the region.
+
+    Args:
+        rect (tuple): x_min, y_min, x_max, y_max.
+        polygon (list): Lasso vertices as (x, y) pairs.
+        offset (int): Number of ids to skip.
+        limit (int): Maximum number of ids returned, None for all.
+
+    Returns:
+        dict: A page of ids in ascending order, the total number of points
+            in the region and the offset of the next page, if any.
+    """
+    cache = _load_umap()
+    selections = cache["selections"]
+    key = (
+        tuple(rect) if rect is not None else None,
+        tuple(map(tuple, polygon)) if polygon is not None else None,
+    )
+
+    ids = selections.get(key)
+    if ids is None:
+        ids = _load_spatial_index(cache).select(rect, polygon)
+        selections.put(key, ids)
+
+    end = len(ids) if limit is None else min(offset + limit, len(ids))
+    return {
+        "ids": ids[offset:end].tolist(),
+        "total": len(ids),
+        "next_offset": end if end < len(ids) else None,
+    }
+
+
+def fetch_nearest_points(x: float, y: float, k: int) -> Dict[str, Any]:
+    """
+    The k projected points nearest to (x, y), closest first.
+    """
+    ids, distances = _load_spatial_index().nearest(x, y, k)
+    return {"ids": ids.tolist(), "distances": distances.tolist()}
+
+
+def fetch_region_cluster_counts(
+    rect: Optional[Rect] = None,
+    polygon: Optional[Sequence[Sequence[float]]] = None,
+) -> Dict[str, Any]:
+    """
+    Number of projected points per cluster inside a rectangle or polygon.
+    """
+    spatial_index = _load_spatial_index()
+    ids = spatial_index.select(rect, polygon)
+    clusters, counts = spatial_index.cluster_counts(ids)
+
+    return {
+        "total": len(ids),
+        "clusters": clusters.tolist(),
+        "counts": counts.tolist(),
+    }
 
 
 def fetch_embeds_details(pointList: List) -> Optional[List[Dict[str, Any]]]:
-    results = get_embeds_details(pointList, raw_data_file)
+    results = get_embeds_details(pointList, raw_data_file, embed_file)
 
     return results
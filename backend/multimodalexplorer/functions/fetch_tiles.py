@@ -0,0 +1,146 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.tiles import TilePyramid, Viewport, tiles_dir_path
+from multimodalexplorer.utils.utils import parse_arguments, select_params
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Parse command line arguments
+args = parse_arguments()
+
+# Select relevant parameters
+params = select_params(args, ["umap_file"])
+(umap_file,) = params
+
+# Tile pyramid, keyed by the signature of its metadata file. A rebuild gets
+# a new entry, so a request holding an entry keeps a consistent ETag and body.
+LOADED_TILES: Optional[Dict[str, Any]] = None
+_tiles_lock = threading.Lock()
+
+
+def _load_tiles() -> Dict[str, Any]:
+    """
+    Open the tile pyramid built by ReduceEmbedDims and cache it until it is
+    rebuilt.
+
+    Returns:
+        dict: Cache entry with the pyramid and its ETag.
+    """
+    global LOADED_TILES
+    dir_path, ext = umap_file.values()
+    meta_path = tiles_dir_path(get_file_path(dir_path, ext, False)) / "meta.json"
+
+    if not meta_path.exists():
+        raise FileNotFoundError(
+            "No tiles next to the UMAP file, run ReduceEmbedDims to build them."
+        )
+
+    stat = meta_path.stat()
+    signature = f"{stat.st_ino}-{stat.st_mtime_ns}-{stat.st_size}"
+
+    with _tiles_lock:
+        if LOADED_TILES is None or LOADED_TILES["signature"] != signature:
+            pyramid = TilePyramid(meta_path.parent)
+
+            # The pyramid may be newer than the signature, tag what it serves
+            build_id = pyramid.meta.get("build_id", signature)
+            LOADED_TILES = {
+                "signature": signature,
+                "etag": f'"{hashlib.sha1(build_id.encode()).hexdigest()}"',
+                "pyramid": pyramid,
+            }
+            logger.info(
+                f"Loaded {pyramid.num_levels} tile levels for "
+                f"{pyramid.meta['num_points']} points"
+            )
+
+        return LOADED_TILES
+
+
+def fetch_tiles_etag() -> str:
+    """
+    ETag of the current tile pyramid, shared by every tile response.
+
+    Returns:
+        str: Quoted ETag value.
+    """
+    return _load_tiles()["etag"]
+
+
+def fetch_tiles_meta() -> Tuple[str, Dict[str, Any]]:
+    """
+    Metadata of the tile pyramid: levels, points and cell grid.
+
+    Returns:
+        tuple: ETag and metadata of the same pyramid.
+    """
+    tiles = _load_tiles()
+    return tiles["etag"], tiles["pyramid"].meta
+
+
+def fetch_tile_points(
+    viewport: Viewport, zoom: int, limit: Optional[int] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Subsample of the points inside a viewport at a zoom level.
+
+    Args:
+        viewport (tuple): x_min, y_min, x_max, y_max in UMAP coordinates.
+        zoom (int): Zoom level, 0 showing the whole projection in one tile.
+        limit (int): Maximum number of points returned.
+
+    Returns:
+        tuple: ETag of the pyramid, and the level, whether every point is
+            included and point columns.
+    """
+    tiles = _load_tiles()
+    result = tiles["pyramid"].points(viewport, zoom, limit)
+    points = result["points"]
+
+    return tiles["etag"], {
+        "level": result["level"],
+        "complete": result["complete"],
+        "ids": points["row"].tolist(),
+        "x": points["x"].tolist(),
+        "y": points["y"].tolist(),
+        "cluster": points["cluster"].tolist(),
+    }
+
+
+def fetch_tile_cells(
+    viewport: Viewport, zoom: int, limit: Optional[int] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Point counts and dominant clusters of the cells inside a viewport.
+
+    Args:
+        viewport (tuple): x_min, y_min, x_max, y_max in UMAP coordinates.
+        zoom (int): Zoom level.
+        limit (int): Maximum number of cells, reached with coarser levels.
+
+    Returns:
+        tuple: ETag of the pyramid, and the level, cell size and cell columns.
+    """
+    tiles = _load_tiles()
+    result = tiles["pyramid"].cells(viewport, zoom, limit)
+
+    return tiles["etag"], {
+        "level": result["level"],
+        "cell_size": result["cell_size"],
+        "x": result["x"].tolist(),
+        "y": result["y"].tolist(),
+        "count": result["count"].tolist(),
+        "cluster": result["cluster"].tolist(),
+    }
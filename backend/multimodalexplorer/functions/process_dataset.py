@@ -4,17 +4,31 @@
 # LICENSE file in the root directory of this source tree.
 
 
-import csv
 import logging
-from typing import Any, Dict, List
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 from datasets import DatasetDict, load_dataset
 from tqdm import tqdm
 
+from multimodalexplorer.functions.embedding_pipeline import EmbeddingPipeline
 from multimodalexplorer.types.data_types import DataFileType, DataSetType
-from multimodalexplorer.utils.helpers import VALID_DATASET_TYPES_LIST, get_file_path
-from multimodalexplorer.utils.utils import load_model, parse_arguments, select_params
+from multimodalexplorer.utils.embedding_store import (
+    EMBEDDING_DTYPES,
+    NPY_EMBED_EXT,
+    sidecar_path,
+    write_embedding_shard,
+)
+from multimodalexplorer.utils.helpers import (
+    MODEL_IDS,
+    VALID_DATASET_TYPES_LIST,
+    embed_shard_name,
+    get_file_path,
+)
+from multimodalexplorer.utils.manifest import ShardManifest
+from multimodalexplorer.utils.raw_data import raw_shard_name, write_raw_shard
+from multimodalexplorer.utils.utils import parse_arguments, select_params
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -30,6 +44,8 @@ class ProcessDataset:
         batch_size: int,
         chunk_size: int,
         dataset_sample_size: int,
+        embedding_pipeline: Optional[Dict[str, Any]] = None,
+        embedding_dtype: str = "float32",
     ):
         """
         Initialize ProcessDataset object with necessary attributes.
@@ -45,6 +61,10 @@ class ProcessDataset:
             raw_data_file/embed_file (list of dict): Dictionary with keys
                 - dir (str): Directory/File to save data
                 - ext (str): Extension of file
+            embedding_pipeline (dict): Arguments of EmbeddingPipeline
+                (num_workers, torch_threads, queue_size).
+            embedding_dtype (str): Storage dtype of .npy embedding shards,
+                float32 or float16.
         """
 
         self.datasets = datasets
@@ -53,6 +73,8 @@ class ProcessDataset:
         self.embed_file = embed_file
         self.raw_data_file = raw_data_file
         self.dataset_sample_size = dataset_sample_size
+        self.embedding_pipeline = embedding_pipeline or {}
+        self.embedding_dtype = embedding_dtype
 
         self.dataset_types, self.dataset_names, self.dataset_src_lang = (
             [item[key] for item in self.datasets]
@@ -78,6 +100,11 @@ class ProcessDataset:
                     f"Unsupported dataset type: {dtype}. Supported types: {', '.join(VALID_DATASET_TYPES_LIST)}"
                 )
 
+        if self.embedding_dtype not in EMBEDDING_DTYPES:
+            raise ValueError(
+                f"Unsupported embedding dtype: {self.embedding_dtype}. Supported dtypes: {', '.join(EMBEDDING_DTYPES)}"
+            )
+
     def _extract_data_from_batch(self, batch: Dict[str, Any]) -> List[Any]:
         """
         Extract data from a batch based on its structure.
@@ -99,89 +126,182 @@ class ProcessDataset:
 
     def _save_embeddings(
         self, embeddings_list: List[torch.Tensor], dataset_type: str, file_count: int
-    ) -> None:
+    ) -> Path:
         """
-        Save embeddings to disk.
+        Save embeddings to disk, as a .npy shard with a sidecar when the
+        extension is npy and as a pickled tensor otherwise.
 
         Args:
             embeddings_list (list): List of embeddings.
             dataset_type (str): Type of dataset.
             file_count (int): File count for naming the file.
-        """
-        all_embs = torch.cat(embeddings_list, 0)
 
+        Returns:
+            Path: Written file.
+        """
         dir_path, ext = self.embed_file.values()
         file_path = get_file_path(
-            dir_path, ext, True, f"{dataset_type}_embedding_{file_count}"
+            dir_path, ext, True, embed_shard_name(dataset_type, file_count)
         )
 
-        torch.save(all_embs, file_path)
+        if ext == NPY_EMBED_EXT:
+            write_embedding_shard(
+                file_path,
+                embeddings_list,
+                self.embedding_dtype,
+                MODEL_IDS.get(dataset_type),
+            )
+        else:
+            torch.save(torch.cat(embeddings_list, 0), file_path)
 
         logger.info(
             f"Saved embeddings for dataset type '{dataset_type}' to {file_path}"
         )
+        return file_path
 
-    def _save_data(self, data_list: List[Any], dataset_type: str) -> None:
+    def _save_data(
+        self, data_list: List[Any], dataset_type: str, file_count: int
+    ) -> Path:
         """
-        Save processed data to disk.
+        Save processed data to disk as an Arrow shard aligned with the
+        embeddings shard of the same file count.
 
         Args:
             data_list (list): List of processed data.
             dataset_type (str): Type of dataset.
+            file_count (int): File count for naming the file.
+
+        Returns:
+            Path: Written file.
         """
         dir_path, ext = self.raw_data_file.values()
-        file_path = get_file_path(dir_path, ext)
+        file_path = get_file_path(
+            dir_path, ext, True, raw_shard_name(dataset_type, file_count)
+        )
 
-        with file_path.open("a+", newline="", encoding="utf-8") as tsvfile:
-            fieldnames = ["data", "media_type"]
-            writer = csv.DictWriter(tsvfile, fieldnames=fieldnames, delimiter="\t")
+        write_raw_shard(file_path, data_list, dataset_type)
 
-            if tsvfile.tell() == 0:
-                writer.writeheader()
+        logger.info(f"Saved data for dataset type '{dataset_type}' to {file_path}")
+        return file_path
 
-            for data_row in data_list:
-                writer.writerow({"data": data_row, "media_type": dataset_type})
+    def _save_shard(
+        self,
+        manifest: ShardManifest,
+        embeddings_list: List[torch.Tensor],
+        data_list: List[Any],
+        dataset_type: str,
+        file_count: int,
+        source_range: Tuple[int, int],
+    ) -> None:
+        """
+        Save one shard of embeddings and raw data, then commit it to the
+        manifest. A crash before the commit leaves files that the next run
+        discards.
 
-        logger.info(f"Saved data for dataset type '{dataset_type}' to {file_path}")
+        Args:
+            manifest (ShardManifest): Manifest of the run.
+            embeddings_list (list): List of embeddings.
+            data_list (list): List of processed data.
+            dataset_type (str): Type of dataset.
+            file_count (int): File count for naming the files.
+            source_range (tuple): Source dataset rows consumed by the shard.
+        """
+        embed_path = self._save_embeddings(embeddings_list, dataset_type, file_count)
+        raw_path = self._save_data(data_list, dataset_type, file_count)
+
+        manifest.add_shard(
+            dataset_type,
+            file_count,
+            source_range,
+            len(data_list),
+            embed_path,
+            raw_path,
+        )
 
-    def _load_dataset(self) -> Dict[str, Any]:
+    def _remove_uncommitted_shards(self, manifest: ShardManifest) -> None:
         """
-        Load datasets specified in dataset_names.
+        Delete shard files that are not recorded in the manifest, such as the
+        partial outputs of an interrupted run.
 
-        Returns:
-            dict: Loaded datasets.
+        Args:
+            manifest (ShardManifest): Manifest of the run.
         """
-        loaded_datasets = {}
+        committed = {shard["embed_file"] for shard in manifest.shards} | {
+            shard["raw_file"] for shard in manifest.shards
+        }
 
-        for dataset_type, dataset_name, dataset_src_lang in zip(
-            self.dataset_types, self.dataset_names, self.dataset_src_lang
+        for file_info, shard_name in (
+            (self.embed_file, embed_shard_name),
+            (self.raw_data_file, raw_shard_name),
         ):
+            folder_path = Path(file_info["dir"]).absolute()
+            if not folder_path.is_dir():
+                continue
+
+            for dataset_type in VALID_DATASET_TYPES_LIST:
+                pattern = f"{shard_name(dataset_type, '*')}.{file_info['ext']}"
+                for file_path in folder_path.glob(pattern):
+                    if file_path.name not in committed:
+                        logger.info(f"Removing uncommitted shard {file_path}")
+                        file_path.unlink()
+                        sidecar_path(file_path).unlink(missing_ok=True)
+
+    def _load_dataset(self, dataset_name: str) -> DatasetDict:
+        """
+        Load a sample of the dataset.
 
-            loaded_dataset = load_dataset(dataset_name, split="train")
+        Args:
+            dataset_name (str): Name of the dataset.
 
-            loaded_dataset_sample = loaded_dataset.shuffle(seed=42).select(
-                range(self.dataset_sample_size)
-            )
+        Returns:
+            datasets.Dataset: Loaded dataset sample.
+        """
+        loaded_dataset = load_dataset(dataset_name, split="train")
 
-            logger.info(
-                f"Loaded {len(loaded_dataset_sample)} samples from dataset '{dataset_name}'"
-            )
+        loaded_dataset_sample = loaded_dataset.shuffle(seed=42).select(
+            range(self.dataset_sample_size)
+        )
 
-            loaded_datasets[dataset_type] = (loaded_dataset_sample, dataset_src_lang)
+        logger.info(
+            f"Loaded {len(loaded_dataset_sample)} samples from dataset '{dataset_name}'"
+        )
 
-        return loaded_datasets
+        return loaded_dataset_sample
 
     def _embed_dataset(self) -> None:
         """
-        Embed datasets.
+        Embed datasets, resuming from the shards recorded in the manifest.
         """
-        loaded_datasets = self._load_dataset()
+        manifest = ShardManifest(self.embed_file, self.raw_data_file)
+        manifest.verify()
+        manifest.reconcile(
+            self.datasets,
+            {
+                "batch_size": self.batch_size,
+                "chunk_size": self.chunk_size,
+                "dataset_sample_size": self.dataset_sample_size,
+            },
+        )
+        self._remove_uncommitted_shards(manifest)
+
+        for dataset_type, dataset_name, dataset_src_lang in zip(
+            self.dataset_types, self.dataset_names, self.dataset_src_lang
+        ):
+            if manifest.dataset(dataset_type)["complete"]:
+                logger.info(f"Skipping completed dataset '{dataset_name}'")
+                continue
 
-        for dataset_type, (dataset, dataset_src_lang) in loaded_datasets.items():
-            self._process_data(dataset, dataset_type, dataset_src_lang)
+            dataset = self._load_dataset(dataset_name)
+            self._process_data(dataset, dataset_type, dataset_src_lang, manifest)
+
+            manifest.mark_complete(dataset_type)
 
     def _process_data(
-        self, dataset: DatasetDict, dataset_type: str, dataset_src_lang: str
+        self,
+        dataset: DatasetDict,
+        dataset_type: str,
+        dataset_src_lang: str,
+        manifest: ShardManifest,
     ) -> None:
         """
         Process data for a specific dataset type.
@@ -189,42 +309,80 @@ class ProcessDataset:
         Args:
             dataset_type (str): Type of dataset.
             dataset (datasets.Dataset): Dataset to process.
+            dataset_src_lang (str): Source language of the dataset.
+            manifest (ShardManifest): Manifest recording completed shards.
         """
-        data2vec_model = load_model(dataset_type)
-
-        if data2vec_model is None:
+        # Models are loaded by the pipeline, once per encoder worker
+        if dataset_type not in MODEL_IDS:
             logger.warning(f"No pipeline available for dataset type '{dataset_type}'")
             return
 
+        file_count, source_offset = manifest.resume_point(dataset_type)
+        if source_offset > 0:
+            logger.info(
+                f"Resuming '{dataset_type}' at shard {file_count}, "
+                f"source row {source_offset}"
+            )
+            dataset = dataset.select(range(source_offset, len(dataset)))
+
         batch_count = 0
-        file_count = 0
+        source_start = source_offset
         embeddings_list: List[torch.Tensor] = []
         data_list: List[Any] = []
+        progress = tqdm(total=len(dataset), desc=f"Embedding {dataset_type}")
+
+        def save_pending() -> None:
+            nonlocal batch_count, source_start, embeddings_list, data_list, file_count
+
+            self._save_shard(
+                manifest,
+                embeddings_list,
+                data_list,
+                dataset_type,
+                file_count,
+                (source_start, source_offset),
+            )
 
-        for batch in tqdm(
-            dataset.iter(batch_size=self.batch_size), desc=f"Embedding {dataset_type}"
-        ):
-            data = self._extract_data_from_batch(batch)
+            embeddings_list = []
+            data_list = []
+            batch_count = 0
+            source_start = source_offset
+            file_count += 1
+
+        def write_batch(
+            data: List[Any], embeddings: torch.Tensor, num_source_rows: int
+        ) -> None:
+            nonlocal batch_count, source_offset
 
-            embeddings = data2vec_model.predict(data, source_lang=dataset_src_lang)
+            # Raw row i must match embedding row i
+            if embeddings.shape[0] != len(data):
+                raise ValueError(
+                    f"Got {embeddings.shape[0]} embeddings for {len(data)} rows"
+                )
 
             data_list.extend(data)
             embeddings_list.append(embeddings)
 
             batch_count += self.batch_size
+            source_offset += num_source_rows
+            progress.update(num_source_rows)
 
             if batch_count >= self.chunk_size:
-                self._save_embeddings(embeddings_list, dataset_type, file_count)
-                self._save_data(data_list, dataset_type)
+                save_pending()
 
-                embeddings_list = []
-                data_list = []
-                batch_count = 0
-                file_count += 1
+        pipeline = EmbeddingPipeline(
+            dataset_type,
+            dataset_src_lang,
+            self._extract_data_from_batch,
+            **self.embedding_pipeline,
+        )
+        try:
+            pipeline.run(dataset.iter(batch_size=self.batch_size), write_batch)
+        finally:
+            progress.close()
 
         if embeddings_list:
-            self._save_embeddings(embeddings_list, dataset_type, file_count)
-            self._save_data(data_list, dataset_type)
+            save_pending()
 
     def process(self) -> None:
         """
@@ -245,6 +403,8 @@ if __name__ == "__main__":
         "batch_size",
         "chunk_size",
         "dataset_sample_size",
+        "embedding_pipeline",
+        "embedding_dtype",
     ]
     args = parse_arguments()
     params = select_params(args, p_list)
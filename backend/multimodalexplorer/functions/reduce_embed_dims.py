@@ -3,27 +3,76 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import json
 import logging
-from typing import Any, Dict
-
-import hdbscan
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+import faiss
+import joblib
 import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.pipeline import make_pipeline
 from sklearn.preprocessing import MinMaxScaler
 from umap import UMAP
 
 from multimodalexplorer.types.data_types import DataFileType
-from multimodalexplorer.utils.helpers import get_file_path
-from multimodalexplorer.utils.utils import (
-    concat_embed_from_dir,
-    parse_arguments,
-    select_params,
+from multimodalexplorer.utils.cluster_summary import (
+    save_cluster_summary,
+    summarize_clusters,
 )
+from multimodalexplorer.utils.clustering import (
+    CLUSTER_BACKENDS,
+    approximate_predict_chunked,
+    assign_kmeans,
+    cluster_quality,
+    fit_faiss_kmeans,
+    fit_hdbscan,
+)
+from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.index_factory import set_search_params
+from multimodalexplorer.utils.index_state import load_tombstones
+from multimodalexplorer.utils.shards import ShardReader
+from multimodalexplorer.utils.stage_profiler import StageProfiler
+from multimodalexplorer.utils.tiles import build_tile_pyramid, tiles_dir_path
+from multimodalexplorer.utils.training_sample import stratified_sample
+from multimodalexplorer.utils.utils import parse_arguments, select_params
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+UMAP_BUILD_MODES = ("full", "sample")
+
+KNN_SOURCES = ("umap", "faiss")
+
+# Queries per Faiss search when building the kNN graph
+KNN_BATCH_ROWS = 1024
+
+UMAP_STATE_VERSION = 1
+
+# Model of a transform worker process, UMAP or a PCA + UMAP pipeline
+_WORKER_MODEL: Optional[Any] = None
+
+
+def _init_transform_worker(model_path: str) -> None:
+    """
+    Load the fitted UMAP model once per transform worker process.
+    """
+    global _WORKER_MODEL
+    _WORKER_MODEL = joblib.load(model_path)
+
+
+def _transform_in_worker(chunk: np.ndarray) -> np.ndarray:
+    return _WORKER_MODEL.transform(chunk)
+
+
 class ReduceEmbedDims:
     def __init__(
         self,
@@ -31,6 +80,11 @@ class ReduceEmbedDims:
         umap_file: DataFileType,
         umap_args: Dict[str, Any],
         cluster_args: Dict[str, Any],
+        umap_build: Optional[Dict[str, Any]] = None,
+        index_file: Optional[DataFileType] = None,
+        tiles: Optional[Dict[str, Any]] = None,
+        cluster_summary: Optional[Dict[str, Any]] = None,
+        cluster_build: Optional[Dict[str, Any]] = None,
     ):
         """
         Initialize the ReduceEmbedDims class.
@@ -39,33 +93,166 @@ class ReduceEmbedDims:
             embed_file (DataFileType): A dictionary containing the directory and extension for the embeddings file.
             umap_file (DataFileType): A dictionary containing the directory and extension for the UMAP embeddings file.
             umap_args (Dict[str, Any]): A dictionary containing the arguments for the UMAP model.
+            umap_build (Dict[str, Any]): Build settings with keys
+                - mode (str): full fits UMAP on every embedding, sample fits
+                  it on a sample and transforms the rest in chunks.
+                - incremental (bool): Project embeddings added since the last
+                  run with the persisted models instead of refitting.
+                - fit_sample_size (int): Rows UMAP is fitted on in sample mode.
+                - transform_chunk_rows (int): Rows transformed at a time.
+                - transform_workers (int): Processes transforming chunks in
+                  parallel, 0 transforms in the main process.
+                - seed (int): Seed of the fit sample and of PCA.
+                - knn_source (str): umap builds the kNN graph with nearest
+                  neighbor descent, faiss searches the project's index.
+                - knn_search_params (dict): Search parameters of the index
+                  while building the kNN graph.
+                - pca_components (int): Reduce embeddings with PCA before
+                  UMAP, None keeps every dimension.
+                - n_jobs (int): Threads of UMAP and of the Faiss search,
+                  None keeps their defaults.
+            index_file (DataFileType): Faiss index used when knn_source is faiss.
+            tiles (Dict[str, Any]): Arguments of build_tile_pyramid, the
+                level-of-detail tiles served to the frontend.
+            cluster_summary (Dict[str, Any]): Summary settings with keys
+                - top_n (int): Most central rows kept per cluster.
+            cluster_build (Dict[str, Any]): Clustering settings with keys
+                - backend (str): hdbscan clusters every UMAP point,
+                  hdbscan_sample fits HDBSCAN on a sample and labels the rest
+                  with approximate_predict, faiss_kmeans runs spherical
+                  k-means on the full-dimensional embeddings.
+                - algorithm (str): HDBSCAN algorithm, e.g. boruvka_kdtree.
+                - core_dist_n_jobs (int): HDBSCAN core distance processes.
+                - fit_sample_size (int): Points HDBSCAN is fitted on in
+                  hdbscan_sample mode.
+                - kmeans_clusters (int): Number of k-means clusters.
+                - kmeans_niter (int): K-means iterations.
+                - quality_sample_size (int): Points of the silhouette score.
         """
         self.embed_file = embed_file
         self.umap_file = umap_file
         self.umap_args = umap_args
         self.cluster_args = cluster_args
 
-    def _cluster_embed(self, umap_embeddings, normalized_embeddings):
+        umap_build = umap_build or {}
+        self.build_mode = umap_build.get("mode", "full")
+        self.incremental = umap_build.get("incremental", True)
+        self.fit_sample_size = umap_build.get("fit_sample_size", 100000)
+        self.transform_chunk_rows = umap_build.get("transform_chunk_rows", 50000)
+        self.transform_workers = umap_build.get("transform_workers", 0)
+        self.seed = umap_build.get("seed", 0)
+        self.knn_source = umap_build.get("knn_source", "umap")
+        self.knn_search_params = umap_build.get("knn_search_params", {})
+        self.pca_components = umap_build.get("pca_components")
+        self.n_jobs = umap_build.get("n_jobs")
+        self.index_file = index_file
+        self.tiles_args = tiles or {}
+        self.summary_top_n = (cluster_summary or {}).get("top_n", 10)
+
+        self.cluster_build = cluster_build or {}
+        self.cluster_backend = self.cluster_build.get("backend", "hdbscan")
+        self.cluster_sample_size = self.cluster_build.get("fit_sample_size", 200000)
+        self.kmeans_clusters = self.cluster_build.get("kmeans_clusters", 64)
+        self.kmeans_niter = self.cluster_build.get("kmeans_niter", 20)
+        self.quality_sample_size = self.cluster_build.get("quality_sample_size", 10000)
+
+        if self.build_mode not in UMAP_BUILD_MODES:
+            raise ValueError(
+                f"Unsupported UMAP build mode: {self.build_mode}. Supported modes: {', '.join(UMAP_BUILD_MODES)}"
+            )
+
+        if self.knn_source not in KNN_SOURCES:
+            raise ValueError(
+                f"Unsupported kNN source: {self.knn_source}. Supported sources: {', '.join(KNN_SOURCES)}"
+            )
+
+        if self.cluster_backend not in CLUSTER_BACKENDS:
+            raise ValueError(
+                f"Unsupported clustering backend: {self.cluster_backend}. Supported backends: {', '.join(CLUSTER_BACKENDS)}"
+            )
+
+        if self.knn_source == "faiss":
+            # The index holds every row and measures cosine similarity
+            if self.build_mode != "full" or index_file is None:
+                raise ValueError(
+                    "knn_source faiss needs the full UMAP build mode and an index_file."
+                )
+            if self.umap_args.get("metric", "euclidean") != "cosine":
+                raise ValueError("knn_source faiss needs the cosine UMAP metric.")
+
+        # Fitted while reducing, persisted next to the output
+        self.scaler: Optional[MinMaxScaler] = None
+        self.clusterer: Optional[Any] = None
+        self.noise_label: Optional[int] = None
+        self.cluster_report: Optional[Dict[str, Any]] = None
+
+        self.profiler = StageProfiler("reduce_embed_dims")
+
+    @staticmethod
+    def _artifact_path(file_path: Path, name: str) -> Path:
+        return file_path.with_name(f"{file_path.stem}_{name}")
+
+    @property
+    def _clusterer_artifact(self) -> str:
+        return (
+            "kmeans.npy" if self.cluster_backend == "faiss_kmeans" else "hdbscan.joblib"
+        )
+
+    def _hdbscan_args(self) -> Dict[str, Any]:
+        hdbscan_args = dict(self.cluster_args)
+        for key in ("algorithm", "core_dist_n_jobs"):
+            if self.cluster_build.get(key) is not None:
+                hdbscan_args[key] = self.cluster_build[key]
+        return hdbscan_args
+
+    def _cluster_embed(self, umap_embeddings, normalized_embeddings, reader):
         """
-        Cluster embeddings using HDBSCAN.
+        Cluster embeddings with the configured backend.
 
         Args:
-            embeddings (numpy.ndarray): Input embeddings.
+            umap_embeddings (numpy.ndarray): UMAP embeddings.
+            normalized_embeddings (numpy.ndarray): UMAP embeddings in [-1, 1].
+            reader (ShardReader): Full-dimensional embeddings, for k-means.
 
         Returns:
             numpy.ndarray: Embeddings with additional cluster labels.
         """
-
-        # Perform clustering
-
-        hdbscan_v = hdbscan.HDBSCAN(**self.cluster_args)
-        clusters = hdbscan_v.fit_predict(umap_embeddings)
+        start = time.perf_counter()
+
+        # Keep what is needed to label points added later: the HDBSCAN
+        # prediction data or the k-means centroids
+        if self.cluster_backend == "faiss_kmeans":
+            clusters, clusterer = fit_faiss_kmeans(
+                reader,
+                self.kmeans_clusters,
+                self.kmeans_niter,
+                self.seed,
+                self.transform_chunk_rows,
+            )
+        else:
+            clusters, clusterer = fit_hdbscan(
+                umap_embeddings,
+                self._hdbscan_args(),
+                (
+                    self.cluster_sample_size
+                    if self.cluster_backend == "hdbscan_sample"
+                    else None
+                ),
+                self.seed,
+                self.transform_chunk_rows,
+            )
+        seconds = time.perf_counter() - start
 
         # Get the maximum cluster label
         max_cluster_label = clusters.max()
 
-        # Reassign noise points (-1) to the next available number
-        noise_label = max_cluster_label + 1
+        # Reassign noise points (-1) to the next available number. K-means
+        # has no noise, but empty centroids may leave the top labels unused,
+        # and points added later can still be assigned to them
+        if self.cluster_backend == "faiss_kmeans":
+            noise_label = self.kmeans_clusters
+        else:
+            noise_label = max_cluster_label + 1
         clusters[clusters == -1] = noise_label
 
         # Append cluster labels to embeddings
@@ -75,14 +262,31 @@ class ReduceEmbedDims:
             f"Created clusters for embeddings with {max_cluster_label} cluster max."
         )
 
+        self.clusterer = clusterer
+        self.noise_label = int(noise_label)
+
+        self.cluster_report = {
+            "backend": self.cluster_backend,
+            "seconds": seconds,
+            **cluster_quality(
+                umap_embeddings,
+                clusters,
+                self.noise_label,
+                self.quality_sample_size,
+                self.seed,
+            ),
+        }
+        logger.info(f"Clustering: {self.cluster_report}")
+
         return embedding_with_clusters
 
-    def _normalize_embed(self, umap_embeddings):
+    def _normalize_embed(self, umap_embeddings, reader):
         """
         Normalize embeddings and cluster them.
 
         Args:
             umap_embeddings (numpy.ndarray): UMAP embeddings.
+            reader (ShardReader): Full-dimensional embeddings.
 
         Returns:
             numpy.ndarray: Normalized embeddings with clusters.
@@ -90,26 +294,356 @@ class ReduceEmbedDims:
         # Normalize embeddings to [-1, 1] range
         scaler = MinMaxScaler(feature_range=(-1, 1))
         normalized_embeddings = scaler.fit_transform(umap_embeddings)
+        self.scaler = scaler
 
         # Cluster normalized embeddings
-        return self._cluster_embed(umap_embeddings, normalized_embeddings)
+        return self._cluster_embed(umap_embeddings, normalized_embeddings, reader)
 
-    def _reduce_dims(self) -> None:
+    def _transform(
+        self, umap_model: Any, model_path: Path, reader: ShardReader, start_row: int
+    ) -> np.ndarray:
         """
-        Reduce the dimensions of embeddings using UMAP.
+        Project embeddings from `start_row` on with a fitted UMAP model, one
+        chunk at a time, so that only a chunk per worker is held in memory.
+
+        Args:
+            umap_model (UMAP | Pipeline): Fitted model, used in the main process.
+            model_path (Path): Persisted model, loaded by worker processes.
+            reader (ShardReader): Embeddings to project.
+            start_row (int): First global row to project.
+
+        Returns:
+            numpy.ndarray: UMAP embeddings of the rows, in row order.
         """
-        embeddings = concat_embed_from_dir(self.embed_file["dir"])
+        chunks = reader.iter_chunks(self.transform_chunk_rows, start_row=start_row)
+
+        if self.transform_workers <= 0:
+            return np.concatenate([umap_model.transform(chunk) for _, chunk in chunks])
+
+        results: List[np.ndarray] = []
+        in_flight: Deque[Future] = deque()
+
+        with ProcessPoolExecutor(
+            self.transform_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_transform_worker,
+            initargs=(str(model_path),),
+        ) as pool:
+            for _, chunk in chunks:
+                # Chunks are views of memory-mapped shards, send copies
+                in_flight.append(pool.submit(_transform_in_worker, np.array(chunk)))
+
+                # Keep a bounded number of chunks queued per worker
+                if len(in_flight) >= 2 * self.transform_workers:
+                    results.append(in_flight.popleft().result())
+
+            while in_flight:
+                results.append(in_flight.popleft().result())
+
+        return np.concatenate(results)
+
+    def _new_umap(self, precomputed_knn: Optional[tuple] = None) -> UMAP:
+        umap_args = dict(self.umap_args)
+        if self.n_jobs is not None:
+            umap_args["n_jobs"] = self.n_jobs
+        if precomputed_knn is not None:
+            umap_args["precomputed_knn"] = precomputed_knn
+        return UMAP(**umap_args)
+
+    def _fit_pca(self, data: np.ndarray) -> Optional[PCA]:
+        if not self.pca_components:
+            return None
 
-        umap_model = UMAP(**self.umap_args)
-        umap_embeddings = umap_model.fit_transform(embeddings)
+        with self.profiler.stage("pca_fit"):
+            pca = PCA(self.pca_components, random_state=self.seed).fit(data)
+        logger.info(
+            f"PCA to {self.pca_components} dimensions keeps "
+            f"{pca.explained_variance_ratio_.sum():.1%} of the variance"
+        )
+        return pca
 
-        normailize_umap_embedding = self._normalize_embed(umap_embeddings)
+    def _faiss_knn(self, data: np.ndarray) -> tuple:
+        """
+        Build UMAP's kNN graph by searching every embedding in the project's
+        Faiss index, instead of running nearest neighbor descent again.
+
+        Candidates are re-scored with exact cosine distances, and every point
+        is made its own first neighbor as UMAP expects, including rows deleted
+        from the index. Rows the index does not return are -1 with an
+        infinite distance, which UMAP skips.
+
+        Args:
+            data (numpy.ndarray): Every embedding, in row order.
+
+        Returns:
+            tuple: kNN indices and distances, one row per embedding.
+        """
+        dir_path, ext = self.index_file.values()
+        file_path = get_file_path(dir_path, ext, False)
+        index = faiss.read_index(str(file_path))
+
+        # Deleted rows are missing from the index but still embedded
+        tombstones = load_tombstones(file_path)
+        num_deleted = int(np.count_nonzero(tombstones < len(data)))
+        if index.ntotal + num_deleted != len(data):
+            raise ValueError(
+                f"The index holds {index.ntotal} vectors and {num_deleted} "
+                f"deleted ids for {len(data)} embeddings, rebuild it or use "
+                "knn_source umap."
+            )
+
+        set_search_params(index, self.knn_search_params, strict=False)
+        if self.n_jobs is not None:
+            faiss.omp_set_num_threads(self.n_jobs)
+
+        k = self.umap_args.get("n_neighbors", 15)
+        norms = np.linalg.norm(data, axis=1)
+        norms[norms == 0] = 1
+
+        knn_indices = np.empty((len(data), k), dtype=np.int64)
+        knn_dists = np.empty((len(data), k), dtype=np.float32)
+
+        for start in range(0, len(data), KNN_BATCH_ROWS):
+            rows = np.arange(start, min(start + KNN_BATCH_ROWS, len(data)))
+            queries = data[rows] / norms[rows, None]
+            _, ids = index.search(queries, k + 1)
+
+            is_self = ids == rows[:, None]
+            missing_self = ~is_self.any(axis=1)
+            ids[missing_self, -1] = rows[missing_self]
+            is_self[missing_self, -1] = True
+
+            valid = ids >= 0
+            candidates = np.where(valid, ids, 0)
+            similarities = np.einsum(
+                "cd,ckd->ck", queries, data[candidates] / norms[candidates, None]
+            )
+
+            dists = np.maximum(1 - similarities, 0).astype(np.float32)
+            dists[is_self] = 0
+            dists[~valid] = np.inf
+
+            order = np.argsort(dists, axis=1, kind="stable")[:, :k]
+            knn_indices[rows] = np.take_along_axis(ids, order, axis=1)
+            knn_dists[rows] = np.take_along_axis(dists, order, axis=1)
+
+        return knn_indices, knn_dists
+
+    def _fit(self, reader: ShardReader, file_path: Path) -> np.ndarray:
+        """
+        Fit UMAP, the scaler and the clusterer, and persist them.
+
+        Returns:
+            numpy.ndarray: Normalized embeddings with clusters.
+        """
+        model_path = self._artifact_path(file_path, "model.joblib")
+
+        sample_idxs = None
+        if self.build_mode == "sample" and reader.num_rows > self.fit_sample_size:
+            with self.profiler.stage("read_sample"):
+                sample_idxs = stratified_sample(reader, self.fit_sample_size, self.seed)
+                data = reader.take(sample_idxs)
+        else:
+            with self.profiler.stage("read"):
+                data = reader.read_all()
+
+        precomputed_knn = None
+        if self.knn_source == "faiss":
+            with self.profiler.stage("faiss_knn"):
+                precomputed_knn = self._faiss_knn(data)
+
+        pca = self._fit_pca(data)
+        if pca is not None:
+            with self.profiler.stage("pca_transform"):
+                data = pca.transform(data)
+
+        umap_model = self._new_umap(precomputed_knn)
+        with self.profiler.stage("umap_fit"):
+            umap_embeddings = umap_model.fit_transform(data)
+        del data
+
+        # PCA and UMAP are persisted as one model, so transform() applies both
+        model = umap_model if pca is None else make_pipeline(pca, umap_model)
+        joblib.dump(model, model_path)
+
+        if sample_idxs is not None:
+            logger.info(f"Fitted UMAP on a sample of {len(sample_idxs)} embeddings")
+            sample_embeddings = umap_embeddings
+
+            with self.profiler.stage("transform"):
+                umap_embeddings = self._transform(model, model_path, reader, 0)
+
+            # Fitted rows keep the positions optimized during the fit
+            umap_embeddings[sample_idxs] = sample_embeddings
+
+        with self.profiler.stage("cluster"):
+            normailize_umap_embedding = self._normalize_embed(umap_embeddings, reader)
+
+        joblib.dump(self.scaler, self._artifact_path(file_path, "scaler.joblib"))
+        clusterer_path = self._artifact_path(file_path, self._clusterer_artifact)
+        if self.cluster_backend == "faiss_kmeans":
+            np.save(clusterer_path, self.clusterer)
+        else:
+            joblib.dump(self.clusterer, clusterer_path)
+
+        return normailize_umap_embedding
+
+    def _extend(
+        self, reader: ShardReader, file_path: Path, state: Dict[str, Any]
+    ) -> np.ndarray:
+        """
+        Project embeddings added since the last run with the persisted models
+        and append them, leaving the existing layout untouched.
+
+        Returns:
+            numpy.ndarray: Normalized embeddings with clusters of every row.
+        """
+        existing = np.load(file_path)
+        start_row = state["num_rows"]
+        self.noise_label = state["noise_label"]
+        self.cluster_report = state.get("clustering")
+        if reader.num_rows == start_row:
+            logger.info("No new embeddings to project")
+            return existing
+
+        model_path = self._artifact_path(file_path, "model.joblib")
+        umap_model = joblib.load(model_path)
+        scaler = joblib.load(self._artifact_path(file_path, "scaler.joblib"))
+        clusterer_path = self._artifact_path(file_path, self._clusterer_artifact)
+
+        with self.profiler.stage("transform"):
+            umap_embeddings = self._transform(umap_model, model_path, reader, start_row)
+
+        # New points may fall slightly outside [-1, 1]
+        normalized_embeddings = scaler.transform(umap_embeddings)
+
+        with self.profiler.stage("cluster"):
+            if self.cluster_backend == "faiss_kmeans":
+                clusters = assign_kmeans(
+                    np.load(clusterer_path),
+                    reader,
+                    start_row,
+                    self.transform_chunk_rows,
+                )
+            else:
+                clusters = approximate_predict_chunked(
+                    joblib.load(clusterer_path),
+                    umap_embeddings,
+                    self.transform_chunk_rows,
+                )
+        clusters[clusters == -1] = state["noise_label"]
+
+        logger.info(f"Projected {len(umap_embeddings)} new embeddings")
+
+        return np.concatenate(
+            [
+                existing[:start_row],
+                np.column_stack((normalized_embeddings, clusters)),
+            ]
+        )
+
+    def _load_state(
+        self, file_path: Path, reader: ShardReader
+    ) -> Optional[Dict[str, Any]]:
+        """
+        State of the previous run, None when it cannot be extended: missing
+        models, changed arguments or rewritten shards.
+        """
+        state_path = self._artifact_path(file_path, "state.json")
+        if not self.incremental or not state_path.exists() or not file_path.exists():
+            return None
+
+        with open(state_path, "r") as f:
+            state = json.load(f)
+
+        shards = [shard_path.name for shard_path in reader.files]
+        if (
+            state["umap_args"] != self.umap_args
+            or state["cluster_args"] != self.cluster_args
+            or state.get("cluster_build", {}) != self.cluster_build
+            or state.get("pca_components") != self.pca_components
+            or shards[: len(state["shards"])] != state["shards"]
+            or not all(
+                self._artifact_path(file_path, name).exists()
+                for name in ("model.joblib", "scaler.joblib", self._clusterer_artifact)
+            )
+        ):
+            logger.info("UMAP models are out of date, refitting")
+            return None
+
+        if state.get("knn_source") == "faiss" and reader.num_rows > state["num_rows"]:
+            # UMAP keeps no search index when given a precomputed kNN graph
+            logger.info(
+                "UMAP fitted on a precomputed kNN graph cannot project new "
+                "embeddings, refitting"
+            )
+            return None
+
+        return state
+
+    def _save_state(self, file_path: Path, reader: ShardReader) -> None:
+        state_path = self._artifact_path(file_path, "state.json")
+        with open(state_path, "w") as f:
+            json.dump(
+                {
+                    "format_version": UMAP_STATE_VERSION,
+                    "shards": [shard_path.name for shard_path in reader.files],
+                    "num_rows": reader.num_rows,
+                    "umap_args": self.umap_args,
+                    "cluster_args": self.cluster_args,
+                    "cluster_build": self.cluster_build,
+                    "clustering": self.cluster_report,
+                    "pca_components": self.pca_components,
+                    "knn_source": self.knn_source,
+                    "noise_label": self.noise_label,
+                    "stages": self.profiler.stages,
+                },
+                f,
+                indent=2,
+            )
+
+    def _reduce_dims(self) -> None:
+        """
+        Reduce the dimensions of embeddings using UMAP, extending the
+        previous output when only new embeddings were added.
+        """
+        reader = ShardReader(self.embed_file)
 
         dir_path, ext = self.umap_file.values()
         file_path = get_file_path(dir_path, ext)
 
-        with open(file_path, "wb") as file:
-            np.save(file, normailize_umap_embedding)
+        state = self._load_state(file_path, reader)
+        if state is not None:
+            normailize_umap_embedding = self._extend(reader, file_path, state)
+        else:
+            normailize_umap_embedding = self._fit(reader, file_path)
+
+        # Replace the output atomically, the API may be reading it
+        with self.profiler.stage("write"):
+            tmp_file_path = file_path.with_name(f"{file_path.stem}.tmp.{ext}")
+            with open(tmp_file_path, "wb") as file:
+                np.save(file, normailize_umap_embedding)
+            os.replace(tmp_file_path, file_path)
+
+        with self.profiler.stage("tiles"):
+            build_tile_pyramid(
+                normailize_umap_embedding,
+                tiles_dir_path(file_path),
+                **self.tiles_args,
+            )
+
+        with self.profiler.stage("cluster_summary"):
+            summary, centroids = summarize_clusters(
+                reader,
+                normailize_umap_embedding,
+                self.noise_label,
+                self.summary_top_n,
+                self.transform_chunk_rows,
+            )
+            save_cluster_summary(file_path, summary, centroids)
+
+        self._save_state(file_path, reader)
+        self.profiler.log()
 
         logger.info(
             f"Created UMAP embeddings for {len(normailize_umap_embedding)} samples."
@@ -127,7 +661,17 @@ class ReduceEmbedDims:
 
 
 if __name__ == "__main__":
-    p_list = ["embed_file", "umap_file", "umap_args", "cluster_args"]
+    p_list = [
+        "embed_file",
+        "umap_file",
+        "umap_args",
+        "cluster_args",
+        "umap_build",
+        "index_file",
+        "tiles",
+        "cluster_summary",
+        "cluster_build",
+    ]
     args = parse_arguments()
     params = select_params(args, p_list)
 
@@ -3,18 +3,29 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import hashlib
 import logging
 import os
-from typing import List
+import threading
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
 
 import faiss
 import numpy as np
 
-from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.cache import LRUCache
+from multimodalexplorer.utils.index_factory import (
+    SEARCH_PARAM_DEFAULTS,
+    set_search_params,
+)
+from multimodalexplorer.utils.index_manager import FaissIndexManager
+from multimodalexplorer.utils.model_registry import ModelRegistry
+from multimodalexplorer.utils.shards import ShardReader
 from multimodalexplorer.utils.utils import (
+    create_model,
     get_embeds_details,
-    load_model,
     parse_arguments,
+    reset_raw_data,
     select_params,
 )
 
@@ -28,13 +39,98 @@ logger = logging.getLogger(__name__)
 
 # Parse command line arguments
 args = parse_arguments()
-params = select_params(args, ["index_file", "raw_data_file", "index_args"])
-index_file, raw_data_file, index_args = params
+params = select_params(
+    args,
+    [
+        "embed_file",
+        "index_file",
+        "raw_data_file",
+        "index_args",
+        "search_cache",
+        "models",
+    ],
+)
+embed_file, index_file, raw_data_file, index_args, search_cache, models = params
+
+# Process-wide index, loaded once and hot-swapped when the index file is rebuilt
+index_manager = FaissIndexManager(
+    index_file,
+    use_mmap=index_args.get("use_mmap", False),
+    reload_interval=index_args.get("reload_interval", 5.0),
+)
+
+# Encoders of search queries, preloaded at startup and loaded once
+model_registry = ModelRegistry(
+    create_model,
+    preload=models.get("preload", []),
+    warmup=models.get("warmup", True),
+    intra_op_threads=models.get("intra_op_threads"),
+    inter_op_threads=models.get("inter_op_threads"),
+    idle_evict_seconds=models.get("idle_evict_seconds"),
+)
+
+# Query embeddings keyed by (search_type, src_lang, normalized text) and
+# search results keyed by (embedding hash, k, index version)
+embedding_cache = LRUCache(
+    search_cache.get("embedding_max_bytes", 64 * 1024 * 1024),
+    search_cache.get("ttl_seconds"),
+)
+result_cache = LRUCache(
+    search_cache.get("result_max_bytes", 16 * 1024 * 1024),
+    search_cache.get("ttl_seconds"),
+)
+
+# Results of an old index version can never be hit again, free them
+index_manager.add_reload_listener(lambda version: result_cache.clear())
+
+# Deployment-wide search parameters (nprobe, efSearch, ...), applied to every
+# search; requests may override them
+default_search_params: Dict[str, Any] = index_args.get("search_params", {})
+
+# Search parameters are attributes of the shared index, so setting them and
+# searching must not interleave between threads
+search_params_lock = threading.Lock()
+
+# Candidates fetched per neighbor and re-scored against the full-precision
+# embeddings; 1 returns the index scores as they are
+default_rerank_factor: int = index_args.get("rerank_factor", 1)
+
+# Memory-mapped full-precision embeddings, opened on first re-rank
+_embedding_reader: Optional[ShardReader] = None
+_embedding_reader_lock = threading.Lock()
+
+
+def get_embedding_reader() -> ShardReader:
+    """
+    Get the reader of the embeddings the index was built from.
+    """
+    global _embedding_reader
+    with _embedding_reader_lock:
+        if _embedding_reader is None:
+            _embedding_reader = ShardReader(embed_file)
+        return _embedding_reader
+
+
+def _reset_embedding_reader(version: int) -> None:
+    # A rebuilt index may come with new embedding shards
+    global _embedding_reader
+    with _embedding_reader_lock:
+        _embedding_reader = None
+
+
+index_manager.add_reload_listener(_reset_embedding_reader)
+
+# Rows added by update_index must be in the raw data before results can
+# point at them
+index_manager.add_reload_listener(lambda version: reset_raw_data())
 
 
 class SearchFaissIndex:
     def __init__(
         self,
+        manager: Optional[FaissIndexManager] = None,
+        cache_results: bool = True,
+        reader: Optional[ShardReader] = None,
     ):
         """
         Initialize SearchFaissIndex object.
@@ -42,68 +138,152 @@ class SearchFaissIndex:
         Args:
             index_file (DataFileType): File path and extension of the Faiss index.
             raw_data_file (DataFileType): File path and extension of the raw data.
+            embed_file (DataFileType): File path and extension of the embeddings,
+                whose shard manifest orders the raw data.
             index_args (dict): Arguments for searching the Faiss index.
+            manager (FaissIndexManager): Index to search instead of the
+                process-wide one, e.g. for benchmarks.
+            cache_results (bool): Use the search result cache.
+            reader (ShardReader): Full-precision embeddings used for
+                re-ranking, instead of the configured ones.
         """
         self.index_file = index_file
         self.raw_data_file = raw_data_file
+        self.embed_file = embed_file
         self.index_args = index_args
+        self.index_manager = manager or index_manager
+        self.cache_results = cache_results
+        self.reader = reader
         self.table = None
 
-    def _load_index(self) -> faiss.Index:
+    def _load_index(self) -> Tuple[faiss.Index, int]:
         """
-        Load the Faiss index.
+        Get the resident Faiss index from the process-wide index manager.
 
         Returns:
-            faiss.Index: Loaded Faiss index.
+            tuple: Loaded Faiss index and its version.
+        """
+        return self.index_manager.snapshot()
+
+    @staticmethod
+    def _embedding_cache_key(search_query: dict) -> Optional[Tuple[str, str, str]]:
+        """
+        Cache key of a query embedding, None when the query is not cacheable.
+
+        Only text queries are cached: other media types reference files whose
+        content can change under the same name.
         """
-        dir_path, ext = self.index_file.values()
-        file_path = get_file_path(dir_path, ext, False)
+        if search_query["search_type"] != "text":
+            return None
 
-        index = faiss.read_index(str(file_path))
-        return index
+        text = " ".join(
+            unicodedata.normalize("NFC", search_query["search_data"]).split()
+        )
+        return (search_query["search_type"], search_query["search_src_lang"], text)
 
-    def _process_search_query(self, search_query: dict) -> np.ndarray:
+    def _process_search_query(self, search_queries: List[dict]) -> np.ndarray:
         """
-        Process the search query and generate embeddings.
+        Generate L2-normalized embeddings for a batch of search queries.
+
+        Cached embeddings are reused; the remaining queries are grouped by
+        search type and source language so that every group is encoded in a
+        single forward pass.
 
         Args:
-            search_query (dict): Search query containing search data, type, and source language.
+            search_queries (list): Search queries containing search data, type,
+                and source language.
 
         Returns:
-            np.ndarray: Query embeddings.
+            np.ndarray: Query embeddings in request order.
         """
-        search_data, search_type, search_src_lang = search_query.values()
+        cached: List[Optional[np.ndarray]] = [None] * len(search_queries)
+        cache_keys = [self._embedding_cache_key(query) for query in search_queries]
 
-        data2vec_model = load_model(search_type)
+        groups: Dict[Tuple[str, str], List[int]] = {}
+        for position, (search_query, cache_key) in enumerate(
+            zip(search_queries, cache_keys)
+        ):
+            if cache_key is not None:
+                cached[position] = embedding_cache.get(cache_key)
+            if cached[position] is None:
+                key = (search_query["search_type"], search_query["search_src_lang"])
+                groups.setdefault(key, []).append(position)
 
-        if data2vec_model is None:
-            logger.warning(f"No pipeline available for dataset type '{search_type}'")
-            return
+        for (search_type, search_src_lang), positions in groups.items():
+            group_embeddings = model_registry.predict(
+                search_type,
+                [search_queries[position]["search_data"] for position in positions],
+                source_lang=search_src_lang,
+            )
+            group_embeddings = group_embeddings.cpu().numpy().astype(np.float32)
+            faiss.normalize_L2(group_embeddings)
 
-        query_embedding = data2vec_model.predict(
-            [search_data], source_lang=search_src_lang
-        )
+            for position, embedding in zip(positions, group_embeddings):
+                cached[position] = embedding
+                if cache_keys[position] is not None:
+                    embedding_cache.put(cache_keys[position], embedding)
 
-        return query_embedding.numpy().astype(np.float32)
+        return np.stack(cached)
 
-    def _query_index(self, search_query: dict) -> List[List[int]]:
+    @staticmethod
+    def _distances_to_scores(index: faiss.Index, distances: np.ndarray) -> np.ndarray:
         """
-        Search the Faiss index using the query and return results.
+        Convert Faiss distances into cosine similarities (higher is better).
 
         Args:
-            search_query (dict): Search query.
+            index (faiss.Index): Index that produced the distances.
+            distances (np.ndarray): Distances returned by index.search.
 
         Returns:
-            list: List of indices.
+            np.ndarray: Cosine similarity scores.
+        """
+        if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+            return distances
+
+        # Squared L2 distance between unit vectors is 2 - 2 * cosine
+        return 1.0 - distances / 2.0
+
+    def _query_index(
+        self,
+        index: faiss.Index,
+        query_embeddings: np.ndarray,
+        k: int,
+        search_params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        index = self._load_index()
+        Search the Faiss index with a batch of normalized query embeddings.
 
-        query_embedding = self._process_search_query(search_query)
-        faiss.normalize_L2(query_embedding)
+        Args:
+            index (faiss.Index): Index to search.
+            query_embeddings (np.ndarray): Query embeddings, one row per query.
+            k (int): Number of neighbors to retrieve for every query.
+            search_params (dict): Per-request search parameters, on top of the
+                deployment defaults.
+
+        Returns:
+            tuple: Scores and indices, one row per query.
+        """
+        search_params = search_params or {}
 
-        _, indices = index.search(query_embedding, self.index_args["k_neighbors"])
+        with search_params_lock:
+            set_search_params(index, default_search_params, strict=False)
+            set_search_params(index, search_params)
+            try:
+                distances, indices = index.search(query_embeddings, k)
+            finally:
+                # Put back what the request changed for the next search
+                set_search_params(
+                    index,
+                    {
+                        name: default_search_params.get(
+                            name, SEARCH_PARAM_DEFAULTS[name]
+                        )
+                        for name in search_params
+                    },
+                    strict=False,
+                )
 
-        return indices
+        return self._distances_to_scores(index, distances), indices
 
     def _search_results(self, indices) -> list:
         """
@@ -115,18 +295,206 @@ class SearchFaissIndex:
         Returns:
             list: List of search results.
         """
-        idxs = indices[0]
-        results = get_embeds_details(idxs, self.raw_data_file)
+        # Faiss pads with -1 when fewer than k neighbors are found
+        idxs = [idx for idx in indices if idx >= 0]
+        results = get_embeds_details(idxs, self.raw_data_file, self.embed_file)
 
         return results
 
-    def process(self, search_query: dict) -> None:
+    def _rerank(
+        self, query_embeddings: np.ndarray, candidates: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Process the search on faiss index and handle exceptions.
+        Re-score candidates with exact cosine similarity against the
+        full-precision embeddings and keep the best k.
+
+        Only the candidate rows are read from the memory-mapped shards, so
+        this works like IndexRefineFlat without holding every vector in RAM.
+
+        Args:
+            query_embeddings (np.ndarray): Normalized query embeddings.
+            candidates (np.ndarray): Candidate ids from the index, one row per
+                query, padded with -1.
+            k (int): Number of neighbors to keep.
+
+        Returns:
+            tuple: Scores and indices, one row per query, padded with -1.
+        """
+        reader = self.reader or get_embedding_reader()
+
+        # Gather every distinct candidate of the batch once
+        unique_ids = np.unique(candidates[candidates >= 0])
+        vectors = reader.take(unique_ids)
+        faiss.normalize_L2(vectors)
+
+        scores = np.full((len(candidates), k), -np.inf, dtype=np.float32)
+        indices = np.full((len(candidates), k), -1, dtype=np.int64)
+
+        for row, (query, ids) in enumerate(zip(query_embeddings, candidates)):
+            ids = ids[ids >= 0]
+            similarities = vectors[np.searchsorted(unique_ids, ids)] @ query
+
+            order = np.argsort(-similarities, kind="stable")[:k]
+            scores[row, : len(order)] = similarities[order]
+            indices[row, : len(order)] = ids[order]
+
+        return scores, indices
+
+    def _search_neighbors(
+        self,
+        query_embeddings: np.ndarray,
+        ks: List[int],
+        search_params: Optional[List[Dict[str, Any]]] = None,
+        rerank_factors: Optional[List[int]] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get ids and scores for every query, from the result cache when the
+        same embedding was searched with the same k, search parameters and
+        rerank factor on the same index version.
+
+        Args:
+            query_embeddings (np.ndarray): Normalized query embeddings.
+            ks (list): Number of neighbors of every query.
+            search_params (list): Search parameters of every query.
+            rerank_factors (list): Rerank factor of every query.
+
+        Returns:
+            list: (ids, scores) of every query, in request order.
+        """
+        index, index_version = self._load_index()
+        search_params = search_params or [{} for _ in ks]
+        rerank_factors = rerank_factors or [default_rerank_factor for _ in ks]
+        group_keys = [
+            (tuple(sorted(params.items())), rerank_factor)
+            for params, rerank_factor in zip(search_params, rerank_factors)
+        ]
+
+        cache_keys = [
+            (
+                hashlib.sha1(embedding.tobytes()).hexdigest(),
+                k,
+                group_key,
+                index_version,
+            )
+            for embedding, k, group_key in zip(query_embeddings, ks, group_keys)
+        ]
+        neighbors = [
+            result_cache.get(cache_key) if self.cache_results else None
+            for cache_key in cache_keys
+        ]
+
+        # Queries sharing search parameters and rerank factor are searched together
+        groups: Dict[Tuple, List[int]] = {}
+        for position, hit in enumerate(neighbors):
+            if hit is None:
+                groups.setdefault(group_keys[position], []).append(position)
+
+        for (params_key, rerank_factor), missing in groups.items():
+            k = max(ks[position] for position in missing)
+            # More candidates than the index holds only pads with -1
+            num_candidates = min(k * rerank_factor, max(index.ntotal, k))
+            scores, indices = self._query_index(
+                index,
+                query_embeddings[missing],
+                num_candidates,
+                dict(params_key),
+            )
+            if rerank_factor > 1:
+                scores, indices = self._rerank(query_embeddings[missing], indices, k)
+
+            for row, position in enumerate(missing):
+                ids, row_scores = (
+                    indices[row, : ks[position]],
+                    scores[row, : ks[position]],
+                )
+                keep = ids >= 0
+                # Boolean indexing copies, so the batch matrices are not retained
+                neighbors[position] = (ids[keep], row_scores[keep])
+                if self.cache_results:
+                    result_cache.put(cache_keys[position], neighbors[position])
+
+        return neighbors
+
+    def search_embeddings(
+        self,
+        query_embeddings: np.ndarray,
+        k: int,
+        search_params: Optional[Dict[str, Any]] = None,
+        rerank_factor: Optional[int] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Search the index with embeddings that are already computed.
+
+        Args:
+            query_embeddings (np.ndarray): Normalized query embeddings.
+            k (int): Number of neighbors of every query.
+            search_params (dict): Search parameters of every query.
+            rerank_factor (int): Rerank factor of every query.
+
+        Returns:
+            list: (ids, scores) of every query, in request order.
+        """
+        return self._search_neighbors(
+            query_embeddings,
+            [k] * len(query_embeddings),
+            [search_params or {}] * len(query_embeddings),
+            [rerank_factor or default_rerank_factor] * len(query_embeddings),
+        )
+
+    def process_batch(self, search_queries: List[dict]) -> List[dict]:
+        """
+        Search the Faiss index for a batch of queries with a single index.search.
+
+        Args:
+            search_queries (list): Search queries, each optionally carrying its
+                own number of neighbors `k`, `search_params` and
+                `rerank_factor`.
+
+        Returns:
+            list: Ids, scores and details for every query, in request order.
         """
         try:
-            indices = self._query_index(search_query)
-            return self._search_results(indices)
+            if not search_queries:
+                return []
+
+            ks = [
+                search_query.get("k") or self.index_args["k_neighbors"]
+                for search_query in search_queries
+            ]
+
+            search_params = [
+                search_query.get("search_params") or {}
+                for search_query in search_queries
+            ]
+
+            rerank_factors = [
+                search_query.get("rerank_factor") or default_rerank_factor
+                for search_query in search_queries
+            ]
+
+            query_embeddings = self._process_search_query(search_queries)
+            neighbors = self._search_neighbors(
+                query_embeddings, ks, search_params, rerank_factors
+            )
+
+            # Fetch the details of every distinct id once
+            unique_ids = sorted({int(idx) for ids, _ in neighbors for idx in ids})
+            details = dict(zip(unique_ids, self._search_results(unique_ids)))
+
+            return [
+                {
+                    "ids": ids.tolist(),
+                    "scores": scores.tolist(),
+                    "data": [details[idx] for idx in ids.tolist()],
+                }
+                for ids, scores in neighbors
+            ]
         except Exception as e:
             logger.exception(f"An error occurred: {e}")
             raise e
+
+    def process(self, search_query: dict) -> list:
+        """
+        Process the search on faiss index and handle exceptions.
+        """
+        return self.process_batch([search_query])[0]["data"]
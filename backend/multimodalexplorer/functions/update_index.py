@@ -0,0 +1,218 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+import faiss
+import numpy as np
+
+from multimodalexplorer.functions.create_faiss_index import CreateFaissIndex
+from multimodalexplorer.types.data_types import DataFileType
+from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.index_state import (
+    coarse_distance,
+    load_index_state,
+    load_tombstones,
+    read_delete_ids,
+    save_index_state,
+    save_tombstones,
+)
+from multimodalexplorer.utils.shards import ShardReader
+from multimodalexplorer.utils.utils import parse_arguments, select_params
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class UpdateFaissIndex(CreateFaissIndex):
+    def __init__(
+        self,
+        embed_file: DataFileType,
+        index_file: DataFileType,
+        train_data_size: int,
+        index_build: Optional[Dict[str, Any]] = None,
+        index_args: Optional[Dict[str, Any]] = None,
+        index_update: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Add the embedding shards written since the last build to the trained
+        index, without retraining it or re-adding the existing rows.
+
+        Args:
+            embed_file (DataFileType): Directory and filename for input embeddings.
+            index_file (DataFileType): Directory and filename of the index.
+            train_data_size (int): Size of the training sample of the index.
+            index_build (dict): Build settings, see CreateFaissIndex.
+            index_args (dict): Index arguments, see CreateFaissIndex.
+            index_update (dict): Update settings with keys
+                - drift_threshold (float): Ratio of the coarse distance of new
+                  rows to that of the training sample above which a full
+                  retrain is recommended.
+                - drift_sample_size (int): New rows sampled for the check.
+                - delete_ids_file (str): .npy or text file of row ids to
+                  tombstone on every run. Ids already deleted are skipped.
+        """
+        super().__init__(
+            embed_file, index_file, train_data_size, index_build, index_args
+        )
+
+        index_update = index_update or {}
+        self.drift_threshold = index_update.get("drift_threshold", 1.25)
+        self.drift_sample_size = index_update.get("drift_sample_size", 10000)
+        self.delete_ids_file = index_update.get("delete_ids_file")
+
+    def _check_drift(
+        self,
+        index: faiss.Index,
+        reader: ShardReader,
+        state: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Compare how far rows added since training are from the coarse
+        centroids with how far the training sample was.
+
+        Returns:
+            dict: Drift ratio, share of rows added since training and whether
+                a full retrain is recommended, None if it cannot be measured.
+        """
+        new_rows = reader.num_rows - state["trained_rows"]
+        if new_rows <= 0 or state.get("train_distance") is None:
+            return None
+
+        rng = np.random.default_rng(self.train_seed)
+        sample_idxs = state["trained_rows"] + np.sort(
+            rng.choice(
+                new_rows, size=min(new_rows, self.drift_sample_size), replace=False
+            )
+        )
+        new_data = reader.take(sample_idxs)
+        faiss.normalize_L2(new_data)
+
+        ratio = coarse_distance(index, new_data) / state["train_distance"]
+        drift = {
+            "ratio": ratio,
+            "added_fraction": new_rows / state["trained_rows"],
+            "retrain_recommended": ratio > self.drift_threshold,
+        }
+
+        if drift["retrain_recommended"]:
+            logger.warning(
+                f"New embeddings are {ratio:.2f}x further from the coarse "
+                "centroids than the training sample, run CreateFaissIndex "
+                "to retrain the index"
+            )
+        else:
+            logger.info(f"Drift of new embeddings: {ratio:.2f}x")
+
+        return drift
+
+    def _update_index(self, delete_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Append new shards to the index and apply deletions.
+
+        The shards the index covers must still be the first shards of the
+        embeddings, as they are when ProcessDataset only appended datasets
+        or shards. Anything else changes the row ids and needs a full build.
+
+        Args:
+            delete_ids (Iterable[int]): Row ids to tombstone.
+        """
+        dir_path, ext = self.index_file.values()
+        file_path = get_file_path(dir_path, ext, False)
+
+        state = load_index_state(file_path)
+        if state is None:
+            raise FileNotFoundError(
+                f"No index state next to '{file_path}', run CreateFaissIndex first."
+            )
+        if state["build_mode"] == "ondisk":
+            raise ValueError(
+                "Indexes built in ondisk mode cannot be updated, run CreateFaissIndex."
+            )
+
+        reader = ShardReader(self.embed_file)
+        shards = [shard_path.name for shard_path in reader.files]
+        if shards[: len(state["shards"])] != state["shards"]:
+            raise ValueError(
+                "Embedding shards were rewritten since the index was built, "
+                "run CreateFaissIndex for a full rebuild."
+            )
+
+        index = faiss.read_index(str(file_path))
+
+        start_row = state["num_rows"]
+        if reader.num_rows > start_row:
+            self._add_chunks(
+                index, reader.iter_chunks(self.add_batch_size, start_row=start_row)
+            )
+            logger.info(f"Added {reader.num_rows - start_row} new rows to index")
+
+        tombstones = load_tombstones(file_path)
+        if delete_ids is not None:
+            new_ids = np.setdiff1d(
+                np.asarray(list(delete_ids), dtype=np.int64), tombstones
+            )
+            self._remove_tombstones(index, new_ids)
+            tombstones = np.union1d(tombstones, new_ids)
+            save_tombstones(file_path, tombstones)
+
+        drift = self._check_drift(index, reader, state) or state.get("drift")
+
+        self._write_index(index, file_path)
+        save_index_state(
+            file_path,
+            {
+                **state,
+                "version": state["version"] + 1,
+                "shards": shards,
+                "num_rows": reader.num_rows,
+                "num_deleted": len(tombstones),
+                "drift": drift,
+            },
+        )
+        logger.info(
+            f"Updated Faiss index to version {state['version'] + 1} - {index.ntotal}"
+        )
+
+    def process(self, delete_ids: Optional[Iterable[int]] = None):
+        """
+        Process method to update the Faiss index with error handling.
+
+        Args:
+            delete_ids (Iterable[int]): Row ids to tombstone, read from
+                delete_ids_file when not given.
+        """
+        try:
+            if delete_ids is None and self.delete_ids_file:
+                delete_ids = read_delete_ids(Path(self.delete_ids_file))
+                logger.info(
+                    f"Read {len(delete_ids)} ids to delete from {self.delete_ids_file}"
+                )
+            self._update_index(delete_ids)
+        except Exception as e:
+            logger.exception("Could not update faiss index", exc_info=e)
+            return None
+
+
+if __name__ == "__main__":
+    p_list = [
+        "embed_file",
+        "index_file",
+        "train_data_size",
+        "index_build",
+        "index_args",
+        "index_update",
+    ]
+    args = parse_arguments()
+    params = select_params(args, p_list)
+
+    logger.info("Arguments: %s", params)
+
+    processer = UpdateFaissIndex(*params)
+    processer.process()
@@ -3,14 +3,38 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from multimodalexplorer.api.endpoints import create_router
+from multimodalexplorer.api.endpoints.search import search_batcher
+from multimodalexplorer.api.executors import shutdown_executors
+from multimodalexplorer.functions.search_faiss_index import (
+    index_manager,
+    model_registry,
+)
 from multimodalexplorer.utils.utils import parse_arguments
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the Faiss index once and watch it for rebuilds
+    index_manager.start()
+    # Load the query encoders in the background, /api/models/ready reports
+    # when they are warm
+    model_registry.start()
+    search_batcher.start()
+    yield
+    await search_batcher.stop()
+    shutdown_executors()
+    model_registry.stop()
+    index_manager.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 args = parse_arguments()
 
@@ -25,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -4,9 +4,9 @@
 # LICENSE file in the root directory of this source tree.
 
 
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class EmbeddingData(BaseModel):
@@ -29,6 +29,51 @@ class EmbeddingsDetailsResponse(BaseModel):
     data: List[EmbeddingData]
 
 
+# select_points and count_clusters routes
+class RegionRequest(BaseModel):
+    rect: Optional[List[float]] = Field(
+        None, min_length=4, max_length=4, description="x_min, y_min, x_max, y_max"
+    )
+    polygon: Optional[List[List[float]]] = Field(
+        None, min_length=3, description="lasso vertices as [x, y] pairs"
+    )
+
+    @model_validator(mode="after")
+    def check_region(self):
+        if (self.rect is None) == (self.polygon is None):
+            raise ValueError("Set exactly one of rect or polygon")
+        return self
+
+
+class SelectPointsRequest(RegionRequest):
+    offset: int = Field(0, ge=0, description="number of ids to skip")
+    limit: int = Field(10000, gt=0, le=50000, description="ids per page")
+
+
+class SelectPointsResponse(BaseModel):
+    ids: List[int]
+    total: int
+    next_offset: Optional[int]
+
+
+class ClusterCountsResponse(BaseModel):
+    total: int
+    clusters: List[int]
+    counts: List[int]
+
+
+# nearest_points route
+class NearestPointsRequest(BaseModel):
+    x: float
+    y: float
+    k: int = Field(10, gt=0, le=10000, description="number of points")
+
+
+class NearestPointsResponse(BaseModel):
+    ids: List[int]
+    distances: List[float]
+
+
 # get_search route
 class SearchRequest(BaseModel):
     search_data: str
@@ -38,3 +83,98 @@ class SearchRequest(BaseModel):
 
 class SearchResponse(BaseModel):
     data: List[EmbeddingData]
+
+
+# get_search_batch route
+class SearchQuery(SearchRequest):
+    k: Optional[int] = Field(None, gt=0, le=10000, description="number of neighbors")
+    search_params: Optional[Dict[str, float]] = Field(
+        None, description="faiss search parameters such as nprobe or efSearch"
+    )
+    rerank_factor: Optional[int] = Field(
+        None, ge=1, le=100, description="candidates re-scored exactly per neighbor"
+    )
+
+
+class SearchBatchRequest(BaseModel):
+    queries: List[SearchQuery] = Field(
+        ..., max_length=256, description="list of search queries"
+    )
+
+
+class SearchBatchResult(BaseModel):
+    ids: List[int]
+    scores: List[float]
+    data: List[EmbeddingData]
+
+
+class SearchBatchResponse(BaseModel):
+    data: List[SearchBatchResult]
+
+
+# get_metrics route
+class SearchMetricsResponse(BaseModel):
+    index: Dict[str, Any]
+    batching: Dict[str, Any]
+    executors: Dict[str, Any]
+    cache: Dict[str, Any]
+
+
+# tiles routes
+class TileMetaResponse(BaseModel):
+    num_points: int
+    num_levels: int
+    tile_points: int
+    cell_bins: int
+    bounds: List[float]
+    levels: List[Dict[str, int]]
+
+
+class TilePointsResponse(BaseModel):
+    level: int
+    complete: bool
+    ids: List[int]
+    x: List[float]
+    y: List[float]
+    cluster: List[int]
+
+
+class TileCellsResponse(BaseModel):
+    level: int
+    cell_size: float
+    x: List[float]
+    y: List[float]
+    count: List[int]
+    cluster: List[int]
+
+
+# clusters routes
+class ClusterSummary(BaseModel):
+    cluster: int
+    noise: bool
+    size: int
+    centroid_2d: List[float]
+    medoid: int
+    central_rows: List[int]
+    central_scores: List[float]
+    cohesion: float
+    media_types: Dict[str, int]
+    centroid: Optional[List[float]] = None
+
+
+class ClustersResponse(BaseModel):
+    num_points: int
+    noise_label: int
+    data: List[ClusterSummary]
+
+
+# models routes
+class ModelsStatusResponse(BaseModel):
+    ready: bool
+    preload: List[str]
+    models: Dict[str, Dict[str, Any]]
+
+
+class ModelEvictResponse(BaseModel):
+    dataset_type: str
+    evicted: bool
@@ -0,0 +1,226 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from multimodalexplorer.utils.executor import BoundedExecutor, ExecutorSaturatedError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_queue_size: int = 0,
+        executor: Optional[BoundedExecutor] = None,
+        name: str = "batcher",
+    ):
+        """
+        Coalesce items submitted by concurrent requests into batches.
+
+        Items arriving within `max_wait_ms` of the first item of a batch, up to
+        `max_batch_size` items, are passed together to `batch_fn` on a worker
+        thread. Batches run one at a time, so requests arriving while a batch
+        is running are collected into the next one.
+
+        Args:
+            batch_fn (Callable): Function mapping a list of items to a list of
+                results of the same length and order.
+            max_batch_size (int): Maximum number of items per batch.
+            max_wait_ms (float): Maximum time to wait for more items.
+            max_queue_size (int): Maximum number of waiting items before new
+                ones are rejected with ExecutorSaturatedError, 0 for no limit.
+            executor (BoundedExecutor): Executor running the batches, the event
+                loop's default executor when None.
+            name (str): Name used in logs.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_queue_size = max(0, max_queue_size)
+        self.executor = executor
+        self.name = name
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self._batch_count = 0
+        self._item_count = 0
+        self._rejected_count = 0
+        self._max_queue_depth = 0
+        self._batch_seconds = 0.0
+        self._batch_size_histogram: Dict[int, int] = {}
+
+    def start(self) -> None:
+        """
+        Start the batching loop on the running event loop.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the batching loop.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._queue = None
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item (Any): Item passed to `batch_fn` as part of a batch.
+
+        Returns:
+            Any: Result of the item.
+
+        Raises:
+            ExecutorSaturatedError: When the queue is full.
+        """
+        self.start()
+
+        if self.max_queue_size and self._queue.qsize() >= self.max_queue_size:
+            self._rejected_count += 1
+            raise ExecutorSaturatedError(
+                f"Batcher '{self.name}' is saturated, {self._queue.qsize()} items queued"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        self._max_queue_depth = max(self._max_queue_depth, self._queue.qsize())
+
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """
+        Wait for the first item, then gather more until the batch is full or
+        the wait window has passed.
+        """
+        loop = asyncio.get_running_loop()
+
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    def _run_batch(self, items: List[Any]) -> List[Tuple[bool, Any]]:
+        """
+        Run `batch_fn` on a worker thread. If the batch fails, items are
+        retried one by one so a single bad item does not fail its neighbours.
+        """
+        try:
+            return [(True, result) for result in self.batch_fn(items)]
+        except Exception as e:
+            if len(items) == 1:
+                return [(False, e)]
+
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((True, self.batch_fn([item])[0]))
+            except Exception as e:
+                outcomes.append((False, e))
+        return outcomes
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+
+            # Requests may have been cancelled while waiting in the queue
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            items = [item for item, _ in batch]
+            try:
+                if self.executor is not None:
+                    outcomes = await self.executor.run(self._run_batch, items)
+                else:
+                    outcomes = await loop.run_in_executor(None, self._run_batch, items)
+            except Exception as e:
+                outcomes = [(False, e)] * len(batch)
+
+            self._record_batch(len(batch), time.perf_counter() - start)
+
+            for (_, future), (ok, value) in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _record_batch(self, batch_size: int, seconds: float) -> None:
+        self._batch_count += 1
+        self._item_count += batch_size
+        self._batch_seconds += seconds
+
+        # Power-of-two buckets: 1, 2, 4, ... up to max_batch_size
+        bucket = 1
+        while bucket < batch_size:
+            bucket *= 2
+        bucket = min(bucket, self.max_batch_size)
+        self._batch_size_histogram[bucket] = (
+            self._batch_size_histogram.get(bucket, 0) + 1
+        )
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report queue depth and the batch size distribution.
+
+        Returns:
+            dict: Batching metrics.
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self._max_queue_depth,
+            "batch_count": self._batch_count,
+            "item_count": self._item_count,
+            "rejected_count": self._rejected_count,
+            "mean_batch_size": (
+                self._item_count / self._batch_count if self._batch_count else 0.0
+            ),
+            "mean_batch_seconds": (
+                self._batch_seconds / self._batch_count if self._batch_count else 0.0
+            ),
+            "batch_size_histogram": {
+                f"le_{bucket}": count
+                for bucket, count in sorted(self._batch_size_histogram.items())
+            },
+        }
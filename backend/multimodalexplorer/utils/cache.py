@@ -0,0 +1,132 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+# Rough bookkeeping cost of one entry (key, tuple and OrderedDict node)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def estimate_nbytes(value: Any) -> int:
+    """
+    Estimate the memory held by a cached value.
+
+    NumPy arrays count their buffer, tuples and lists the sum of their items.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(estimate_nbytes(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl_seconds: Optional[float] = None,
+        size_fn: Callable[[Any], int] = estimate_nbytes,
+    ):
+        """
+        Thread-safe LRU cache bounded by memory rather than entry count.
+
+        Args:
+            max_bytes (int): Memory budget; least recently used entries are
+                evicted once it is exceeded. 0 disables the cache.
+            ttl_seconds (float): Entries older than this are treated as misses.
+                None keeps entries until they are evicted.
+            size_fn (Callable): Estimates the size of a value in bytes.
+        """
+        self.max_bytes = max(0, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self.size_fn = size_fn
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value and mark it as recently used.
+
+        Returns:
+            Any: Cached value, None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and self.ttl_seconds is not None:
+                if time.monotonic() - entry[2] > self.ttl_seconds:
+                    self._remove(key)
+                    entry = None
+
+            if entry is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Cache a value, evicting least recently used entries to stay in budget.
+        """
+        size = self.size_fn(value) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """
+        Drop every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report hit ratio and memory usage.
+
+        Returns:
+            dict: Cache metrics.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
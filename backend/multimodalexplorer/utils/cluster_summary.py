@@ -0,0 +1,189 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from multimodalexplorer.utils.shards import ShardReader
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLUSTER_SUMMARY_VERSION = 1
+
+
+def cluster_summary_paths(umap_file_path: Path) -> Tuple[Path, Path]:
+    """
+    Summary and high-dimensional centroid files of a UMAP output file.
+    """
+    stem = umap_file_path.stem
+    return (
+        umap_file_path.with_name(f"{stem}_clusters.json"),
+        umap_file_path.with_name(f"{stem}_cluster_centroids.npy"),
+    )
+
+
+def _normalized(chunk: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return chunk / norms
+
+
+def _top_per_group(
+    groups: np.ndarray, scores: np.ndarray, rows: np.ndarray, n: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Keep the n highest scores of every group, sorted by group and score.
+    """
+    order = np.lexsort((-scores, groups))
+    sorted_groups = groups[order]
+    rank = np.arange(len(order)) - np.searchsorted(sorted_groups, sorted_groups)
+    keep = order[rank < n]
+    return groups[keep], scores[keep], rows[keep]
+
+
+def summarize_clusters(
+    reader: ShardReader,
+    umap_embeddings: np.ndarray,
+    noise_label: int,
+    top_n: int = 10,
+    chunk_rows: int = 50000,
+) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Summarize every cluster of the UMAP output in two streaming passes over
+    the embedding shards: one for the centroids, one for centrality.
+
+    Centroids are means of L2-normalized embeddings. Rows are ranked by
+    cosine similarity to their cluster centroid; the first one is reported
+    as the medoid. Cohesion is the mean similarity of the members to the
+    centroid.
+
+    Args:
+        reader (ShardReader): Embeddings, in the rows of the UMAP output.
+        umap_embeddings (np.ndarray): Normalized UMAP rows of (x, y, cluster).
+        noise_label (int): Label of the points HDBSCAN left unclustered.
+        top_n (int): Most central rows kept per cluster.
+        chunk_rows (int): Embeddings read at a time.
+
+    Returns:
+        tuple: Summary and the (clusters, dim) centroid matrix.
+    """
+    num_points = len(umap_embeddings)
+    if reader.num_rows != num_points:
+        raise ValueError(
+            f"{reader.num_rows} embeddings for {num_points} UMAP rows, "
+            "rerun ReduceEmbedDims."
+        )
+
+    labels = umap_embeddings[:, -1].astype(np.int64)
+    num_clusters = int(labels.max()) + 1
+    sizes = np.bincount(labels, minlength=num_clusters)
+
+    centroids_2d = (
+        np.column_stack(
+            [
+                np.bincount(
+                    labels, weights=umap_embeddings[:, dim], minlength=num_clusters
+                )
+                for dim in range(umap_embeddings.shape[1] - 1)
+            ]
+        )
+        / np.maximum(sizes, 1)[:, None]
+    )
+
+    # Media type of every row, from the shard it was read from
+    media_names = sorted(set(reader.media_types))
+    media_codes = np.repeat(
+        [media_names.index(media_type) for media_type in reader.media_types],
+        reader.counts,
+    )
+    media_counts = np.bincount(
+        labels * len(media_names) + media_codes,
+        minlength=num_clusters * len(media_names),
+    ).reshape(num_clusters, len(media_names))
+
+    sums = np.zeros((num_clusters, reader.dim), dtype=np.float64)
+    for start, chunk in reader.iter_chunks(chunk_rows):
+        chunk_labels = labels[start : start + len(chunk)]
+        order = np.argsort(chunk_labels, kind="stable")
+        present, starts = np.unique(chunk_labels[order], return_index=True)
+        sums[present] += np.add.reduceat(_normalized(chunk)[order], starts)
+
+    centroids = sums / np.maximum(sizes, 1)[:, None]
+    cohesion = np.linalg.norm(centroids, axis=1)
+    unit_centroids = centroids / np.where(cohesion > 0, cohesion, 1)[:, None]
+
+    top_groups = np.empty(0, dtype=np.int64)
+    top_scores = np.empty(0, dtype=np.float64)
+    top_rows = np.empty(0, dtype=np.int64)
+    for start, chunk in reader.iter_chunks(chunk_rows):
+        chunk_labels = labels[start : start + len(chunk)]
+        scores = np.einsum("nd,nd->n", _normalized(chunk), unit_centroids[chunk_labels])
+        top_groups, top_scores, top_rows = _top_per_group(
+            np.concatenate([top_groups, chunk_labels]),
+            np.concatenate([top_scores, scores]),
+            np.concatenate([top_rows, np.arange(start, start + len(chunk))]),
+            top_n,
+        )
+
+    starts = np.searchsorted(top_groups, np.arange(num_clusters + 1))
+
+    clusters = []
+    for cluster in np.nonzero(sizes)[0]:
+        central = slice(starts[cluster], starts[cluster + 1])
+        clusters.append(
+            {
+                "cluster": int(cluster),
+                "noise": bool(cluster == noise_label),
+                "size": int(sizes[cluster]),
+                "centroid_2d": centroids_2d[cluster].tolist(),
+                "medoid": int(top_rows[central][0]),
+                "central_rows": top_rows[central].tolist(),
+                "central_scores": top_scores[central].tolist(),
+                "cohesion": float(cohesion[cluster]),
+                "media_types": {
+                    name: int(count)
+                    for name, count in zip(media_names, media_counts[cluster])
+                    if count > 0
+                },
+            }
+        )
+
+    summary = {
+        "format_version": CLUSTER_SUMMARY_VERSION,
+        "num_points": num_points,
+        "noise_label": noise_label,
+        "dim": reader.dim,
+        "top_n": top_n,
+        "clusters": clusters,
+    }
+
+    logger.info(f"Summarized {len(clusters)} clusters")
+    return summary, unit_centroids.astype(np.float32)
+
+
+def save_cluster_summary(
+    umap_file_path: Path, summary: Dict[str, Any], centroids: np.ndarray
+) -> None:
+    """
+    Write the summary and centroids next to the UMAP output, each replaced
+    atomically. The summary is written last, readers key on it.
+    """
+    summary_path, centroids_path = cluster_summary_paths(umap_file_path)
+
+    tmp_centroids_path = centroids_path.with_name(f"{centroids_path.stem}.tmp.npy")
+    np.save(tmp_centroids_path, centroids)
+    os.replace(tmp_centroids_path, centroids_path)
+
+    tmp_summary_path = summary_path.with_name(f"{summary_path.stem}.tmp.json")
+    with open(tmp_summary_path, "w") as f:
+        json.dump(summary, f)
+    os.replace(tmp_summary_path, summary_path)
@@ -0,0 +1,197 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import faiss
+import hdbscan
+import numpy as np
+from sklearn.metrics import silhouette_score
+
+from multimodalexplorer.utils.shards import ShardReader
+from multimodalexplorer.utils.training_sample import stratified_sample
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CLUSTER_BACKENDS = ("hdbscan", "hdbscan_sample", "faiss_kmeans")
+
+# Training points per centroid, as faiss.Kmeans subsamples by default
+KMEANS_POINTS_PER_CENTROID = 256
+
+
+def approximate_predict_chunked(
+    clusterer: hdbscan.HDBSCAN, points: np.ndarray, chunk_rows: int
+) -> np.ndarray:
+    """
+    Label points with a fitted HDBSCAN model, -1 for noise, a chunk at a time.
+    """
+    labels = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), chunk_rows):
+        chunk_labels, _ = hdbscan.approximate_predict(
+            clusterer, points[start : start + chunk_rows]
+        )
+        labels[start : start + chunk_rows] = chunk_labels
+    return labels
+
+
+def fit_hdbscan(
+    points: np.ndarray,
+    cluster_args: Dict[str, Any],
+    sample_size: Optional[int] = None,
+    seed: int = 0,
+    chunk_rows: int = 50000,
+) -> Tuple[np.ndarray, hdbscan.HDBSCAN]:
+    """
+    Cluster UMAP points with HDBSCAN, keeping the prediction data that
+    approximate_predict needs.
+
+    Args:
+        points (np.ndarray): UMAP embeddings.
+        cluster_args (dict): HDBSCAN arguments, including algorithm and
+            core_dist_n_jobs.
+        sample_size (int): Fit on this many random points and label the
+            others with approximate_predict, None fits on every point.
+        seed (int): Seed of the sample.
+        chunk_rows (int): Points labelled per approximate_predict call.
+
+    Returns:
+        tuple: Labels, -1 for noise, and the fitted clusterer.
+    """
+    clusterer = hdbscan.HDBSCAN(prediction_data=True, **cluster_args)
+
+    if sample_size is None or len(points) <= sample_size:
+        return clusterer.fit_predict(points), clusterer
+
+    rng = np.random.default_rng(seed)
+    sample_idxs = np.sort(rng.choice(len(points), size=sample_size, replace=False))
+
+    labels = approximate_predict_chunked(
+        clusterer.fit(points[sample_idxs]), points, chunk_rows
+    )
+    # Fitted points keep the labels of the fit
+    labels[sample_idxs] = clusterer.labels_
+
+    logger.info(f"Fitted HDBSCAN on a sample of {sample_size} points")
+    return labels, clusterer
+
+
+def assign_kmeans(
+    centroids: np.ndarray,
+    reader: ShardReader,
+    start_row: int = 0,
+    chunk_rows: int = 50000,
+) -> np.ndarray:
+    """
+    Label embeddings from `start_row` on with their most similar centroid.
+
+    Args:
+        centroids (np.ndarray): Unit-length centroids, one per label.
+        reader (ShardReader): Embeddings.
+        start_row (int): First global row to label.
+        chunk_rows (int): Embeddings searched at a time.
+
+    Returns:
+        np.ndarray: Labels of the rows, in row order.
+    """
+    index = faiss.IndexFlatIP(centroids.shape[1])
+    index.add(centroids)
+
+    labels = []
+    for _, chunk in reader.iter_chunks(chunk_rows, start_row=start_row):
+        chunk = np.array(chunk)
+        faiss.normalize_L2(chunk)
+        labels.append(index.search(chunk, 1)[1][:, 0])
+
+    return np.concatenate(labels).astype(np.int64)
+
+
+def fit_faiss_kmeans(
+    reader: ShardReader,
+    n_clusters: int,
+    niter: int = 20,
+    seed: int = 0,
+    chunk_rows: int = 50000,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Spherical k-means with Faiss on the L2-normalized full-dimensional
+    embeddings. Centroids are trained on a sample stratified by media type,
+    then every embedding is assigned in chunks. There is no noise label.
+
+    Args:
+        reader (ShardReader): Embeddings.
+        n_clusters (int): Number of clusters.
+        niter (int): K-means iterations.
+        seed (int): Seed of the sample and of the centroid initialization.
+        chunk_rows (int): Embeddings assigned at a time.
+
+    Returns:
+        tuple: Labels and the unit-length centroids.
+    """
+    sample_idxs = stratified_sample(
+        reader, n_clusters * KMEANS_POINTS_PER_CENTROID, seed
+    )
+    sample = reader.take(sample_idxs)
+    faiss.normalize_L2(sample)
+
+    kmeans = faiss.Kmeans(
+        reader.dim,
+        n_clusters,
+        niter=niter,
+        seed=seed,
+        spherical=True,
+        max_points_per_centroid=KMEANS_POINTS_PER_CENTROID,
+    )
+    kmeans.train(sample)
+    logger.info(f"Trained {n_clusters} k-means centroids on {len(sample)} embeddings")
+
+    return assign_kmeans(kmeans.centroids, reader, 0, chunk_rows), kmeans.centroids
+
+
+def cluster_quality(
+    points: np.ndarray,
+    labels: np.ndarray,
+    noise_label: int,
+    sample_size: int = 10000,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Compare clusterings: number of clusters, share of noise and the
+    silhouette score of a sample of clustered points.
+
+    The silhouette is measured on the UMAP points, where clusters are shown,
+    so that every backend is scored in the same space.
+
+    Args:
+        points (np.ndarray): UMAP embeddings.
+        labels (np.ndarray): Cluster labels.
+        noise_label (int): Label of unclustered points, left out of the score.
+        sample_size (int): Points the silhouette is computed on.
+        seed (int): Seed of the sample.
+
+    Returns:
+        dict: Quality measures; silhouette is None with fewer than two clusters.
+    """
+    clustered = labels != noise_label
+    n_clusters = len(np.unique(labels[clustered]))
+
+    silhouette = None
+    if 1 < n_clusters < clustered.sum():
+        silhouette = float(
+            silhouette_score(
+                points[clustered],
+                labels[clustered],
+                sample_size=min(sample_size, int(clustered.sum())),
+                random_state=seed,
+            )
+        )
+
+    return {
+        "n_clusters": n_clusters,
+        "noise_fraction": float(1 - clustered.mean()),
+        "silhouette": silhouette,
+    }
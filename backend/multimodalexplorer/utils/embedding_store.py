@@ -0,0 +1,125 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+# Native embedding shards: a .npy matrix plus a JSON sidecar
+NPY_EMBED_EXT = "npy"
+
+EMBEDDING_DTYPES = ("float32", "float16")
+
+EMBEDDING_FORMAT_VERSION = 1
+
+
+def sidecar_path(file_path: Path) -> Path:
+    """
+    Path of the JSON sidecar describing an embeddings shard.
+    """
+    return file_path.with_suffix(".json")
+
+
+def write_embedding_shard(
+    file_path: Path,
+    embeddings_list: List[torch.Tensor],
+    dtype: str = "float32",
+    model_id: Optional[str] = None,
+) -> Path:
+    """
+    Write embedding batches into one contiguous .npy shard.
+
+    Batches are copied one at a time into a memory-mapped file, so the shard
+    is never concatenated in memory. The sidecar records dim, count, dtype
+    and the model that produced the vectors.
+
+    Args:
+        file_path (Path): Destination .npy file.
+        embeddings_list (list): Embedding batches, in row order.
+        dtype (str): Storage dtype, float32 or float16.
+        model_id (str): Identifier of the embedding model.
+
+    Returns:
+        Path: Written file.
+    """
+    if dtype not in EMBEDDING_DTYPES:
+        raise ValueError(
+            f"Unsupported embedding dtype: {dtype}. "
+            f"Supported dtypes: {', '.join(EMBEDDING_DTYPES)}"
+        )
+
+    count = sum(embeddings.shape[0] for embeddings in embeddings_list)
+    dim = embeddings_list[0].shape[1]
+
+    tmp_path = file_path.with_name(f"{file_path.name}.tmp")
+    out = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.dtype(dtype), shape=(count, dim)
+    )
+
+    row = 0
+    for embeddings in embeddings_list:
+        batch = embeddings.detach().cpu().numpy()
+        out[row : row + batch.shape[0]] = batch
+        row += batch.shape[0]
+
+    out.flush()
+    del out
+    os.replace(tmp_path, file_path)
+
+    with open(sidecar_path(file_path), "w") as f:
+        json.dump(
+            {
+                "format_version": EMBEDDING_FORMAT_VERSION,
+                "dim": dim,
+                "count": count,
+                "dtype": dtype,
+                "model_id": model_id,
+            },
+            f,
+            indent=2,
+        )
+
+    return file_path
+
+
+def read_shard_info(file_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read the sidecar of an embeddings shard, None if it has none.
+    """
+    path = sidecar_path(file_path)
+    if file_path.suffix != f".{NPY_EMBED_EXT}" or not path.exists():
+        return None
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def open_embedding_shard(file_path: Path) -> np.ndarray:
+    """
+    Open one embeddings shard in its storage dtype.
+
+    .npy shards are opened with np.load(mmap_mode="r"); legacy torch shards
+    are memory-mapped where their format allows. Either way opening a shard
+    is cheap and only the rows that are read are paged in.
+
+    Args:
+        file_path (Path): Shard file.
+
+    Returns:
+        np.ndarray: Embeddings of the shard, one row per sample.
+    """
+    if file_path.suffix == f".{NPY_EMBED_EXT}":
+        return np.load(file_path, mmap_mode="r")
+
+    try:
+        embeddings = torch.load(file_path, map_location="cpu", mmap=True)
+    except RuntimeError:
+        # Files saved without the zipfile format cannot be memory-mapped
+        embeddings = torch.load(file_path, map_location="cpu")
+    return embeddings.numpy()
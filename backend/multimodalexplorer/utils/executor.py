@@ -0,0 +1,116 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Sequence
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """
+    Raised when a bounded queue is full and new work is rejected.
+    """
+
+
+class BoundedExecutor:
+    def __init__(
+        self,
+        name: str,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 32,
+        allowed_kinds: Sequence[str] = EXECUTOR_KINDS,
+    ):
+        """
+        Run blocking work off the event loop with bounded concurrency.
+
+        At most `max_workers` calls run at once and at most `max_queue` more
+        wait for a worker. Calls beyond that are rejected with
+        ExecutorSaturatedError instead of queueing without bound.
+
+        Args:
+            name (str): Name used in logs and metrics.
+            kind (str): "thread" for work that releases the GIL (Faiss, torch,
+                Arrow) or "process" for Python-heavy work. Functions and
+                arguments sent to a process pool must be picklable.
+            max_workers (int): Number of workers.
+            max_queue (int): Number of calls allowed to wait for a worker.
+            allowed_kinds (Sequence[str]): Kinds the callers of this pool
+                support. Pools running bound methods or closures over
+                in-process state can only use threads.
+        """
+        if kind not in allowed_kinds:
+            raise ValueError(
+                f"Unsupported executor kind for '{name}': {kind}. Supported kinds: {', '.join(allowed_kinds)}"
+            )
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+
+        self._executor: Executor = (
+            ThreadPoolExecutor(self.max_workers, thread_name_prefix=name)
+            if kind == "thread"
+            else ProcessPoolExecutor(self.max_workers)
+        )
+
+        # Only touched from the event loop thread
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run `fn(*args, **kwargs)` on a worker and await its result.
+
+        Raises:
+            ExecutorSaturatedError: When all workers are busy and the queue is full.
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected += 1
+            raise ExecutorSaturatedError(
+                f"Executor '{self.name}' is saturated, {self._pending} calls pending"
+            )
+
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self._pending -= 1
+            self._completed += 1
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers once running calls finish.
+        """
+        self._executor.shutdown(wait=True)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Report pool usage.
+
+        Returns:
+            dict: Executor metrics.
+        """
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "running": min(self._pending, self.max_workers),
+            "queued": max(0, self._pending - self.max_workers),
+            "completed": self._completed,
+            "rejected": self._rejected,
+        }
@@ -3,9 +3,10 @@
 # This source code is licensed under the MIT license found in the
 # LICENSE file in the root directory of this source tree.
 
+import hashlib
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Union
 
 import torch
 
@@ -17,6 +18,19 @@ VALID_DATASET_TYPES_LIST = list(VALID_DATASET_TYPES)
 
 DatasetType = Enum("DatasetType", VALID_DATASET_TYPES)
 
+# Encoder of every dataset type that has a model
+MODEL_IDS = {
+    "text": "text_sonar_basic_encoder",
+    "audio": "sonar_speech_encoder_eng",
+}
+
+
+def embed_shard_name(dataset_type: str, file_count: Union[int, str]) -> str:
+    """
+    File name of the embeddings shard `file_count` of a dataset type.
+    """
+    return f"{dataset_type}_embedding_{file_count}"
+
 
 def get_file_path(
     dir_name: str,
@@ -42,3 +56,76 @@ def get_file_path(
             raise FileNotFoundError(f"File Path '{file_path}' not found.")
 
     return file_path
+
+
+def list_dir_files(dir_name: str, extension: Optional[str] = None) -> List[Path]:
+    """
+    List the files of a directory, sorted by name.
+
+    Use `ordered_shard_files` to list shards in row order.
+
+    Args:
+        dir_name (str): Directory to list.
+        extension (str): Only keep files with this extension.
+
+    Returns:
+        list: Sorted file paths.
+    """
+    folder_path = Path(dir_name).absolute()
+
+    files = [
+        file_path
+        for file_path in folder_path.iterdir()
+        if file_path.is_file()
+        and (extension is None or file_path.suffix == f".{extension}")
+    ]
+
+    return sorted(files)
+
+
+def file_sha256(file_path: Path, block_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 checksum of a file.
+
+    Args:
+        file_path (Path): File to hash.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag, using the weak
+    comparison of RFC 9110: `W/` prefixes are ignored and `*` matches.
+
+    Args:
+        if_none_match (str): Value of the If-None-Match header.
+        etag (str): Quoted ETag of the current representation.
+
+    Returns:
+        bool: True when the client's copy is current.
+    """
+    if not if_none_match:
+        return False
+
+    opaque_tag = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == opaque_tag:
+            return True
+
+    return False
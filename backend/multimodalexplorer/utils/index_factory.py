@@ -0,0 +1,146 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import logging
+import math
+from typing import Any, Dict, Optional
+
+import faiss
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Factory string used before index types were configurable
+DEFAULT_INDEX_TYPE = "OPQ64,IVF1024,PQ64"
+
+# Named presets; {nlist} and {m} are filled in from the corpus size and dim
+INDEX_PRESETS = {
+    "flat": "Flat",
+    "hnsw": "HNSW32,Flat",
+    "ivf_flat": "IVF{nlist},Flat",
+    "ivf_sq8": "IVF{nlist},SQ8",
+    "ivf_pq": "OPQ{m},IVF{nlist},PQ{m}",
+    "hnsw_sq8": "HNSW32,SQ8",
+}
+
+# Corpora up to this size are searched exactly by the auto index type
+AUTO_FLAT_MAX_VECTORS = 50000
+
+# Faiss asks for at least this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+# Search-time parameters accepted per deployment and per request, with the
+# value Faiss uses when they are not set
+SEARCH_PARAM_DEFAULTS = {
+    "nprobe": 1,
+    "efSearch": 16,
+    "quantizer_efSearch": 16,
+    "k_factor": 1,
+    "k_factor_rf": 1,
+}
+
+
+def auto_nlist(num_vectors: int, train_size: Optional[int] = None) -> int:
+    """
+    Pick the number of IVF lists: the power of two closest to 4 * sqrt(N),
+    capped so that every centroid gets enough training points.
+
+    Args:
+        num_vectors (int): Number of vectors in the index.
+        train_size (int): Number of training vectors.
+
+    Returns:
+        int: Number of inverted lists.
+    """
+    nlist = 2 ** round(math.log2(max(1.0, 4 * math.sqrt(num_vectors))))
+
+    max_nlist = max(1, (train_size or num_vectors) // MIN_POINTS_PER_CENTROID)
+    while nlist > max_nlist:
+        nlist //= 2
+
+    return max(1, nlist)
+
+
+def auto_pq_m(dim: int) -> int:
+    """
+    Pick the number of PQ sub-quantizers: the largest of 64, 32, 16, 8 that
+    divides dim and keeps sub-vectors at least 4 dimensions wide.
+    """
+    for m in (64, 32, 16, 8):
+        if dim % m == 0 and dim // m >= 4:
+            return m
+    return 1
+
+
+def resolve_index_factory(
+    index_type: Optional[str],
+    num_vectors: int,
+    dim: int,
+    train_size: Optional[int] = None,
+) -> str:
+    """
+    Turn the configured index type into a Faiss factory string.
+
+    Args:
+        index_type (str): A factory string, a preset name from INDEX_PRESETS,
+            or "auto". None keeps DEFAULT_INDEX_TYPE.
+        num_vectors (int): Number of vectors in the index.
+        dim (int): Dimension of the vectors.
+        train_size (int): Number of training vectors.
+
+    Returns:
+        str: Faiss factory string.
+    """
+    if index_type is None:
+        return DEFAULT_INDEX_TYPE
+
+    nlist = auto_nlist(num_vectors, train_size)
+    m = auto_pq_m(dim)
+
+    preset = index_type.lower()
+    if preset == "auto":
+        preset = "flat" if num_vectors <= AUTO_FLAT_MAX_VECTORS else "ivf_pq"
+        factory = INDEX_PRESETS[preset].format(nlist=nlist, m=m)
+        logger.info(f"Auto index type for {num_vectors} x {dim} vectors: '{factory}'")
+        return factory
+
+    if preset in INDEX_PRESETS:
+        return INDEX_PRESETS[preset].format(nlist=nlist, m=m)
+
+    return index_type
+
+
+def set_search_params(
+    index: faiss.Index, search_params: Dict[str, Any], strict: bool = True
+) -> None:
+    """
+    Set search-time parameters such as nprobe, efSearch or k_factor through
+    faiss.ParameterSpace, which finds the sub-index each one belongs to.
+    k_factor applies to IVFPQR indexes and k_factor_rf to refine indexes.
+
+    Args:
+        index (faiss.Index): Index to configure.
+        search_params (dict): Parameter names and values.
+        strict (bool): Raise for parameters the index does not have instead
+            of skipping them.
+    """
+    parameter_space = faiss.ParameterSpace()
+
+    for name, value in search_params.items():
+        if name not in SEARCH_PARAM_DEFAULTS:
+            raise ValueError(
+                f"Unsupported search parameter: {name}. "
+                f"Supported parameters: {', '.join(SEARCH_PARAM_DEFAULTS)}"
+            )
+
+        try:
+            parameter_space.set_index_parameter(index, name, float(value))
+        except RuntimeError as e:
+            if strict:
+                raise ValueError(
+                    f"Search parameter '{name}' does not apply to this index"
+                ) from e
+            logger.debug(f"Skipping search parameter '{name}': {e}")
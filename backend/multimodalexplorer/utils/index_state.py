@@ -0,0 +1,118 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import faiss
+import numpy as np
+
+INDEX_STATE_VERSION = 1
+
+
+def index_state_path(file_path: Path) -> Path:
+    """
+    Path of the JSON file describing what an index was built from.
+    """
+    return file_path.with_name(f"{file_path.stem}_state.json")
+
+
+def tombstones_path(file_path: Path) -> Path:
+    """
+    Path of the ids deleted from an index.
+    """
+    return file_path.with_name(f"{file_path.stem}_tombstones.npy")
+
+
+def load_index_state(file_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Read the state of an index, None if it has none.
+    """
+    path = index_state_path(file_path)
+    if not path.exists():
+        return None
+
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def save_index_state(file_path: Path, state: Dict[str, Any]) -> None:
+    """
+    Write the state of an index atomically.
+
+    The state records:
+        - version: Bumped by every build and incremental update.
+        - build_mode: Build mode of the last full build.
+        - shards: Embedding shards covered, in row order.
+        - num_rows: Rows covered by the index, deleted ones included.
+        - trained_rows: Rows covered when the index was last trained.
+        - train_distance: Mean squared distance of the training sample to
+          its nearest coarse centroid, None for indexes without centroids.
+        - num_deleted: Number of tombstoned ids.
+        - drift: Result of the last drift check, None before the first.
+    """
+    path = index_state_path(file_path)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+
+    with open(tmp_path, "w") as f:
+        json.dump({"format_version": INDEX_STATE_VERSION, **state}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_tombstones(file_path: Path) -> np.ndarray:
+    """
+    Read the ids deleted from an index, empty if there are none.
+    """
+    path = tombstones_path(file_path)
+    if not path.exists():
+        return np.empty(0, dtype=np.int64)
+    return np.load(path)
+
+
+def save_tombstones(file_path: Path, ids: np.ndarray) -> None:
+    path = tombstones_path(file_path)
+    tmp_path = path.with_name(f"{path.stem}.tmp.npy")
+
+    np.save(tmp_path, np.unique(np.asarray(ids, dtype=np.int64)))
+    os.replace(tmp_path, path)
+
+
+def read_delete_ids(ids_path: Path) -> np.ndarray:
+    """
+    Read row ids to delete from a .npy array or a text file with one id per
+    line.
+    """
+    if ids_path.suffix == ".npy":
+        return np.load(ids_path).astype(np.int64).reshape(-1)
+    return np.loadtxt(ids_path, dtype=np.int64, ndmin=1)
+
+
+def coarse_distance(index: faiss.Index, vectors: np.ndarray) -> Optional[float]:
+    """
+    Mean squared distance of normalized vectors to their nearest coarse
+    centroid, after the index's pre-transforms such as OPQ.
+
+    It grows when the data moves away from what the centroids were trained
+    on, which is what makes a retrain worthwhile.
+
+    Args:
+        index (faiss.Index): Trained index.
+        vectors (np.ndarray): Normalized float32 vectors.
+
+    Returns:
+        float: Mean distance, None for indexes without coarse centroids.
+    """
+    index_ivf = faiss.try_extract_index_ivf(index)
+    if index_ivf is None or len(vectors) == 0:
+        return None
+
+    if isinstance(index, faiss.IndexPreTransform):
+        for position in range(index.chain.size()):
+            vectors = index.chain.at(position).apply(vectors)
+
+    distances, _ = index_ivf.quantizer.search(np.ascontiguousarray(vectors), 1)
+    return float(distances.mean())
@@ -0,0 +1,249 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from multimodalexplorer.types.data_types import DataFileType, DataSetType
+from multimodalexplorer.utils.helpers import file_sha256
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class ShardManifest:
+    def __init__(
+        self, embed_file: DataFileType, raw_data_file: Optional[DataFileType] = None
+    ):
+        """
+        Record of the embedding and raw data shards written by ProcessDataset.
+
+        The manifest lives next to the embedding shards. A shard is only
+        considered written once its entry is in the manifest, which is saved
+        after both shard files are on disk. Shards are listed in global row
+        order: raw data row i and embedding row i are row i of the
+        concatenation of the listed shards.
+
+        Args:
+            embed_file (DataFileType): Directory and extension of the embeddings.
+            raw_data_file (DataFileType): Directory and extension of the raw data.
+                Only needed to verify or write shards.
+        """
+        self.embed_dir = Path(embed_file["dir"]).absolute()
+        self.raw_dir = (
+            Path(raw_data_file["dir"]).absolute() if raw_data_file is not None else None
+        )
+        self.path = self.embed_dir / MANIFEST_FILE_NAME
+
+        self.datasets: List[Dict[str, Any]] = []
+        self.shards: List[Dict[str, Any]] = []
+
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                manifest = json.load(f)
+            self.datasets = manifest["datasets"]
+            self.shards = manifest["shards"]
+
+    @classmethod
+    def load(
+        cls, embed_file: DataFileType, raw_data_file: Optional[DataFileType] = None
+    ) -> Optional["ShardManifest"]:
+        """
+        Load the manifest of an embeddings directory, None if there is none.
+        """
+        manifest = cls(embed_file, raw_data_file)
+        return manifest if manifest.path.exists() else None
+
+    @property
+    def num_rows(self) -> int:
+        return self.shards[-1]["row_end"] if self.shards else 0
+
+    def save(self) -> None:
+        """
+        Write the manifest atomically.
+        """
+        self.embed_dir.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "version": MANIFEST_VERSION,
+                    "datasets": self.datasets,
+                    "shards": self.shards,
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, self.path)
+
+    def dataset(self, dataset_type: str) -> Optional[Dict[str, Any]]:
+        for entry in self.datasets:
+            if entry["type"] == dataset_type:
+                return entry
+        return None
+
+    def dataset_shards(self, dataset_type: str) -> List[Dict[str, Any]]:
+        return [shard for shard in self.shards if shard["media_type"] == dataset_type]
+
+    def resume_point(self, dataset_type: str) -> Tuple[int, int]:
+        """
+        Where processing of a dataset continues.
+
+        Returns:
+            tuple: Next shard number and number of source rows already consumed.
+        """
+        shards = self.dataset_shards(dataset_type)
+        return len(shards), shards[-1]["source_end"] if shards else 0
+
+    def _truncate(self, shard_position: int, dataset_position: int) -> None:
+        """
+        Drop shards from `shard_position` and datasets from `dataset_position`
+        on. Kept datasets that lost shards are marked as incomplete.
+        """
+        dropped = self.shards[shard_position:]
+        if dropped:
+            logger.warning(
+                f"Discarding {len(dropped)} shards starting at row "
+                f"{dropped[0]['row_start']}"
+            )
+
+        dropped_types = {shard["media_type"] for shard in dropped}
+        self.shards = self.shards[:shard_position]
+        self.datasets = self.datasets[:dataset_position]
+
+        for entry in self.datasets:
+            if entry["type"] in dropped_types:
+                entry["complete"] = False
+
+    def reconcile(self, datasets: List[DataSetType], params: Dict[str, Any]) -> None:
+        """
+        Keep the longest prefix of recorded datasets matching the configuration.
+
+        Appending a dataset to the configuration keeps every earlier shard.
+        Changing or reordering a dataset, or the processing parameters,
+        discards its shards and every shard after it, because their rows
+        would no longer line up.
+
+        Args:
+            datasets (list): Configured datasets, in processing order.
+            params (dict): Parameters that determine the shard contents.
+        """
+        keep = 0
+        for configured, recorded in zip(datasets, self.datasets):
+            if (
+                recorded["type"] != configured["type"]
+                or recorded["name"] != configured["name"]
+                or recorded["source_lang"] != configured["source_lang"]
+                or recorded["params"] != params
+            ):
+                break
+            keep += 1
+
+        shard_position = len(self.shards)
+        if keep < len(self.datasets):
+            dropped_types = {entry["type"] for entry in self.datasets[keep:]}
+            shard_position = next(
+                (
+                    position
+                    for position, shard in enumerate(self.shards)
+                    if shard["media_type"] in dropped_types
+                ),
+                len(self.shards),
+            )
+            self._truncate(shard_position, keep)
+
+        for configured in datasets[keep:]:
+            self.datasets.append(
+                {
+                    "type": configured["type"],
+                    "name": configured["name"],
+                    "source_lang": configured["source_lang"],
+                    "params": params,
+                    "complete": False,
+                }
+            )
+
+        self.save()
+
+    def verify(self) -> None:
+        """
+        Check that every recorded shard is on disk with its recorded checksum.
+        The first bad shard and everything after it are discarded.
+        """
+        for position, shard in enumerate(self.shards):
+            embed_path = self.embed_dir / shard["embed_file"]
+            raw_path = self.raw_dir / shard["raw_file"]
+
+            valid = (
+                embed_path.exists()
+                and raw_path.exists()
+                and file_sha256(embed_path) == shard["embed_sha256"]
+                and file_sha256(raw_path) == shard["raw_sha256"]
+            )
+            if not valid:
+                logger.warning(f"Shard {shard['embed_file']} is missing or corrupt")
+
+                dataset_position = next(
+                    i
+                    for i, entry in enumerate(self.datasets)
+                    if entry["type"] == shard["media_type"]
+                )
+                self._truncate(position, dataset_position + 1)
+                self.save()
+                return
+
+    def add_shard(
+        self,
+        dataset_type: str,
+        shard: int,
+        source_range: Tuple[int, int],
+        count: int,
+        embed_path: Path,
+        raw_path: Path,
+    ) -> Dict[str, Any]:
+        """
+        Record a fully written shard and save the manifest.
+
+        Args:
+            dataset_type (str): Media type of the shard.
+            shard (int): Shard number within its dataset.
+            source_range (tuple): Source dataset rows consumed by the shard.
+            count (int): Number of rows in both shard files.
+            embed_path (Path): Embeddings shard file.
+            raw_path (Path): Raw data shard file.
+
+        Returns:
+            dict: Manifest entry of the shard.
+        """
+        row_start = self.num_rows
+        entry = {
+            "media_type": dataset_type,
+            "shard": shard,
+            "source_start": source_range[0],
+            "source_end": source_range[1],
+            "row_start": row_start,
+            "row_end": row_start + count,
+            "count": count,
+            "embed_file": embed_path.name,
+            "embed_sha256": file_sha256(embed_path),
+            "raw_file": raw_path.name,
+            "raw_sha256": file_sha256(raw_path),
+        }
+        self.shards.append(entry)
+        self.save()
+
+        return entry
+
+    def mark_complete(self, dataset_type: str) -> None:
+        self.dataset(dataset_type)["complete"] = True
+        self.save()
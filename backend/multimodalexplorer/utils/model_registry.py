@@ -0,0 +1,258 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import gc
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import torch
+
+from multimodalexplorer.utils.helpers import MODEL_IDS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Sample rate of the speech encoders
+WARMUP_SAMPLE_RATE = 16000
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        loader: Callable[[str], Any],
+        preload: Optional[List[str]] = None,
+        warmup: bool = True,
+        intra_op_threads: Optional[Dict[str, Optional[int]]] = None,
+        inter_op_threads: Optional[int] = None,
+        idle_evict_seconds: Optional[float] = None,
+    ):
+        """
+        Keep the encoder pipelines of the API process: preload them in the
+        background, load each at most once, warm them up and evict the ones
+        that are not used.
+
+        Args:
+            loader (Callable): Creates the pipeline of a dataset type, None
+                for types without a model.
+            preload (list): Dataset types loaded at startup; the registry is
+                ready once they all are.
+            warmup (bool): Run one forward pass after loading, so the first
+                request does not pay for lazy initialization.
+            intra_op_threads (dict): Torch intra-op threads set before every
+                forward pass of a dataset type, None keeps the current value.
+            inter_op_threads (int): Torch inter-op threads, set once for the
+                process before any model runs.
+            idle_evict_seconds (float): Evict models that are not preloaded
+                after this long without use. None disables it.
+        """
+        self.loader = loader
+        self.preload = list(preload or [])
+        self.warmup = warmup
+        self.intra_op_threads = intra_op_threads or {}
+        self.inter_op_threads = inter_op_threads
+        self.idle_evict_seconds = idle_evict_seconds
+
+        self._models: Dict[str, Any] = {}
+        self._status: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {
+            dataset_type: threading.Lock() for dataset_type in MODEL_IDS
+        }
+
+        self._stop_event = threading.Event()
+        self._preloader: Optional[threading.Thread] = None
+        self._evictor: Optional[threading.Thread] = None
+
+    def _warm_up(self, dataset_type: str, model: Any) -> None:
+        if dataset_type == "text":
+            model.predict(["warm up"], source_lang="eng_Latn")
+        elif dataset_type == "audio":
+            model.predict([torch.zeros(1, WARMUP_SAMPLE_RATE)])
+
+    def _load(self, dataset_type: str) -> Any:
+        status = self._status.setdefault(dataset_type, {})
+        status.update({"state": "loading", "error": None})
+
+        try:
+            start = time.perf_counter()
+            model = self.loader(dataset_type)
+            status["load_seconds"] = time.perf_counter() - start
+
+            if model is not None and self.warmup:
+                start = time.perf_counter()
+                self._apply_threads(dataset_type)
+                self._warm_up(dataset_type, model)
+                status["warmup_seconds"] = time.perf_counter() - start
+        except Exception as e:
+            status.update({"state": "failed", "error": str(e)})
+            raise
+
+        status.update({"state": "ready", "last_used": time.time()})
+        logger.info(
+            f"Loaded {dataset_type} model in {status['load_seconds']:.2f}s, "
+            f"warm-up {status.get('warmup_seconds', 0.0):.2f}s"
+        )
+        return model
+
+    def get(self, dataset_type: str) -> Any:
+        """
+        Pipeline of a dataset type, loaded on first use. Concurrent first
+        requests wait for a single load.
+
+        Args:
+            dataset_type (str): Type of dataset.
+
+        Returns:
+            Any: Loaded model pipeline, None for types without a model.
+        """
+        if dataset_type not in self._locks:
+            return self.loader(dataset_type)
+
+        model = self._models.get(dataset_type)
+        if model is None:
+            with self._locks[dataset_type]:
+                model = self._models.get(dataset_type)
+                if model is None:
+                    model = self._load(dataset_type)
+                    self._models[dataset_type] = model
+
+        self._status[dataset_type]["last_used"] = time.time()
+        return model
+
+    def _apply_threads(self, dataset_type: str) -> None:
+        threads = self.intra_op_threads.get(dataset_type)
+        # The setting is process-wide, only change it when it differs
+        if threads and torch.get_num_threads() != threads:
+            torch.set_num_threads(threads)
+
+    def predict(self, dataset_type: str, inputs: List[Any], **kwargs) -> torch.Tensor:
+        """
+        Encode inputs with the pipeline of a dataset type, within its thread
+        budget.
+
+        Args:
+            dataset_type (str): Type of dataset.
+            inputs (list): Inputs of the pipeline.
+            **kwargs: Pipeline arguments such as source_lang.
+
+        Returns:
+            torch.Tensor: Embeddings, one row per input.
+        """
+        model = self.get(dataset_type)
+        if model is None:
+            raise ValueError(f"No pipeline available for search type '{dataset_type}'")
+
+        self._apply_threads(dataset_type)
+        return model.predict(inputs, **kwargs)
+
+    def evict(self, dataset_type: str) -> bool:
+        """
+        Release the pipeline of a dataset type; it is loaded again on next use.
+        Requests already holding it finish normally.
+
+        Returns:
+            bool: Whether a model was loaded.
+        """
+        if dataset_type not in self._locks:
+            return False
+
+        with self._locks[dataset_type]:
+            model = self._models.pop(dataset_type, None)
+            if model is None:
+                return False
+            self._status[dataset_type]["state"] = "evicted"
+
+        del model
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+        logger.info(f"Evicted {dataset_type} model")
+        return True
+
+    def _preload(self) -> None:
+        for dataset_type in self.preload:
+            if self._stop_event.is_set():
+                return
+            try:
+                self.get(dataset_type)
+            except Exception as e:
+                logger.exception(f"Failed to preload {dataset_type} model: {e}")
+
+    def _evict_idle(self) -> None:
+        while not self._stop_event.wait(min(self.idle_evict_seconds, 60)):
+            now = time.time()
+            for dataset_type in list(self._models):
+                last_used = self._status[dataset_type].get("last_used", now)
+                if (
+                    dataset_type not in self.preload
+                    and now - last_used > self.idle_evict_seconds
+                ):
+                    self.evict(dataset_type)
+
+    def start(self) -> None:
+        """
+        Preload the configured models in the background and start evicting
+        idle ones.
+        """
+        if self.inter_op_threads:
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError as e:
+                logger.warning(f"Could not set inter-op threads: {e}")
+
+        self._stop_event.clear()
+
+        if self.preload and self._preloader is None:
+            self._preloader = threading.Thread(
+                target=self._preload, name="model-preloader", daemon=True
+            )
+            self._preloader.start()
+
+        if self.idle_evict_seconds and self._evictor is None:
+            self._evictor = threading.Thread(
+                target=self._evict_idle, name="model-evictor", daemon=True
+            )
+            self._evictor.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background threads. A model being loaded finishes loading.
+        """
+        self._stop_event.set()
+        for thread in (self._preloader, self._evictor):
+            if thread is not None:
+                thread.join()
+        self._preloader = None
+        self._evictor = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether every preloaded model is loaded and warmed up.
+        """
+        return all(dataset_type in self._models for dataset_type in self.preload)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Report readiness and the state of every model.
+
+        Returns:
+            dict: Readiness, preloaded types and per-model state, load and
+                warm-up times.
+        """
+        return {
+            "ready": self.ready,
+            "preload": self.preload,
+            "models": {
+                dataset_type: {
+                    "loaded": dataset_type in self._models,
+                    **self._status.get(dataset_type, {"state": "unloaded"}),
+                }
+                for dataset_type in MODEL_IDS
+            },
+        }
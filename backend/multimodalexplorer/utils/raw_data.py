@@ -0,0 +1,147 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+from pathlib import Path
+from typing import Any, List, Optional, Sequence, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from multimodalexplorer.types.data_types import DataFileType, EmbeddingDataType
+from multimodalexplorer.utils.helpers import get_file_path
+from multimodalexplorer.utils.shards import ordered_shard_files
+
+LEGACY_RAW_DATA_EXT = "tsv"
+
+RAW_DATA_SCHEMA = pa.schema([("data", pa.string()), ("media_type", pa.string())])
+
+
+def raw_shard_name(dataset_type: str, file_count: Union[int, str]) -> str:
+    """
+    File name of the raw data shard matching `{type}_embedding_{n}`.
+    """
+    return f"{dataset_type}_raw_{file_count}"
+
+
+def write_raw_shard(
+    file_path: Path, data_list: List[Any], dataset_type: str
+) -> pa.Table:
+    """
+    Write one shard of raw data as an uncompressed Arrow IPC file, which can
+    be memory-mapped without copying.
+
+    Args:
+        file_path (Path): Destination file.
+        data_list (list): Raw data rows.
+        dataset_type (str): Media type of every row.
+
+    Returns:
+        pa.Table: Written table.
+    """
+    table = pa.table(
+        {
+            "data": [str(data_row) for data_row in data_list],
+            "media_type": [dataset_type] * len(data_list),
+        },
+        schema=RAW_DATA_SCHEMA,
+    )
+
+    with pa.OSFile(str(file_path), "wb") as sink:
+        with pa.ipc.new_file(sink, RAW_DATA_SCHEMA) as writer:
+            writer.write_table(table)
+
+    return table
+
+
+def open_raw_shard(file_path: Path) -> pa.Table:
+    """
+    Memory-map one Arrow IPC raw data shard.
+    """
+    return pa.ipc.open_file(pa.memory_map(str(file_path), "r")).read_all()
+
+
+def read_legacy_raw_data(file_path: Path) -> pa.Table:
+    """
+    Parse a raw data TSV written by earlier versions of ProcessDataset.
+    """
+    return pa_csv.read_csv(file_path, parse_options=pa_csv.ParseOptions(delimiter="\t"))
+
+
+def open_raw_data(
+    raw_data_file: DataFileType, embed_file: Optional[DataFileType] = None
+) -> pa.Table:
+    """
+    Open the raw data store.
+
+    Arrow shards are memory-mapped and concatenated without copying, so a
+    lookup only touches the pages of the rows it reads. Legacy TSV files are
+    still parsed into memory.
+
+    Args:
+        raw_data_file (DataFileType): Directory and extension of the raw data.
+        embed_file (DataFileType): Directory and extension of the embeddings,
+            whose shard manifest orders the raw data shards when present.
+
+    Returns:
+        pa.Table: Raw data rows in embedding order.
+    """
+    dir_path, ext = raw_data_file["dir"], raw_data_file["ext"]
+
+    if ext == LEGACY_RAW_DATA_EXT:
+        return read_legacy_raw_data(get_file_path(dir_path, ext, False))
+
+    files = ordered_shard_files(raw_data_file, embed_file)
+    if not files:
+        raise FileNotFoundError(f"No raw data shards with extension '{ext}' found.")
+
+    return pa.concat_tables([open_raw_shard(file_path) for file_path in files])
+
+
+def validate_row_indices(indices: Sequence[int], num_rows: int) -> np.ndarray:
+    """
+    Convert requested row indices to an int64 array and check their range.
+
+    Args:
+        indices (Sequence[int]): Requested row indices.
+        num_rows (int): Number of rows in the raw data table.
+
+    Returns:
+        np.ndarray: Row indices as int64.
+    """
+    idxs = np.asarray(indices, dtype=np.int64).reshape(-1)
+
+    out_of_range = (idxs < 0) | (idxs >= num_rows)
+    if out_of_range.any():
+        bad = idxs[out_of_range][:10].tolist()
+        raise IndexError(
+            f"Row indices out of range for {num_rows} rows: {bad}"
+            f"{'...' if out_of_range.sum() > 10 else ''}"
+        )
+
+    return idxs
+
+
+def take_rows(data_table: pa.Table, indices: Sequence[int]) -> List[EmbeddingDataType]:
+    """
+    Gather raw data rows with a single columnar take.
+
+    Args:
+        data_table (pa.Table): Raw data table with data and media_type columns.
+        indices (Sequence[int]): Requested row indices.
+
+    Returns:
+        list: Rows in request order, duplicates included.
+    """
+    idxs = validate_row_indices(indices, data_table.num_rows)
+
+    rows = data_table.select(["data", "media_type"]).take(pa.array(idxs))
+    data = rows.column("data").to_pylist()
+    media_types = rows.column("media_type").to_pylist()
+
+    return [
+        {"index": idx, "data": value, "media_type": media_type}
+        for idx, value, media_type in zip(idxs.tolist(), data, media_types)
+    ]
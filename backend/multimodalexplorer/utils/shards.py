@@ -0,0 +1,276 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from multimodalexplorer.types.data_types import DataFileType
+from multimodalexplorer.utils.embedding_store import (
+    open_embedding_shard,
+    read_shard_info,
+)
+from multimodalexplorer.utils.helpers import list_dir_files
+from multimodalexplorer.utils.manifest import ShardManifest
+
+SHARD_NAME_PATTERN = re.compile(
+    r"^(?P<type>.+)_(?P<kind>embedding|raw)_(?P<shard>\d+)$"
+)
+
+
+def _parse_shard_name(file_path: Path) -> Tuple[str, int]:
+    match = SHARD_NAME_PATTERN.match(file_path.stem)
+    if match is None:
+        raise ValueError(
+            f"'{file_path.name}' is not named like '{{type}}_embedding_{{n}}' "
+            "or '{type}_raw_{n}'."
+        )
+    return match["type"], int(match["shard"])
+
+
+def order_shard_files(files: List[Path]) -> List[Path]:
+    """
+    Order shard files without a manifest.
+
+    Shards are ordered by dataset type name, then by the shard number in
+    their name. Only names are used, so raw data and embedding shards get the
+    same order, which copying or restoring files does not change.
+
+    Args:
+        files (list): Shard files named `{type}_embedding_{n}` or `{type}_raw_{n}`.
+
+    Returns:
+        list: Files in global row order.
+    """
+    parsed = [(file_path, *_parse_shard_name(file_path)) for file_path in files]
+    parsed.sort(key=lambda item: (item[1], item[2]))
+    return [file_path for file_path, _, _ in parsed]
+
+
+def ordered_shard_files(
+    file_info: DataFileType, embed_file: Optional[DataFileType] = None
+) -> List[Path]:
+    """
+    List embedding or raw data shards in global row order.
+
+    The shard manifest of `embed_file` is authoritative when there is one, so
+    that raw data row i and embedding row i always refer to the same sample.
+    Without a manifest shards are ordered by their names.
+
+    Args:
+        file_info (DataFileType): Directory and extension of the shards to list.
+        embed_file (DataFileType): Directory and extension of the embeddings,
+            whose manifest defines the order. Defaults to `file_info`.
+
+    Returns:
+        list: Shard files in global row order.
+    """
+    manifest = ShardManifest.load(embed_file or file_info)
+    dir_path = Path(file_info["dir"]).absolute()
+
+    if manifest is not None and manifest.shards:
+        key = "embed_file" if dir_path == manifest.embed_dir else "raw_file"
+        return [dir_path / shard[key] for shard in manifest.shards]
+
+    if not dir_path.is_dir():
+        return []
+
+    return order_shard_files(list_dir_files(str(dir_path), file_info["ext"]))
+
+
+class ShardReader:
+    def __init__(self, embed_file: DataFileType):
+        """
+        Read embedding shards in global row order without concatenating them
+        in memory.
+
+        Args:
+            embed_file (DataFileType): Directory and extension of the embeddings.
+        """
+        self.embed_file = embed_file
+        self.files = ordered_shard_files(embed_file)
+        if not self.files:
+            raise FileNotFoundError(
+                f"No embedding shards with extension '{embed_file['ext']}' "
+                f"found in '{embed_file['dir']}'."
+            )
+
+        manifest = ShardManifest.load(embed_file)
+        has_manifest = manifest is not None and bool(manifest.shards)
+        self._counts: Optional[List[int]] = (
+            [shard["count"] for shard in manifest.shards] if has_manifest else None
+        )
+        self.media_types: List[str] = (
+            [shard["media_type"] for shard in manifest.shards]
+            if has_manifest
+            else [_parse_shard_name(file_path)[0] for file_path in self.files]
+        )
+        self._dim: Optional[int] = None
+        self._offsets: Optional[np.ndarray] = None
+        self._open_shards: Dict[int, np.ndarray] = {}
+
+    def _read_shapes(self) -> None:
+        counts = []
+        for file_path in self.files:
+            info = read_shard_info(file_path)
+            if info is not None:
+                counts.append(info["count"])
+                self._dim = info["dim"]
+            else:
+                shape = open_embedding_shard(file_path).shape
+                counts.append(shape[0])
+                self._dim = shape[1]
+        self._counts = counts
+
+    def _shard(self, position: int) -> np.ndarray:
+        # Memory-mapped shards are cheap to keep open for random access
+        if position not in self._open_shards:
+            self._open_shards[position] = open_embedding_shard(self.files[position])
+        return self._open_shards[position]
+
+    @property
+    def counts(self) -> List[int]:
+        """
+        Number of rows of every shard.
+        """
+        if self._counts is None:
+            self._read_shapes()
+        return self._counts
+
+    def rows_by_media_type(self) -> Dict[str, np.ndarray]:
+        """
+        Global row indices of every media type, in row order.
+        """
+        offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+        ranges: Dict[str, List[np.ndarray]] = {}
+        for position, media_type in enumerate(self.media_types):
+            ranges.setdefault(media_type, []).append(
+                np.arange(offsets[position], offsets[position + 1], dtype=np.int64)
+            )
+        return {media_type: np.concatenate(rows) for media_type, rows in ranges.items()}
+
+    @property
+    def num_rows(self) -> int:
+        return sum(self.counts)
+
+    @property
+    def dim(self) -> int:
+        if self._dim is None:
+            info = read_shard_info(self.files[0])
+            self._dim = (
+                info["dim"]
+                if info is not None
+                else open_embedding_shard(self.files[0]).shape[1]
+            )
+        return self._dim
+
+    @property
+    def model_ids(self) -> Set[Optional[str]]:
+        """
+        Models recorded in the shard sidecars; None for shards without one.
+        """
+        return {
+            (read_shard_info(file_path) or {}).get("model_id")
+            for file_path in self.files
+        }
+
+    def iter_chunks(
+        self, chunk_rows: Optional[int] = None, start_row: int = 0
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Stream the embeddings one shard, or one chunk of a shard, at a time.
+
+        Chunks are float32 views of a float32 shard, or float32 copies of a
+        float16 one; copy them to keep them beyond the next iteration.
+
+        Args:
+            chunk_rows (int): Maximum rows per chunk, None yields whole shards.
+            start_row (int): First global row to yield; shards before it are
+                not opened.
+
+        Yields:
+            tuple: Global row index of the first row and the chunk.
+        """
+        row_start = 0
+        for file_path, count in zip(self.files, self.counts):
+            if row_start + count <= start_row:
+                row_start += count
+                continue
+
+            shard = open_embedding_shard(file_path)
+
+            step = chunk_rows or max(1, shard.shape[0])
+            for offset in range(max(0, start_row - row_start), shard.shape[0], step):
+                chunk = shard[offset : offset + step]
+                yield row_start + offset, chunk.astype(np.float32, copy=False)
+
+            row_start += shard.shape[0]
+
+    def read_into(self, out: np.ndarray) -> np.ndarray:
+        """
+        Fill a preallocated (num_rows, dim) array with every embedding.
+        """
+        if out.shape != (self.num_rows, self.dim):
+            raise ValueError(
+                f"Expected an array of shape {(self.num_rows, self.dim)}, "
+                f"got {out.shape}."
+            )
+
+        for row_start, chunk in self.iter_chunks():
+            out[row_start : row_start + chunk.shape[0]] = chunk
+
+        return out
+
+    def read_all(self, mmap_path: Optional[Path] = None) -> np.ndarray:
+        """
+        Load every embedding into a single float32 matrix.
+
+        Args:
+            mmap_path (Path): Fill a memory-mapped .npy file at this path
+                instead of an in-memory array.
+
+        Returns:
+            np.ndarray: Embeddings of shape (num_rows, dim).
+        """
+        shape = (self.num_rows, self.dim)
+
+        if mmap_path is not None:
+            out = np.lib.format.open_memmap(
+                mmap_path, mode="w+", dtype=np.float32, shape=shape
+            )
+        else:
+            out = np.empty(shape, dtype=np.float32)
+
+        return self.read_into(out)
+
+    def take(self, indices: Sequence[int]) -> np.ndarray:
+        """
+        Gather rows by global index, reading only the pages they live on.
+
+        Args:
+            indices (Sequence[int]): Global row indices.
+
+        Returns:
+            np.ndarray: float32 rows in request order.
+        """
+        idxs = np.asarray(indices, dtype=np.int64).reshape(-1)
+        if idxs.size and (idxs.min() < 0 or idxs.max() >= self.num_rows):
+            raise IndexError(f"Row indices out of range for {self.num_rows} rows")
+
+        if self._offsets is None:
+            self._offsets = np.cumsum([0] + self.counts)
+
+        out = np.empty((idxs.size, self.dim), dtype=np.float32)
+        positions = np.searchsorted(self._offsets, idxs, side="right") - 1
+
+        for position in np.unique(positions):
+            selected = positions == position
+            local = idxs[selected] - self._offsets[position]
+            out[selected] = self._shard(int(position))[local]
+
+        return out
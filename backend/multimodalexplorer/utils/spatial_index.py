@@ -0,0 +1,130 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import logging
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Rect = Tuple[float, float, float, float]
+
+
+def points_in_polygon(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """
+    Even-odd rule test of points against a closed polygon.
+
+    Args:
+        points (np.ndarray): Points, shape (n, 2).
+        polygon (np.ndarray): Vertices, shape (m, 2), without repeating the first.
+
+    Returns:
+        np.ndarray: Boolean mask of the points inside the polygon.
+    """
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+
+    for (x1, y1), (x2, y2) in zip(polygon, np.roll(polygon, -1, axis=0)):
+        crosses = (y1 > y) != (y2 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+        inside ^= crosses & (x < x_cross)
+
+    return inside
+
+
+class SpatialIndex:
+    def __init__(self, embeddings: np.ndarray):
+        """
+        KD-tree over the 2-D UMAP projection for viewport, lasso and
+        nearest-point queries. Ids are rows of the UMAP array, the ids
+        get_embeddings_details takes.
+
+        Args:
+            embeddings (np.ndarray): UMAP rows of (x, y, ..., cluster).
+        """
+        self.coords = np.ascontiguousarray(embeddings[:, :2], dtype=np.float64)
+        self.clusters = np.asarray(embeddings[:, -1], dtype=np.int64)
+        self.tree = cKDTree(self.coords)
+
+        logger.info(f"Built spatial index over {len(self.coords)} points")
+
+    def _in_box(self, rect: Rect) -> np.ndarray:
+        x_min, y_min, x_max, y_max = rect
+        if x_min > x_max or y_min > y_max:
+            raise ValueError(f"Empty rectangle: {rect}")
+
+        # A Chebyshev ball is a square, the smallest one covering the box
+        center = [(x_min + x_max) / 2, (y_min + y_max) / 2]
+        radius = max(x_max - x_min, y_max - y_min) / 2
+        ids = np.asarray(self.tree.query_ball_point(center, radius, p=np.inf))
+        if len(ids) == 0:
+            return ids.astype(np.int64)
+
+        coords = self.coords[ids]
+        inside = (
+            (coords[:, 0] >= x_min)
+            & (coords[:, 0] <= x_max)
+            & (coords[:, 1] >= y_min)
+            & (coords[:, 1] <= y_max)
+        )
+        return ids[inside]
+
+    def select(
+        self,
+        rect: Optional[Rect] = None,
+        polygon: Optional[Sequence[Sequence[float]]] = None,
+    ) -> np.ndarray:
+        """
+        Ids of the points inside a rectangle or a polygon, in ascending order
+        so that pages of a selection are stable.
+
+        Args:
+            rect (tuple): x_min, y_min, x_max, y_max.
+            polygon (list): Vertices of a lasso, at least three (x, y) pairs.
+
+        Returns:
+            np.ndarray: Sorted ids.
+        """
+        if (rect is None) == (polygon is None):
+            raise ValueError("Select points with exactly one of rect or polygon.")
+
+        if polygon is not None:
+            polygon = np.asarray(polygon, dtype=np.float64)
+            if polygon.ndim != 2 or polygon.shape[1] != 2 or len(polygon) < 3:
+                raise ValueError("A polygon needs at least three (x, y) vertices.")
+
+            x_min, y_min = polygon.min(axis=0)
+            x_max, y_max = polygon.max(axis=0)
+            ids = self._in_box((x_min, y_min, x_max, y_max))
+            ids = ids[points_in_polygon(self.coords[ids], polygon)]
+        else:
+            ids = self._in_box(rect)
+
+        return np.sort(ids)
+
+    def nearest(self, x: float, y: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k projected points closest to (x, y).
+
+        Returns:
+            tuple: Ids and Euclidean distances, closest first.
+        """
+        k = min(k, len(self.coords))
+        distances, ids = self.tree.query([x, y], k=k)
+        return np.atleast_1d(ids), np.atleast_1d(distances)
+
+    def cluster_counts(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Number of selected points per cluster.
+
+        Returns:
+            tuple: Cluster labels present in the selection and their counts.
+        """
+        return np.unique(self.clusters[ids], return_counts=True)
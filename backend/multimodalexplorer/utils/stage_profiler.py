@@ -0,0 +1,65 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import logging
+import resource
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def peak_rss_bytes() -> int:
+    """
+    High-water mark of the resident memory of this process.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageProfiler:
+    def __init__(self, name: str):
+        """
+        Record the wall time and peak memory of the stages of a job.
+
+        The peak is the process high-water mark when a stage ends, so the
+        stage that raised it is the one that needed the memory.
+
+        Args:
+            name (str): Name of the job, used in the log.
+        """
+        self.name = name
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        peak_before = peak_rss_bytes()
+        start = time.perf_counter()
+        yield
+        peak_after = peak_rss_bytes()
+
+        self.stages.append(
+            {
+                "stage": name,
+                "seconds": time.perf_counter() - start,
+                "peak_rss_mb": peak_after / 2**20,
+                "peak_increase_mb": (peak_after - peak_before) / 2**20,
+            }
+        )
+
+    def log(self) -> None:
+        logger.info(
+            f"{self.name}: {'stage':>14} {'seconds':>9} {'peak MB':>9} {'+MB':>8}"
+        )
+        for stage in self.stages:
+            logger.info(
+                f"{self.name}: {stage['stage']:>14} {stage['seconds']:>9.2f} "
+                f"{stage['peak_rss_mb']:>9.0f} {stage['peak_increase_mb']:>8.0f}"
+            )
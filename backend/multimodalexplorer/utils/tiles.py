@@ -0,0 +1,384 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import logging
+import math
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TILES_FORMAT_VERSION = 1
+
+# Bounds of the normalized UMAP output
+TILE_BOUNDS = (-1.0, 1.0)
+
+# Deeper levels would only repeat the last one, which holds every point
+MAX_TILE_LEVEL = 10
+
+# Times a reader retries opening a pyramid that is replaced meanwhile
+OPEN_ATTEMPTS = 3
+
+POINT_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("cluster", "<i4"), ("row", "<i8")])
+CELL_DTYPE = np.dtype([("cell", "<i8"), ("count", "<i8"), ("cluster", "<i4")])
+
+Viewport = Tuple[float, float, float, float]
+
+
+def tiles_dir_path(umap_file_path: Path) -> Path:
+    """
+    Directory of the tile pyramid built from a UMAP output file.
+    """
+    return umap_file_path.with_name(f"{umap_file_path.stem}_tiles")
+
+
+def _grid_index(values: np.ndarray, size: int) -> np.ndarray:
+    # Points slightly outside the bounds, added incrementally, go to the edge
+    low, high = TILE_BOUNDS
+    index = np.floor((values - low) / (high - low) * size).astype(np.int64)
+    return np.clip(index, 0, size - 1)
+
+
+def _csr_offsets(sorted_keys: np.ndarray, num_keys: int) -> np.ndarray:
+    return np.searchsorted(sorted_keys, np.arange(num_keys + 1)).astype(np.int64)
+
+
+def _build_level_points(
+    coords: np.ndarray, clusters: np.ndarray, rows: np.ndarray, side: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sort the points of a level by tile, keeping their sample order inside
+    every tile, and index the tiles.
+    """
+    tiles = _grid_index(coords[rows, 1], side) * side + _grid_index(
+        coords[rows, 0], side
+    )
+    order = np.argsort(tiles, kind="stable")
+
+    points = np.empty(len(rows), dtype=POINT_DTYPE)
+    points["x"] = coords[rows[order], 0]
+    points["y"] = coords[rows[order], 1]
+    points["cluster"] = clusters[rows[order]]
+    points["row"] = rows[order]
+
+    return points, _csr_offsets(tiles[order], side * side)
+
+
+def _build_level_cells(
+    coords: np.ndarray, clusters: np.ndarray, side: int, cell_bins: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count every point per cell of a level and find the dominant cluster of
+    every non-empty cell. Cells are sorted by tile and indexed like points.
+    """
+    bins = side * cell_bins
+    cell_x = _grid_index(coords[:, 0], bins)
+    cell_y = _grid_index(coords[:, 1], bins)
+    num_clusters = int(clusters.max()) + 1
+
+    keys, counts = np.unique(
+        (cell_y * bins + cell_x) * num_clusters + clusters, return_counts=True
+    )
+    key_cells, key_clusters = keys // num_clusters, keys % num_clusters
+
+    # Keys are sorted by cell, so every cell is a contiguous segment
+    cells, starts = np.unique(key_cells, return_index=True)
+    totals = np.add.reduceat(counts, starts)
+
+    by_count = np.lexsort((-counts, key_cells))
+    _, firsts = np.unique(key_cells[by_count], return_index=True)
+    dominant = key_clusters[by_count][firsts]
+
+    tiles = (cells // bins // cell_bins) * side + (cells % bins) // cell_bins
+    order = np.argsort(tiles, kind="stable")
+
+    records = np.empty(len(cells), dtype=CELL_DTYPE)
+    records["cell"] = cells[order]
+    records["count"] = totals[order]
+    records["cluster"] = dominant[order]
+
+    return records, _csr_offsets(tiles[order], side * side)
+
+
+def build_tile_pyramid(
+    embeddings: np.ndarray,
+    tiles_dir: Path,
+    tile_points: int = 1024,
+    cell_bins: int = 16,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Precompute a grid pyramid over normalized (x, y, cluster) UMAP rows.
+
+    Level z splits [-1, 1]^2 into 2^z x 2^z tiles. It holds a random sample
+    of about `tile_points` points per tile on average, so point density is
+    preserved; the sample of a level contains the samples of the levels
+    above it, and the last level holds every point. Every level also keeps
+    per-cell counts and dominant clusters of all points, on a grid of
+    `cell_bins` x `cell_bins` cells per tile.
+
+    Points and cells are sorted by tile and written as .npy files with tile
+    offsets, so a viewport is served by slicing memory-mapped arrays. The
+    directory is replaced atomically.
+
+    Args:
+        embeddings (np.ndarray): Rows of (x, y, cluster).
+        tiles_dir (Path): Output directory.
+        tile_points (int): Average number of points per tile of a level.
+        cell_bins (int): Cells per tile side for the aggregates.
+        seed (int): Seed of the sample order. Rows keep their place in it
+            when rows are appended.
+
+    Returns:
+        dict: Metadata of the pyramid.
+    """
+    coords = np.asarray(embeddings[:, :2], dtype=np.float32)
+    clusters = np.asarray(embeddings[:, 2], dtype=np.int32)
+    num_points = len(coords)
+
+    num_levels = 1 + min(
+        MAX_TILE_LEVEL,
+        max(0, math.ceil(math.log(max(num_points, 1) / tile_points, 4))),
+    )
+
+    # Random rank of every row; the first values do not depend on num_points
+    sample_order = np.argsort(
+        np.random.default_rng(seed).random(num_points), kind="stable"
+    )
+
+    tmp_dir = tiles_dir.with_name(f"{tiles_dir.name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    levels = []
+    for level in range(num_levels):
+        side = 2**level
+        level_size = (
+            num_points
+            if level == num_levels - 1
+            else min(num_points, tile_points * side * side)
+        )
+
+        points, point_offsets = _build_level_points(
+            coords, clusters, sample_order[:level_size], side
+        )
+        cells, cell_offsets = _build_level_cells(coords, clusters, side, cell_bins)
+
+        np.save(tmp_dir / f"level_{level}_points.npy", points)
+        np.save(tmp_dir / f"level_{level}_point_offsets.npy", point_offsets)
+        np.save(tmp_dir / f"level_{level}_cells.npy", cells)
+        np.save(tmp_dir / f"level_{level}_cell_offsets.npy", cell_offsets)
+
+        levels.append({"level": level, "points": level_size, "cells": len(cells)})
+
+    meta = {
+        "format_version": TILES_FORMAT_VERSION,
+        "num_points": num_points,
+        "num_levels": num_levels,
+        "tile_points": tile_points,
+        "cell_bins": cell_bins,
+        "bounds": TILE_BOUNDS,
+        "levels": levels,
+        # Tells readers which build the level files they opened belong to
+        "build_id": uuid.uuid4().hex,
+    }
+    with open(tmp_dir / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    # Readers keep the files they mapped from the previous pyramid
+    old_dir = tiles_dir.with_name(f"{tiles_dir.name}.old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if tiles_dir.exists():
+        os.replace(tiles_dir, old_dir)
+    os.replace(tmp_dir, tiles_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    logger.info(f"Built {num_levels} tile levels for {num_points} points")
+    return meta
+
+
+class TilePyramid:
+    def __init__(self, tiles_dir: Path):
+        """
+        Serve viewports from a tile pyramid written by build_tile_pyramid.
+
+        Every level file is memory-mapped up front, so the pyramid keeps
+        serving the build it was opened on after the directory is replaced.
+        Opening is retried when a rebuild replaces it meanwhile.
+
+        Args:
+            tiles_dir (Path): Directory of the pyramid.
+        """
+        self.tiles_dir = tiles_dir
+
+        for attempt in range(OPEN_ATTEMPTS):
+            try:
+                self.meta = self._read_meta()
+                self._levels = {
+                    level: self._open_level(level)
+                    for level in range(self.meta["num_levels"])
+                }
+                if self._read_meta().get("build_id") == self.meta.get("build_id"):
+                    return
+            except FileNotFoundError:
+                if attempt == OPEN_ATTEMPTS - 1:
+                    raise
+
+        raise RuntimeError(f"Tiles in {tiles_dir} kept changing while being opened")
+
+    def _read_meta(self) -> Dict[str, Any]:
+        with open(self.tiles_dir / "meta.json", "r") as f:
+            return json.load(f)
+
+    def _open_level(self, level: int) -> Dict[str, np.ndarray]:
+        return {
+            name: np.load(self.tiles_dir / f"level_{level}_{name}.npy", mmap_mode="r")
+            for name in ("points", "point_offsets", "cells", "cell_offsets")
+        }
+
+    @property
+    def num_levels(self) -> int:
+        return self.meta["num_levels"]
+
+    def level_for_zoom(self, zoom: int) -> int:
+        """
+        Level serving a zoom; zooms past the last level are served by it.
+        """
+        if zoom < 0:
+            raise ValueError(f"Zoom must be >= 0, got {zoom}")
+        return min(zoom, self.num_levels - 1)
+
+    def _level(self, level: int) -> Dict[str, np.ndarray]:
+        return self._levels[level]
+
+    @staticmethod
+    def _check_viewport(viewport: Viewport) -> None:
+        x_min, y_min, x_max, y_max = viewport
+        if x_min > x_max or y_min > y_max:
+            raise ValueError(f"Empty viewport: {viewport}")
+
+    def _tile_slices(self, offsets: np.ndarray, side: int, viewport: Viewport):
+        # Tiles of one row of the viewport are contiguous
+        x_min, y_min, x_max, y_max = viewport
+        tile_x = _grid_index(np.array([x_min, x_max]), side)
+        tile_y = _grid_index(np.array([y_min, y_max]), side)
+
+        for row in range(tile_y[0], tile_y[1] + 1):
+            start = offsets[row * side + tile_x[0]]
+            end = offsets[row * side + tile_x[1] + 1]
+            if end > start:
+                yield slice(int(start), int(end))
+
+    def points(
+        self, viewport: Viewport, zoom: int, limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Points of a level inside a viewport.
+
+        Args:
+            viewport (tuple): x_min, y_min, x_max, y_max.
+            zoom (int): Zoom level.
+            limit (int): Maximum number of points; larger results are thinned
+                evenly across tiles, which preserves density.
+
+        Returns:
+            dict: Level, whether it holds every point, and the points.
+        """
+        self._check_viewport(viewport)
+        level = self.level_for_zoom(zoom)
+        arrays = self._level(level)
+        x_min, y_min, x_max, y_max = viewport
+
+        parts = []
+        for tile_slice in self._tile_slices(
+            arrays["point_offsets"], 2**level, viewport
+        ):
+            points = arrays["points"][tile_slice]
+            inside = (
+                (points["x"] >= x_min)
+                & (points["x"] <= x_max)
+                & (points["y"] >= y_min)
+                & (points["y"] <= y_max)
+            )
+            parts.append(points[inside])
+
+        points = np.concatenate(parts) if parts else arrays["points"][:0]
+        thinned = limit is not None and len(points) > limit
+        if thinned:
+            points = points[np.linspace(0, len(points) - 1, limit).astype(np.int64)]
+
+        return {
+            "level": level,
+            "complete": level == self.num_levels - 1 and not thinned,
+            "points": points,
+        }
+
+    def cells(
+        self, viewport: Viewport, zoom: int, limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Per-cell counts and dominant clusters of a level inside a viewport.
+
+        Args:
+            viewport (tuple): x_min, y_min, x_max, y_max.
+            zoom (int): Zoom level.
+            limit (int): Maximum number of cells; larger results fall back to
+                coarser levels, whose counts still cover every point.
+
+        Returns:
+            dict: Level, cell size, and the lower corner, count and dominant
+                cluster of every non-empty cell overlapping the viewport.
+        """
+        self._check_viewport(viewport)
+        level = self.level_for_zoom(zoom)
+
+        result = self._level_cells(viewport, level)
+        while limit is not None and len(result["count"]) > limit and level > 0:
+            level -= 1
+            result = self._level_cells(viewport, level)
+
+        return result
+
+    def _level_cells(self, viewport: Viewport, level: int) -> Dict[str, Any]:
+        arrays = self._level(level)
+
+        side = 2**level
+        bins = side * self.meta["cell_bins"]
+        low, high = TILE_BOUNDS
+        cell_size = (high - low) / bins
+
+        x_min, y_min, x_max, y_max = viewport
+        cell_x = _grid_index(np.array([x_min, x_max]), bins)
+        cell_y = _grid_index(np.array([y_min, y_max]), bins)
+
+        parts = []
+        for tile_slice in self._tile_slices(arrays["cell_offsets"], side, viewport):
+            cells = arrays["cells"][tile_slice]
+            x, y = cells["cell"] % bins, cells["cell"] // bins
+            inside = (
+                (x >= cell_x[0])
+                & (x <= cell_x[1])
+                & (y >= cell_y[0])
+                & (y <= cell_y[1])
+            )
+            parts.append(cells[inside])
+
+        cells = np.concatenate(parts) if parts else arrays["cells"][:0]
+        return {
+            "level": level,
+            "cell_size": cell_size,
+            "x": low + (cells["cell"] % bins) * cell_size,
+            "y": low + (cells["cell"] // bins) * cell_size,
+            "count": cells["count"],
+            "cluster": cells["cluster"],
+        }
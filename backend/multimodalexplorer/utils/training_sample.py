@@ -0,0 +1,154 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+
+from multimodalexplorer.utils.shards import ShardReader
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRAIN_SAMPLE_FORMAT_VERSION = 1
+
+
+def allocate_sample(group_sizes: Dict[str, int], sample_size: int) -> Dict[str, int]:
+    """
+    Split a sample evenly across groups. Groups smaller than their share are
+    taken whole and what they leave over goes to the larger groups, so a
+    minority media type gets as many training points as it can supply.
+
+    Args:
+        group_sizes (dict): Number of rows of every group.
+        sample_size (int): Total number of rows to sample.
+
+    Returns:
+        dict: Number of rows to sample from every group.
+    """
+    allocation = {group: 0 for group in group_sizes}
+    remaining = min(sample_size, sum(group_sizes.values()))
+
+    # Smallest groups first; ties fall back to the group name
+    pending = sorted(group_sizes, key=lambda group: (group_sizes[group], group))
+    while pending and group_sizes[pending[0]] <= remaining // len(pending):
+        group = pending.pop(0)
+        allocation[group] = group_sizes[group]
+        remaining -= group_sizes[group]
+
+    if pending:
+        share, extra = divmod(remaining, len(pending))
+        for position, group in enumerate(sorted(pending)):
+            allocation[group] = share + (1 if position < extra else 0)
+
+    return allocation
+
+
+def stratified_sample(
+    reader: ShardReader, sample_size: int, seed: int = 0, stratify: bool = True
+) -> np.ndarray:
+    """
+    Draw a reproducible sample of global rows, stratified by media type.
+
+    Args:
+        reader (ShardReader): Embeddings to sample from.
+        sample_size (int): Number of rows to sample. Every row is returned
+            when there are fewer.
+        seed (int): Seed of the sampler.
+        stratify (bool): Balance the sample across media types instead of
+            sampling rows uniformly.
+
+    Returns:
+        np.ndarray: Sorted global row indices.
+    """
+    if reader.num_rows <= sample_size:
+        logger.warning(
+            f"Only {reader.num_rows} embeddings for a training sample of "
+            f"{sample_size}, training on all of them"
+        )
+        return np.arange(reader.num_rows, dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    if not stratify:
+        return np.sort(rng.choice(reader.num_rows, size=sample_size, replace=False))
+
+    rows_by_type = reader.rows_by_media_type()
+    allocation = allocate_sample(
+        {media_type: len(rows) for media_type, rows in rows_by_type.items()},
+        sample_size,
+    )
+
+    # Draw in media type order so the sample only depends on the seed
+    sample = [
+        rng.choice(rows_by_type[media_type], size=allocation[media_type], replace=False)
+        for media_type in sorted(rows_by_type)
+    ]
+    logger.info(f"Training sample by media type: {allocation}")
+
+    return np.sort(np.concatenate(sample))
+
+
+def _sample_key(
+    reader: ShardReader, sample_size: int, seed: int, stratify: bool
+) -> Dict[str, Any]:
+    # A persisted sample is only reused for the same shards and settings
+    return {
+        "format_version": TRAIN_SAMPLE_FORMAT_VERSION,
+        "files": [file_path.name for file_path in reader.files],
+        "counts": reader.counts,
+        "sample_size": sample_size,
+        "seed": seed,
+        "stratify": stratify,
+    }
+
+
+def load_or_create_sample(
+    reader: ShardReader,
+    sample_path: Path,
+    sample_size: int,
+    seed: int = 0,
+    stratify: bool = True,
+) -> np.ndarray:
+    """
+    Get the training sample of an index, reusing the one persisted next to
+    it when it was drawn from the same shards with the same settings, so
+    that rebuilding an index trains it on exactly the same rows.
+
+    Args:
+        reader (ShardReader): Embeddings to sample from.
+        sample_path (Path): .npy file of the sample; its settings are kept in
+            a .json file next to it.
+        sample_size (int): Number of rows to sample.
+        seed (int): Seed of the sampler.
+        stratify (bool): Balance the sample across media types.
+
+    Returns:
+        np.ndarray: Sorted global row indices.
+    """
+    key = _sample_key(reader, sample_size, seed, stratify)
+    key_path = sample_path.with_suffix(".json")
+
+    if sample_path.exists() and key_path.exists():
+        with open(key_path, "r") as f:
+            if json.load(f) == key:
+                logger.info(f"Reusing training sample {sample_path}")
+                return np.load(sample_path)
+
+    sample = stratified_sample(reader, sample_size, seed, stratify)
+
+    tmp_path = sample_path.with_name(f"{sample_path.stem}.tmp.npy")
+    np.save(tmp_path, sample)
+    os.replace(tmp_path, sample_path)
+
+    with open(key_path, "w") as f:
+        json.dump(key, f, indent=2)
+    logger.info(f"Saved training sample of {len(sample)} rows to {sample_path}")
+
+    return sample
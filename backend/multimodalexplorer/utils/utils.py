@@ -6,73 +6,94 @@
 
 import argparse
 import json
+import threading
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union
 
 import pyarrow as pa
-import pyarrow.csv as pa_csv
 import torch
 from sonar.inference_pipelines.speech import SpeechToEmbeddingModelPipeline
 from sonar.inference_pipelines.text import TextToEmbeddingModelPipeline
 
 from multimodalexplorer.types.data_types import DataFileType, EmbeddingDataType
-from multimodalexplorer.utils.helpers import DEVICE, VALID_DATASET_TYPES, get_file_path
+from multimodalexplorer.utils.helpers import DEVICE, MODEL_IDS, VALID_DATASET_TYPES
+from multimodalexplorer.utils.raw_data import open_raw_data, take_rows
 
 LOADED_MODELS: Dict[str, Any] = {}
+_load_model_lock = threading.Lock()
 
 LOADED_DATA: pa.Table = None
 
 
-def load_model(dataset_type: str) -> Any:
+def create_model(dataset_type: str) -> Any:
     """
-    Load the model for a specific dataset type.
+    Create the model for a specific dataset type.
 
     Args:
         dataset_type (str): Type of dataset.
-        device (Any): Device to load the model on.
 
     Returns:
-        Any: Loaded model pipeline.
+        Any: Model pipeline, None for types without a model.
     """
     if dataset_type not in VALID_DATASET_TYPES:
         raise ValueError(
             f"Unsupported dataset type: {dataset_type}. Supported types: {', '.join(VALID_DATASET_TYPES)}"
         )
 
-    if dataset_type in LOADED_MODELS:
-        return LOADED_MODELS[dataset_type]
-
     if dataset_type == "text":
-        model = TextToEmbeddingModelPipeline(
-            encoder="text_sonar_basic_encoder",
-            tokenizer="text_sonar_basic_encoder",
+        return TextToEmbeddingModelPipeline(
+            encoder=MODEL_IDS["text"],
+            tokenizer=MODEL_IDS["text"],
             device=DEVICE,
         )
     elif dataset_type == "audio":
-        model = SpeechToEmbeddingModelPipeline(
-            encoder="sonar_speech_encoder_eng", device=DEVICE
-        )
-    else:
-        model = None
+        return SpeechToEmbeddingModelPipeline(encoder=MODEL_IDS["audio"], device=DEVICE)
+
+    return None
+
+
+def load_model(dataset_type: str) -> Any:
+    """
+    Load the model for a specific dataset type once per process.
+
+    Args:
+        dataset_type (str): Type of dataset.
+
+    Returns:
+        Any: Loaded model pipeline.
+    """
+    if dataset_type in LOADED_MODELS:
+        return LOADED_MODELS[dataset_type]
 
-    if model is not None:
-        LOADED_MODELS[dataset_type] = model
+    # Concurrent first calls wait for a single load
+    with _load_model_lock:
+        if dataset_type not in LOADED_MODELS:
+            model = create_model(dataset_type)
+            if model is None:
+                return None
+            LOADED_MODELS[dataset_type] = model
 
-    return model
+    return LOADED_MODELS[dataset_type]
 
 
-def load_raw_data(raw_data_file) -> pa.Table:
+def load_raw_data(
+    raw_data_file: DataFileType, embed_file: Optional[DataFileType] = None
+) -> pa.Table:
     global LOADED_DATA
     if LOADED_DATA is None:
-        dir_path, ext = raw_data_file.values()
-        file_path = get_file_path(dir_path, ext, False)
-
-        LOADED_DATA = pa_csv.read_csv(
-            file_path, parse_options=pa.csv.ParseOptions(delimiter="\t")
-        )
+        LOADED_DATA = open_raw_data(raw_data_file, embed_file)
     return LOADED_DATA
 
 
+def reset_raw_data() -> None:
+    """
+    Drop the cached raw data, so that rows added since it was opened are
+    read on next use.
+    """
+    global LOADED_DATA
+    LOADED_DATA = None
+
+
 def select_params(
     config: Dict[str, Any], key_list: List[str]
 ) -> List[Union[str, int, Dict]]:
@@ -102,36 +123,10 @@ def parse_arguments() -> Dict[str, Union[str, int, Dict]]:
     return config
 
 
-def concat_embed_from_dir(dirname: str) -> torch.Tensor:
-    embeddings_list: List[torch.Tensor] = []
-
-    folder_path: Path = Path(dirname).absolute()
-
-    # Sort files according to their order in the folder
-    files: List[Path] = sorted(folder_path.iterdir(), key=lambda x: x.stat().st_mtime)
-
-    for file_path in files:
-        if file_path.is_file():
-            embeddings: torch.Tensor = torch.load(file_path)
-            embeddings_list.append(embeddings)
-
-    return torch.cat(embeddings_list, dim=0)
-
-
 def get_embeds_details(
-    list: List, raw_data_file: DataFileType
+    list: List, raw_data_file: DataFileType, embed_file: Optional[DataFileType] = None
 ) -> Optional[List[EmbeddingDataType]]:
 
-    data_table = load_raw_data(raw_data_file)
-    results = []
-
-    for idx in list:
-        row = data_table.slice(idx, 1).to_pydict()
-        obj = {
-            "index": idx,
-            "data": row["data"][0],
-            "media_type": row["media_type"][0],
-        }
-        results.append(obj)
+    data_table = load_raw_data(raw_data_file, embed_file)
 
-    return results
+    return take_rows(data_table, list)